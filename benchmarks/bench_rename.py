@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import importlib.util
+from rename_corpus import LIB_PATH, load_corpus, song_name_of, many_bracket_titles
+sys.path.insert(0, LIB_PATH)
+import Utils
+"""
+Offline benchmark of the title renaming functions in lib/Utils.py.
+
+Every function runs over the golden corpus (see rename_corpus.py):
+    1. rename:				the raw titles
+    2. title:				the song names of the renamed titles
+    3. extract_string_within_brackets:	the raw titles
+    4. remove_duplicate_brackets:		the raw titles
+    5. remove_duplicate_brackets_many:	titles with 10 to 40 brackets, the outputs are
+    					compared with the pairwise comparison below, which
+    					is also timed to show the speedup
+and the benchmark reports per function:
+    titles/sec (best of --rounds), p50/p99 latency of a single call,
+    and the peak memory allocated during a pass (by tracemalloc).
+
+With --compare-with, the same functions of another version of Utils.py (e.g., one
+saved by "git show <commit>:lib/Utils.py > /tmp/Utils_old.py") run over the same
+titles, and the speedup of this version is printed below every function. The
+outputs of the other version are not checked.
+
+It fails (exit code 1) when:
+    1. any output differs from the corpus, or
+    2. the throughput of a function drops below (1 - tolerance) of the one
+       recorded in bench_baseline.json.
+The baseline depends on the machine, record it again by --save-baseline
+before comparing changes on another machine.
+
+Usage:
+    cd benchmarks
+    python bench_rename.py
+    python bench_rename.py --save-baseline
+    python bench_rename.py --compare-with /tmp/Utils_old.py
+"""
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+
+def _call(func, args):
+    try:
+        return ["ok", func(*args)]
+    except Exception as e:
+        return ["error", type(e).__name__]
+
+
+def pairwise_remove_duplicate_brackets(filename):
+    # remove_duplicate_brackets scoring every pair of brackets by similar()
+    res = Utils.extract_string_within_brackets(filename)
+    deleted_elements = set()
+    for idx_former in range(0, len(res)-1):
+        for idx_latter in range(idx_former+1, len(res)):
+            if Utils.similar(res[idx_former], res[idx_latter]) > Utils.DUPLICATE_BRACKET_RATIO:
+                deleted_elements.add(res[idx_latter])
+    for del_element in deleted_elements:
+        idx = filename.find(del_element)
+        if idx != 0 and filename[idx-1] == ' ':
+            filename = filename.replace(' '+del_element, '')
+        else:
+            filename = filename.replace(del_element, '')
+    return filename
+
+
+def load_utils(path):
+    # another version of Utils.py, imported under another module name
+    spec = importlib.util.spec_from_file_location("Utils_compared", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _cases(corpus, utils=Utils):
+    # function name -> (function, [(args, expected output)])
+    return {
+        "rename": (utils.rename, [((entry["title"],), entry["rename"]) for entry in corpus]),
+        "title": (utils.title, [((song_name_of(entry["rename"]), False), entry["title_case"])
+                                for entry in corpus if entry["title_case"] is not None]),
+        "extract_string_within_brackets": (utils.extract_string_within_brackets,
+                                           [((entry["title"],), entry["extract"]) for entry in corpus]),
+        "remove_duplicate_brackets": (utils.remove_duplicate_brackets,
+                                      [((entry["title"],), entry["dedupe"]) for entry in corpus]),
+        # expected outputs of this run, the order of removing duplicates depends on the hash seed
+        "remove_duplicate_brackets_many": (utils.remove_duplicate_brackets,
+                                           [((title,), _call(pairwise_remove_duplicate_brackets, (title,)))
+                                            for title in many_bracket_titles()]),
+    }
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_function(func, cases, rounds):
+    """
+    Outputs:
+        (report dict, list of mismatched (args, output, expected))
+    """
+    mismatches = []
+    best_seconds = None
+    latencies = []
+    for round_idx in range(rounds):
+        latencies = []
+        start = time.perf_counter()
+        for args, expected in cases:
+            call_start = time.perf_counter_ns()
+            output = _call(func, args)
+            latencies.append(time.perf_counter_ns() - call_start)
+            if round_idx == 0 and json.loads(json.dumps(output)) != expected:
+                mismatches.append((args, output, expected))
+        seconds = time.perf_counter() - start
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    # memory in a separate pass, tracemalloc slows down every allocation
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for args, _ in cases:
+        _call(func, args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    report = {
+        "calls": len(cases),
+        "titles_per_sec": len(cases) / best_seconds,
+        "p50_us": _percentile(latencies, 0.50) / 1000,
+        "p99_us": _percentile(latencies, 0.99) / 1000,
+        "peak_kb": peak / 1024,
+    }
+    return report, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark of the title renaming functions')
+    parser.add_argument("--rounds", default=5, type=int, help="passes over the corpus per function")
+    parser.add_argument("--tolerance", default=0.5, type=float,
+                        help="max allowed throughput drop against the baseline, e.g., 0.5 means 50%%")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="record the measured throughput as the baseline")
+    parser.add_argument("--functions", nargs="*", default=None, help="only run these functions")
+    parser.add_argument("--compare-with", default=None,
+                        help="another version of Utils.py, print the speedup of this version against it")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r') as f:
+            baseline = json.load(f)
+
+    compared_cases = _cases(corpus, load_utils(args.compare_with)) if args.compare_with else {}
+
+    failed = False
+    reports = {}
+    print(f"{'function':<32}{'calls':>7}{'titles/sec':>13}{'p50 us':>10}{'p99 us':>10}{'peak KB':>10}")
+    for name, (func, cases) in _cases(corpus).items():
+        if args.functions and name not in args.functions:
+            continue
+        # some titles print warnings about unpaired brackets
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                report, mismatches = run_function(func, cases, max(1, args.rounds))
+                compared = run_function(compared_cases[name][0], cases, max(1, args.rounds))[0] \
+                           if name in compared_cases else None
+            finally:
+                sys.stdout = stdout
+        reports[name] = report
+        print(f"{name:<32}{report['calls']:>7}{report['titles_per_sec']:>13.0f}{report['p50_us']:>10.1f}"
+              f"{report['p99_us']:>10.1f}{report['peak_kb']:>10.1f}")
+        if name == "remove_duplicate_brackets_many":
+            reference, _ = run_function(pairwise_remove_duplicate_brackets, cases, max(1, args.rounds))
+            print(f"{'  pairwise similar()':<32}{reference['calls']:>7}{reference['titles_per_sec']:>13.0f}"
+                  f"{reference['p50_us']:>10.1f}{reference['p99_us']:>10.1f}{reference['peak_kb']:>10.1f}"
+                  f"    {report['titles_per_sec'] / reference['titles_per_sec']:.1f}x faster")
+        if compared is not None:
+            print(f"{'  compared Utils.py':<32}{compared['calls']:>7}{compared['titles_per_sec']:>13.0f}"
+                  f"{compared['p50_us']:>10.1f}{compared['p99_us']:>10.1f}{compared['peak_kb']:>10.1f}"
+                  f"    {report['titles_per_sec'] / compared['titles_per_sec']:.1f}x faster")
+
+        if mismatches:
+            failed = True
+            print(f"Error: {len(mismatches)} outputs of {name} differ from the corpus, e.g.,")
+            for call_args, output, expected in mismatches[:5]:
+                print(f"    {call_args[0]!r}: {output!r}, expected {expected!r}")
+        if name in baseline and not args.save_baseline:
+            floor = baseline[name] * (1 - args.tolerance)
+            if report["titles_per_sec"] < floor:
+                failed = True
+                print(f"Error: {name} runs {report['titles_per_sec']:.0f} titles/sec, "
+                      f"below {floor:.0f} ({baseline[name]:.0f} in the baseline).")
+
+    if args.save_baseline:
+        baseline.update({name: round(report["titles_per_sec"]) for name, report in reports.items()})
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"    baseline saved into {BASELINE_PATH}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import random
+import signal
+import argparse
+"""
+The golden corpus of the rename benchmark.
+
+The titles are built from the patterns of youtube music uploads (artists,
+song names with contractions, quotes and all-caps words, featured artists,
+"(Official Video)", "[NCS Release]", "(xxx Remix)", "| Free Download", ...),
+by a fixed random seed, plus adversarial titles: long bracket nests, unpaired
+brackets, emoji-heavy titles and titles with many " - " separators, and fuzzed
+titles with unbalanced brackets around the words the rules look for (see
+unbalanced_titles).
+
+Notice: these are generated titles, not titles scraped from real channels.
+        No list of real titles ships with the repository, and the benchmark
+        runs offline. The generated ones cover the same rules, but not the
+        mistakes of real uploads that nobody thought of.
+
+Every line of rename_corpus.jsonl holds a title and the expected outputs of:
+    1. rename(title)
+    2. title(song_name), song_name is the renamed title after " - "
+    3. extract_string_within_brackets(title)
+    4. remove_duplicate_brackets(title)
+each as ["ok", output] or ["error", exception name].
+
+The corpus is regenerated by:
+    python benchmarks/rename_corpus.py --write
+which records the outputs of lib/Utils.py as it is, thus only run it when
+an output change is intended. Titles on which rename does not return within
+a second are left out (Unix only, by SIGALRM).
+
+Notice: remove_duplicate_brackets removes the duplicates in the order of a
+        set, thus titles with several different duplicated brackets may get
+        different outputs per run (hash randomization), and are skipped here.
+        many_bracket_titles gives such titles, their outputs are compared with
+        the pairwise comparison within the same run by bench_rename.py.
+"""
+
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib')
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rename_corpus.jsonl')
+
+ARTISTS = ["Alan Walker", "Mokita", "Allix X R3HAB", "NEFFEX", "Tobu", "K-391", "Marshmello", "Janji", "DEAF KEV",
+           "Cartoon, Jéja", "Lost Sky", "Elektronomia", "Jim Yosef", "Itro & Tobu", "Ship Wrek", "Zack Hemsey",
+           "iSOAP", "The Chainsmokers", "Avicii", "Kygo", "Illenium", "Said The Sky", "MitiS", "Seven Lions",
+           "Au5", "Vicetone", "Tritonal", "Jay Hardway", "Axero", "Unknown Brain", "Rival x Cadmium", "NIVIRO",
+           "Dirty Palm", "Culture Code", "Electro-Light", "Different Heaven & EH!DE", "Diamond Eyes", "Syn Cole"]
+FEATS = ["Julia Church", "Jamie", "Chris Linton", "RIELL", "Kristina Maria", "Veela", "Laura Brehm", "Anna Yvette",
+         "Sara Skinner", "ROY KNOX", "Bri Tolani", "Harley Bird", "Mike Perry", "Jex", "Mr. FijiWiji", "Coriky"]
+SONGS = ["Faded", "Fallin' Down", "Soulmate", "Heroes Tonight", "Cloud 9", "Invisible", "Sky High", "Blank",
+         "Can't Stop", "I've Been Waiting", "We're Young", "Dreamin'", "T-Shirt", "Anti-Everything", "mRNA",
+         "NAME's Song", "Better with you", "Without Me", "Within Reach", "Fade Away", "Nova", "Feel Good",
+         "Symbolism", "Spectre", "Force", "Daylight", "Ballin'", "Lookin' Back", "Let's Go", "Sun and Moon",
+         "Out of Time", "Cradles", "Light It Up", "Mortals", "Way Back Home", "On & On", "Calling You",
+         "Don't Let Me Down", "Stay with me", "Run with it", "Music Sounds Better", "Radio Silence",
+         "Origin", "Hope", "Superhero", "Crab Rave", "Ignite", "\"Dream\"", "'Alone'", "Vip Lounge"]
+SUFFIXES = ["(Official Music Video)", "[Official Video]", "(Lyrics)", "(Lyric Video)", "| Free Download",
+            "[NCS Release]", "(Remix)", "({feat} Remix)", "(Acoustic Version)", "[Monstercat Release]",
+            "(prod. by {feat})", "(Cover by {feat})", "(Audio)", "VIP", "(Radio Edit)", "[NCS10 Release]",
+            "(feat. {feat})", "(ft. {feat})", "ft. {feat}", "Ft. {feat}", "FT {feat}", "feat {feat}",
+            "Feat. {feat}", "(with {feat})", "with {feat}", "(Official Audio)", "Out Now", "@{feat}",
+            "(Original Mix)", "(Extended Mix)", "[Free DL]", "(Bootleg)", "{feat} Remix", "(Demo)",
+            "(Edit)", "(Flip)", "(Ver. 2)", "(Remix by {feat})", "(Cover) by {feat}", "(Remix) by {feat}",
+            "prod {feat}", "produced by {feat}", "(Premiere)", "[Buy Now]", "(BBC Radio 1)",
+            "{{Official}}", "(Live Version)", "(Acoustic)", "acoustic", "(Vocal Mix)", "- Official Video"]
+ADVERSARIAL = [
+    # unpaired and nested brackets
+    "Song (feat. X", "A - Song ]x[", "A - ((Nested) Remix)", "A - Song {Remix]", "A - Song [[VIP]]",
+    "A - Song (", "A - Song )", "A - ( Song )", "A - Song [ Remix ]", "A - B (C [D {E (F [G {H}])}])",
+    "Tobu - Cloud 9 " + "(" * 40 + "Remix" + ")" * 40,
+    "Tobu - Cloud 9 " + "[" * 20 + "VIP" + "]" * 20,
+    "A - Song " + "(" * 200, "A - Song " + ")" * 200,
+    # repeated brackets
+    "A - Song (Remix) (Remix)", "A - Song (feat. B) (feat. B) [feat. B]",
+    "A - Song " + " ".join(f"(Remix {i})" for i in range(50)),
+    # separators, spaces and quotes
+    "A - ", "No Separator At All", "A – Song  (feat.  B)", " A - Song ", "A - Song(feat.B)",
+    "A (ft. B) - Song [Official]", "A - 'Song'", "A - Song ''Quote''", "A - Song | Official | Audio",
+    "A - (Official Video)", "A - Song with You (feat. B with C)", "A - x" * 20, "A ft B - Song",
+    "A prod. by B - Song", "A ncs release - Song", "A - SONG IN CAPS", "A - song in lower", "A - Song-",
+    "A - -Song", "A - @B", "A - B - C - D - E - F - G - H (Remix)", " - ".join(["Janji"] * 30),
+    "Itro & Tobu - Cloud 9 - Extended - Mix - (feat. Laura Brehm) - Radio Edit",
+    "A - " + "Song " * 200 + "(feat. B)",
+    # emoji
+    "A - Song \U0001F525\U0001F525", "Alan Walker - Faded \U0001F525\U0001F3B5\U0001F3B6✨\U0001F4AF (Official Video) \U0001F525\U0001F525",
+    "\U0001F525\U0001F525\U0001F525 - \U0001F3B5\U0001F3B6 (feat. ✨)",
+    "Tobu - \U0001F3B5 " * 10 + "(Remix)",
+    # unbalanced brackets next to words with '-', rename fails on them
+    "A - feat{-feat['b", "A - &&with&( - [ft. Xwith(ft. X[ft. X-", "A - ft.{- - [Remix'X",
+    "A - ft.[-X-Xprod( -  - b", "A - prod[feat{-with ft.-A",
+]
+# pieces of the fuzzed titles, brackets and the words the rules look for
+UNBALANCED_PIECES = list("()[]{}- &'") + ['feat', 'ft.', 'with', 'X', 'b', 'A', ' - ', 'Remix', 'x', 'prod']
+
+
+def _random_title(rnd):
+    artist = rnd.choice(ARTISTS)
+    if rnd.random() < 0.15:
+        artist += rnd.choice([" (feat. {feat})", " ft. {feat}", " x " + rnd.choice(ARTISTS), " & {feat}",
+                              " with {feat}", " (prod. {feat})"])
+    song = rnd.choice(SONGS)
+    if rnd.random() < 0.1:
+        song = song.upper() if rnd.random() < 0.5 else song.lower()
+    parts = [song]
+    for _ in range(rnd.choice([0, 1, 1, 1, 2, 2, 3])):
+        parts.append(rnd.choice(SUFFIXES))
+    title = f"{artist} - " + " ".join(parts)
+    if rnd.random() < 0.05:
+        title = title.replace(" (", "(", 1)
+    if rnd.random() < 0.03:
+        title = title.replace(" - ", " – ", 1)
+    if rnd.random() < 0.03:
+        title = title.replace(" ", "  ", 1)
+    return title.format(feat=rnd.choice(FEATS))
+
+
+def unbalanced_titles(n=400, seed=20230411):
+    # random sequences of brackets and rule words, most of them unbalanced,
+    # e.g., "A - prod[feat{-with ft.-A"
+    rnd = random.Random(seed)
+    return ["A - " + "".join(rnd.choice(UNBALANCED_PIECES) for _ in range(rnd.randint(1, 14)))
+            for _ in range(n)]
+
+
+def generate_titles(n=5000, seed=20230411):
+    rnd = random.Random(seed)
+    titles = list(ADVERSARIAL)
+    for title in unbalanced_titles(seed=seed):
+        if title not in titles:
+            titles.append(title)
+    seen = set(titles)
+    while len(titles) < n:
+        title = _random_title(rnd)
+        if title not in seen:
+            seen.add(title)
+            titles.append(title)
+    return titles
+
+
+def many_bracket_titles(n=200, seed=20230411):
+    # titles with 10 to 40 bracket strings, many of them near duplicates,
+    # e.g., "(Remix)", "(Remix 2)", "(feat. Jamie)", "(ft. Jamie)"
+    rnd = random.Random(seed)
+    brackets = [s for s in SUFFIXES if s[0] in '([' and s[-1] in ')]']
+    titles = []
+    for _ in range(n):
+        parts = [rnd.choice(SONGS)]
+        for _ in range(rnd.randint(10, 40)):
+            bracket = rnd.choice(brackets)
+            if rnd.random() < 0.5:
+                bracket = bracket[:-1] + f" {rnd.randint(1, 9)}" + bracket[-1]
+            parts.append(bracket)
+        titles.append(f"{rnd.choice(ARTISTS)} - " + " ".join(parts).format(feat=rnd.choice(FEATS)))
+    return titles
+
+
+def _call(func, *args):
+    try:
+        return ["ok", func(*args)]
+    except Exception as e:
+        return ["error", type(e).__name__]
+
+
+def song_name_of(renamed):
+    # input of title(), the part after the first " - " of a renamed title
+    if renamed[0] != "ok" or ' - ' not in renamed[1]:
+        return
+    return renamed[1].split(' - ', 1)[1]
+
+
+def expected_outputs(utils, title):
+    renamed = _call(utils.rename, title)
+    song_name = song_name_of(renamed)
+    return {
+        "title": title,
+        "rename": renamed,
+        "title_case": _call(utils.title, song_name, False) if song_name else None,
+        "extract": _call(utils.extract_string_within_brackets, title),
+        "dedupe": _call(utils.remove_duplicate_brackets, title),
+    }
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class _timeout(BaseException):
+    # not an Exception, thus not taken as an error of the renaming functions
+    pass
+
+
+def _raise_timeout(*args):
+    raise _timeout()
+
+
+def _dedupe_order_dependent(utils, title):
+    # True if remove_duplicate_brackets removes more than one duplicate from title,
+    # whose output then depends on the order of a set
+    try:
+        res = utils.extract_string_within_brackets(title)
+    except Exception:
+        return False
+    return res is not None and len(utils.find_near_duplicates(res)) > 1
+
+
+def write_corpus(n, path=CORPUS_PATH):
+    sys.path.insert(0, LIB_PATH)
+    import Utils
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    count, skipped, unordered = 0, 0, 0
+    with open(os.devnull, 'w') as devnull, open(path, 'w', encoding='utf-8') as f:
+        for title in generate_titles(n):
+            stdout, sys.stdout = sys.stdout, devnull
+            if _dedupe_order_dependent(Utils, title):
+                sys.stdout = stdout
+                unordered += 1
+                continue
+            signal.setitimer(signal.ITIMER_REAL, 1)
+            try:
+                entry = expected_outputs(Utils, title)
+            except _timeout:
+                entry = None
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                sys.stdout = stdout
+            if entry is None:
+                skipped += 1
+                continue
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            count += 1
+    print(f"    {count} titles written into {path}, {skipped} titles skipped as rename does not return, "
+          f"{unordered} titles skipped as remove_duplicate_brackets depends on the order of a set.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='generate the golden corpus of the rename benchmark')
+    parser.add_argument("--write", action="store_true",
+                        help="record the current outputs of lib/Utils.py as the expected outputs")
+    parser.add_argument("--size", default=5000, type=int, help="number of titles")
+    args = parser.parse_args()
+    if args.write:
+        write_corpus(args.size)
+    else:
+        print(f"    {len(load_corpus())} titles in {CORPUS_PATH}, use --write to regenerate it.")
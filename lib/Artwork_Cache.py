@@ -0,0 +1,199 @@
+import os
+import json
+import shutil
+import threading
+from urllib.parse import urlsplit
+from Checkpoint_Log import write_json_atomic
+from Download_Manifest import file_digest
+"""
+A content-addressed artwork cache shared by all videos and channels.
+
+A music channel often puts the same artstation/pixiv/unsplash artwork under
+many uploads, and without a cache every video resolves the artwork page again
+and downloads the same images into its own folder. Thus here keeps every
+downloaded image once, named by its sha1, under cache_dir:
+    cache_dir/
+        artwork_cache.json		index: normalized artwork url -> files
+        objects/3f/3f786850e387550fdab836ed7e6dc881de23001b.jpg
+The index maps the artwork url (without scheme, "www.", query and fragment)
+to the files it was saved as:
+    {
+        "artstation.com/artwork/abc": {
+            "files": [{"filename": "abc.jpg", "sha1": "3f78...", "size": 420}]
+        }
+    }
+A later video with the same artwork url gets the files hardlinked from the
+cache into its folder (copied if the folder is on another file system), without
+any browser or network request. The same image behind different urls is
+stored only once.
+
+The index is kept in least recently used order. When the stored images exceed
+max_bytes, the least recently used urls are dropped, and an image is removed
+from the cache as soon as no url refers to it. Files linked into the video
+folders are never touched.
+
+Hits and misses are counted, see get_stats.
+"""
+
+
+def normalize_url(url):
+    # "https://www.artstation.com/artwork/abc/?x=1" -> "artstation.com/artwork/abc"
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    return host + parts.path.rstrip('/')
+
+
+def link_or_copy(src_path, dst_path):
+    # hardlink src_path to dst_path, copy it if they are on different file systems
+    try:
+        os.link(src_path, dst_path)
+    except OSError:
+        tmp_path = dst_path + '.part'
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+
+
+class artwork_cache:
+    name = "artwork_cache"
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, save_every=20, detail_disp=False):
+
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "artwork_cache.json")
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self.detail_disp = detail_disp
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        # normalized url -> {"files": [...]}, least recently used first
+        self.index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except ValueError:
+                print(f"Error: {self.index_path} is broken, start a new artwork cache.")
+        # number of urls referring to every stored image, and the total size of them
+        self._refs = {}
+        self._sizes = {}
+        for entry in self.index.values():
+            self._add_refs(entry)
+
+    def _object_path(self, sha1, filename):
+        ext = os.path.splitext(filename)[1]
+        return os.path.join(self.objects_dir, sha1[:2], sha1 + ext)
+
+    def _add_refs(self, entry):
+        for file in entry["files"]:
+            path = self._object_path(file["sha1"], file["filename"])
+            self._refs[path] = self._refs.get(path, 0) + 1
+            self._sizes[path] = file["size"]
+
+    def _remove_refs(self, entry):
+        for file in entry["files"]:
+            path = self._object_path(file["sha1"], file["filename"])
+            self._refs[path] -= 1
+            if self._refs[path] == 0:
+                del self._refs[path]
+                del self._sizes[path]
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _updated(self):
+        # called with self._lock held
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save()
+
+    def _save(self):
+        write_json_atomic(self.index_path, self.index)
+        self._unsaved = 0
+
+    def _evict(self):
+        # called with self._lock held, keep at least the newest url
+        while sum(self._sizes.values()) > self.max_bytes and len(self.index) > 1:
+            url = next(iter(self.index))
+            self._remove_refs(self.index.pop(url))
+            self.stats["evictions"] += 1
+            if self.detail_disp:
+                print(f"    artwork cache: evict {url}")
+
+    def fetch(self, url, saved_path):
+        """
+        Input Arguments:
+            1. url:		artwork url, e.g., video_info["artwork_url"]
+            2. saved_path:	folder to put the cached images in
+        Outputs:
+            the list of image paths in saved_path, or None if the artwork is not cached.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is not None and not all(os.path.exists(self._object_path(file["sha1"], file["filename"]))
+                                             for file in entry["files"]):
+                # removed from the disk by someone else
+                self._remove_refs(self.index.pop(key))
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return
+            # most recently used goes to the end
+            self.index[key] = self.index.pop(key)
+            self.stats["hits"] += 1
+            self._updated()
+
+            saved_paths = []
+            for file in entry["files"]:
+                path = os.path.join(saved_path, file["filename"])
+                if not os.path.exists(path):
+                    link_or_copy(self._object_path(file["sha1"], file["filename"]), path)
+                saved_paths.append(path)
+        if self.detail_disp:
+            print(f"    artwork cache: {len(saved_paths)} images of {url} linked into {saved_path}")
+        return saved_paths
+
+    def store(self, url, paths):
+        """
+        Input Arguments:
+            1. url:		artwork url
+            2. paths:		list of downloaded image paths of the artwork
+        """
+        if not paths:
+            return
+        files = []
+        for path in paths:
+            files.append({"filename": os.path.basename(path), "sha1": file_digest(path),
+                          "size": os.path.getsize(path)})
+        key = normalize_url(url)
+        with self._lock:
+            for path, file in zip(paths, files):
+                object_path = self._object_path(file["sha1"], file["filename"])
+                if not os.path.exists(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    link_or_copy(path, object_path)
+            old_entry = self.index.pop(key, None)
+            entry = {"files": files}
+            self.index[key] = entry
+            # refer to the new images first, which may be the same as the old ones
+            self._add_refs(entry)
+            if old_entry is not None:
+                self._remove_refs(old_entry)
+            self._evict()
+            self._updated()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["urls"] = len(self.index)
+            stats["bytes"] = sum(self._sizes.values())
+            return stats
+
+    def close(self):
+        with self._lock:
+            self._save()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Rate_Limiter import host_of
+from Download_Executor import HOST_CONCURRENCY
+"""
+An asyncio engine which downloads artwork images concurrently.
+
+An artstation project often has several images, and a channel has many
+videos with artworks. Downloading them one at a time leaves the bandwidth
+idle while waiting for every response. Thus here runs an asyncio event loop
+on its own thread, and every download is a coroutine which:
+    1. waits for a slot of its host (an asyncio.Semaphore per host, e.g.,
+       2 for artstation.com and 1 for pixiv.net, see HOST_CONCURRENCY)
+    2. runs the blocking download function (requests, file writes) on a
+       worker thread by loop.run_in_executor
+All images of a batch are downloaded at the same time within the host
+limits, and the batch returns when all of them are done.
+
+The slot is taken by the site of the artwork page (e.g., "pixiv.net") when
+it is given, as the images may come from another host (e.g., pixiv images
+are served by i.pximg.net), otherwise by the host of the download url. The
+json api of an artwork (e.g., "https://www.pixiv.net/ajax/illust/{id}") is
+fetched by run under the same slot, thus the limit of a site covers all of
+its requests.
+
+The pipeline threads are synchronous, thus they call the engine in batches:
+    engine = async_artwork_engine(workers=4)
+    results = engine.run_batch([(url, download_func, (url, saved_path)), ...], site="artstation.com")
+    json_value = engine.run(json_url, fetch_func, json_url, site="pixiv.net")
+The results are in the order of the calls, None for a call that raised.
+
+Notice: run_batch must not be called by a download function running on the
+        engine, which would wait for the slots held by itself.
+"""
+
+
+class async_artwork_engine:
+    name = "async_artwork_engine"
+
+    def __init__(self, workers=4, host_concurrency=None, detail_disp=False):
+
+        self.workers = max(1, int(workers))
+        self.host_concurrency = dict(HOST_CONCURRENCY)
+        if host_concurrency is not None:
+            self.host_concurrency.update(host_concurrency)
+        self.detail_disp = detail_disp
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="artwork")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="artwork engine", daemon=True)
+        self._thread.start()
+        # created on the loop thread at the first use of every host
+        self._host_slots = {}
+
+    def _slot(self, host):
+        # called on the loop thread
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(max(1, self.host_concurrency.get(host, self.workers)))
+        return self._host_slots[host]
+
+    async def _download(self, site, url, func, args):
+        async with self._slot(site or host_of(url)):
+            try:
+                return await self._loop.run_in_executor(self._executor, func, *args)
+            except Exception as e:
+                print(f"Error: fail to download {url}, {e}")
+
+    async def _download_all(self, calls, site):
+        return await asyncio.gather(*[self._download(site, url, func, args) for url, func, args in calls])
+
+    def run_batch(self, calls, site=None):
+        """
+        Input Arguments:
+            1. calls:		list of (url, func, args), func(*args) downloads from url
+            2. site:		host of the artwork page whose slot is taken, e.g., "pixiv.net",
+            			None to take the slot of the host of every url
+        Outputs:
+            the list of results of the calls, None for a call that raised.
+        """
+        if not calls:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._download_all(calls, site), self._loop)
+        return future.result()
+
+    def run(self, url, func, *args, site=None):
+        # a batch of one call
+        return self.run_batch([(url, func, args)], site)[0]
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=True)
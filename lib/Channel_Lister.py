@@ -0,0 +1,121 @@
+import re
+from urllib.parse import urlparse
+from Page_Parser import youtube_page_data, iter_values
+"""
+List all video ids of a youtube channel without a browser.
+
+The first page of "{channel_url}/videos" embeds the first batch of videos
+(around 30) in ytInitialData, plus a continuation token. The rest of the
+video grid is loaded page by page from the innertube browse endpoint
+("/youtubei/v1/browse") with the continuation token of the previous page.
+Thus here pages through the grid by plain http requests and streams the
+video ids as each page arrives, instead of scrolling a browser to the
+bottom of the channel.
+
+All requests go through a youtube_http_fetcher, whose base_url can point
+to a local server that serves recorded channel pages and browse responses.
+"""
+
+# used when the innertube client version can not be found in the page
+DEFAULT_CLIENT_VERSION = "2.20230411.00.00"
+
+
+class youtube_channel_lister:
+    name = "youtube_channel_lister"
+
+    def __init__(self, http_fetcher, detail_disp=False):
+
+        self.http_fetcher = http_fetcher
+        self.detail_disp = detail_disp
+
+    def open_channel(self, channel_videos_url):
+        """
+        Input Arguments:
+            1. channel_videos_url:	e.g., "https://www.youtube.com/@NoCopyrightSounds/videos"
+        Outputs:
+            a youtube_page_data object of the first page, None if it can not be fetched.
+        """
+        path = urlparse(channel_videos_url).path
+        html = self.http_fetcher.get_page(path, params={"hl": "en"})
+        if html is None:
+            return
+        return youtube_page_data(html)
+
+    def extract_channel_id(self, channel_page):
+        metadata = channel_page.get("channelMetadataRenderer")
+        if isinstance(metadata, dict) and "externalId" in metadata.keys():
+            return metadata["externalId"]
+        return channel_page.get("externalId") or channel_page.get("channelId")
+
+    def _fetch_innertube_config(self, html):
+        api_key = re.search(r'"INNERTUBE_API_KEY"\s*:\s*"([^"]+)"', html)
+        client_version = re.search(r'"INNERTUBE_CLIENT_VERSION"\s*:\s*"([^"]+)"', html)
+        api_key = api_key.group(1) if api_key else None
+        client_version = client_version.group(1) if client_version else DEFAULT_CLIENT_VERSION
+        return api_key, client_version
+
+    def _fetch_video_ids_and_token(self, json_objects):
+        video_ids = []
+        token = None
+        for json_object in json_objects:
+            for renderer_name in ["videoRenderer", "gridVideoRenderer"]:
+                for renderer in iter_values(json_object, renderer_name):
+                    if isinstance(renderer, dict) and "videoId" in renderer.keys():
+                        video_ids.append(renderer["videoId"])
+            # the continuation of the video grid, other continuations in the
+            # page (e.g., sort filter chips) are not wrapped by continuationItemRenderer
+            for item in iter_values(json_object, "continuationItemRenderer"):
+                try:
+                    token = item["continuationEndpoint"]["continuationCommand"]["token"]
+                except (KeyError, TypeError):
+                    continue
+        return video_ids, token
+
+    def iter_video_id_pages(self, channel_page):
+        """
+        Input Arguments:
+            1. channel_page:		youtube_page_data of the channel video page
+        Outputs:
+            a generator of video id lists, one list per page of the video grid,
+            sorted from the newest upload time to the oldest. The generator returns
+            True after the last page, or False when a page can not be fetched
+            (i.e., the listed video ids are not the whole channel).
+        """
+        seen = set()
+
+        def _new_ids(video_ids):
+            new_ids = []
+            for video_id in video_ids:
+                if video_id not in seen:
+                    seen.add(video_id)
+                    new_ids.append(video_id)
+            return new_ids
+
+        video_ids, token = self._fetch_video_ids_and_token(channel_page.islands)
+        yield _new_ids(video_ids)
+
+        api_key, client_version = self._fetch_innertube_config(channel_page.html)
+        params = {"prettyPrint": "false"}
+        if api_key is not None:
+            params["key"] = api_key
+        page_count = 1
+        while token is not None:
+            payload = {
+                "context": {"client": {"clientName": "WEB", "clientVersion": client_version, "hl": "en"}},
+                "continuation": token,
+            }
+            data = self.http_fetcher.post_json("/youtubei/v1/browse", payload, params=params)
+            if data is None:
+                print(f"Error: could not fetch page {page_count+1} of the channel video list, stop listing.")
+                return False
+            video_ids, token = self._fetch_video_ids_and_token([data])
+            page_count += 1
+            if self.detail_disp:
+                print(f"    channel video list page {page_count}: {len(video_ids)} videos")
+            yield _new_ids(video_ids)
+        return True
+
+    def iter_video_ids(self, channel_page):
+        for video_ids in self.iter_video_id_pages(channel_page):
+            for video_id in video_ids:
+                yield video_id
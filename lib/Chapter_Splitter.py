@@ -0,0 +1,308 @@
+import os
+import mmap
+import subprocess
+from bisect import bisect_left, bisect_right
+"""
+Split an mp3 file into chapters without decoding it.
+
+An mp3 file is a sequence of frames, every frame starts with a 4 bytes header
+which tells its length and how many samples (time) it contains. Thus here
+memory-maps the file, scans the frame headers once and records the byte offset
+and the start time of every frame. Every chapter is then cut at the frame
+boundaries nearest to its start and end time, by copying the bytes in between.
+
+Compared with AudioSegment.from_mp3 once per chapter, the file is neither
+decoded to PCM nor encoded again, all chapters are cut from a single scan,
+and the memory used is the frame index (two numbers per frame) instead of
+the samples of the whole file.
+
+Handled on the way:
+    1. ID3v2 tag at the beginning, ID3v1 ("TAG") and APE tags at the end.
+    2. Xing/Info/VBRI header frame written by VBR encoders, which contains no
+       audio and would carry the wrong frame count into every chapter, so
+       it is not copied.
+    3. garbage between frames, skipped by searching the next valid header.
+
+Notice: layer III frames may borrow bits from the previous frame (bit reservoir),
+        thus a few milliseconds at the start of a chapter may be decoded as
+        silence. This is the usual trade-off of stream-copy cutters (e.g.,
+        mp3splt, ffmpeg -c copy).
+
+Other formats (e.g., mp4, webm) are split by split_chapters_by_ffmpeg, which
+exports all chapters of a video in one ffmpeg process by stream copy.
+"""
+
+# bitrates in kbps, indexed by [version is MPEG1][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# sample rates in Hz, indexed by version bits
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],	# MPEG1
+    2: [22050, 24000, 16000],	# MPEG2
+    0: [11025, 12000, 8000],	# MPEG2.5
+}
+
+
+def parse_frame_header(data, pos):
+    """
+    Input Arguments:
+        1. data:	bytes-like object (e.g., mmap) of the mp3 file
+        2. pos:		offset of the frame header
+    Outputs:
+        (frame_length, samples_per_frame, sample_rate), or None if there is no valid header at pos.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return
+    version_bits = (data[pos + 1] >> 3) & 0x03
+    layer_bits = (data[pos + 1] >> 1) & 0x03
+    bitrate_idx = (data[pos + 2] >> 4) & 0x0F
+    sample_rate_idx = (data[pos + 2] >> 2) & 0x03
+    padding = (data[pos + 2] >> 1) & 0x01
+    # version 1 is reserved, layer 0 is reserved, bitrate 0 is free format, 15 is bad
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in [0, 15] or sample_rate_idx == 3:
+        return
+
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[mpeg1][layer][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_idx]
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        # layer III of MPEG2 and MPEG2.5
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+    return frame_length, samples_per_frame, sample_rate
+
+
+def _id3v2_size(data, pos=0):
+    # size of the ID3v2 tag at pos, 0 if there is none
+    if data[pos:pos + 3] != b"ID3" or pos + 10 > len(data):
+        return 0
+    size = 0
+    for byte in data[pos + 6:pos + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[pos + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_vbr_header_frame(data, pos):
+    # Xing/Info header after the side info, or VBRI header at a fixed offset
+    mpeg1 = ((data[pos + 1] >> 3) & 0x03) == 3
+    mono = ((data[pos + 3] >> 6) & 0x03) == 3
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    xing_pos = pos + 4 + side_info
+    if data[xing_pos:xing_pos + 4] in [b"Xing", b"Info"]:
+        return True
+    return data[pos + 36:pos + 40] == b"VBRI"
+
+
+class mp3_chapter_splitter:
+    name = "mp3_chapter_splitter"
+
+    def __init__(self, mp3_path):
+
+        self.mp3_path = mp3_path
+        # byte offset and start time (in millionseconds) of every audio frame,
+        # plus one entry at the end of the last frame
+        self.frame_offsets = []
+        self.frame_times = []
+        # indices of frames after garbage data, and the end of the frame before the garbage
+        self._gaps = []
+        self._gap_starts = {}
+        self._mm = None
+        self._file = open(mp3_path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index_frames()
+        except:
+            self.close()
+            raise
+
+    def _audio_end(self):
+        # exclude ID3v1 and APE tags at the end of the file
+        mm = self._mm
+        end = len(mm)
+        if end >= 128 and mm[end - 128:end - 125] == b"TAG":
+            end -= 128
+        if end >= 32 and mm[end - 32:end - 24] == b"APETAGEX":
+            ape_size = int.from_bytes(mm[end - 20:end - 16], 'little')
+            # the size excludes the 32 bytes header, which exists if bit 31 of the flags is set
+            has_header = mm[end - 9] & 0x80
+            end -= ape_size + (32 if has_header else 0)
+        return max(0, end)
+
+    def _index_frames(self):
+        mm = self._mm
+        end = self._audio_end()
+        pos = _id3v2_size(mm)
+        time_ms = 0.0
+        # end of the last frame, the next frame is expected right here
+        frames_end = pos
+        first_frame = True
+        while pos + 4 <= end:
+            header = parse_frame_header(mm, pos)
+            # after garbage data, a frame header is only trusted when the next frame
+            # follows it (or the file ends), otherwise it's a false sync
+            if header is not None and pos != frames_end:
+                next_pos = pos + header[0]
+                if next_pos < end - 4 and parse_frame_header(mm, next_pos) is None:
+                    header = None
+            if header is None:
+                next_sync = mm.find(b"\xff", pos + 1, end)
+                if next_sync == -1:
+                    break
+                pos = next_sync
+                continue
+
+            frame_length, samples_per_frame, sample_rate = header
+            if pos + frame_length > end:
+                # truncated last frame
+                break
+            if first_frame and _is_vbr_header_frame(mm, pos):
+                first_frame = False
+                pos += frame_length
+                frames_end = pos
+                continue
+            first_frame = False
+            if pos != frames_end and self.frame_offsets:
+                self._gaps.append(len(self.frame_offsets))
+                self._gap_starts[len(self.frame_offsets)] = frames_end
+            self.frame_offsets.append(pos)
+            self.frame_times.append(time_ms)
+            time_ms += samples_per_frame * 1000 / sample_rate
+            pos += frame_length
+            frames_end = pos
+
+        if not self.frame_offsets:
+            raise ValueError(f"no mp3 frames found in {self.mp3_path}")
+        self.frame_offsets.append(frames_end)
+        self.frame_times.append(time_ms)
+
+    def duration(self):
+        # in millionseconds
+        return self.frame_times[-1]
+
+    def _nearest_frame(self, time_ms):
+        # index of the frame boundary nearest to time_ms
+        idx = bisect_left(self.frame_times, time_ms)
+        if idx >= len(self.frame_times):
+            return len(self.frame_times) - 1
+        if idx > 0 and time_ms - self.frame_times[idx - 1] <= self.frame_times[idx] - time_ms:
+            return idx - 1
+        return idx
+
+    def split(self, chapters):
+        """
+        Input Arguments:
+            1. chapters:	list of (start_time, end_time, export_path), times in millionseconds,
+                                end_time None means the end of the file.
+        Outputs:
+            the list of export paths written.
+        """
+        exported = []
+        for start_time, end_time, export_path in chapters:
+            start_idx = self._nearest_frame(start_time)
+            end_idx = self._nearest_frame(end_time) if end_time is not None else len(self.frame_offsets) - 1
+            if end_idx <= start_idx:
+                print(f"Error: chapter {export_path} is shorter than one frame, skip to next.")
+                continue
+            tmp_path = export_path + '.part'
+            with open(tmp_path, 'wb') as f:
+                # copy the frames only, without the garbage data between them
+                idx = start_idx
+                for gap_idx in self._gaps[bisect_right(self._gaps, start_idx):bisect_right(self._gaps, end_idx)]:
+                    f.write(self._mm[self.frame_offsets[idx]:self._gap_starts[gap_idx]])
+                    idx = gap_idx
+                f.write(self._mm[self.frame_offsets[idx]:self.frame_offsets[end_idx]])
+            os.replace(tmp_path, export_path)
+            exported.append(export_path)
+        return exported
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+########################## functions below are run by a process pool, one call per video ##########################
+
+def split_mp3_chapters(mp3_path, chapters):
+    """
+    Input Arguments:
+        1. mp3_path:	the mp3 file
+        2. chapters:	list of (start_time, end_time, export_path), times in millionseconds
+    Outputs:
+        the list of export paths written, raises ValueError if mp3_path has no mp3 frames.
+    """
+    with mp3_chapter_splitter(mp3_path) as splitter:
+        return splitter.split(chapters)
+
+
+def _part_path(export_path):
+    # keep the extension, which tells ffmpeg the output format
+    root, ext = os.path.splitext(export_path)
+    return root + '.part' + ext
+
+
+def ffmpeg_chapter_command(input_path, chapters):
+    # one input per chapter, seeked before it is opened (-ss/-t ahead of its -i),
+    # every output stream-copies its own input.
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y"]
+    for start_time, end_time, export_path in chapters:
+        command += ["-ss", f"{start_time / 1000:.3f}"]
+        if end_time is not None:
+            command += ["-t", f"{(end_time - start_time) / 1000:.3f}"]
+        command += ["-i", input_path]
+    for idx, (_, _, export_path) in enumerate(chapters):
+        command += ["-map", str(idx), "-c", "copy", "-avoid_negative_ts", "make_zero", _part_path(export_path)]
+    return command
+
+
+def split_chapters_by_ffmpeg(input_path, chapters):
+    """
+    Input Arguments:
+        1. input_path:	the video (or audio) file
+        2. chapters:	list of (start_time, end_time, export_path), times in millionseconds
+    Outputs:
+        the list of export paths written, raises subprocess.CalledProcessError if ffmpeg fails.
+
+    All chapters are exported by one ffmpeg process, which copies the streams (no
+    re-encoding) into every output. Every chapter is an input of its own which is
+    seeked before it is read, thus with stream copy a chapter starts at the last
+    key frame at or before its start time (a little earlier than asked, never a
+    broken first GOP), and only the part of the file after that key frame is read.
+    """
+    if not chapters:
+        return []
+    subprocess.run(ffmpeg_chapter_command(input_path, chapters), check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    exported = []
+    for _, _, export_path in chapters:
+        os.replace(_part_path(export_path), export_path)
+        exported.append(export_path)
+    return exported
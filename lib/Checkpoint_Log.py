@@ -0,0 +1,124 @@
+import os
+import json
+import time
+"""
+An append-only checkpoint log for the video info fetch process.
+
+Rewriting the whole "channel_videos_info_list.json" after every fetched
+video costs O(n^2) bytes over a channel, and a crash in the middle of the
+write corrupts the only copy. Thus here appends one json line per fetched
+video into "channel_videos_info_list.jsonl":
+    {"video_id": "mpXkkqWK7wg", "info": {...}}
+    {"video_id": "xxxxxxxxxxx", "info": null}      # e.g., Shorts, skipped
+The file is flushed after every line and fsynced in batches (every
+fsync_every lines or fsync_interval seconds). When the fetch process is
+finished, the log is compacted into the final json file by an atomic
+rename, and then removed.
+
+A torn last line (power failure during a write) is ignored when the log
+is read, and cut off before new lines are appended.
+"""
+
+
+def write_json_atomic(path, data):
+    # write into a temporary file, then rename it to path,
+    # thus path either contains the old or the new content.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class video_info_checkpoint_log:
+    name = "video_info_checkpoint_log"
+
+    def __init__(self, log_path, fsync_every=20, fsync_interval=30):
+
+        self.log_path = log_path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._f = None
+        self._unsynced = 0
+        self._last_sync_time = time.time()
+
+    def exists(self):
+        return os.path.exists(self.log_path)
+
+    def _read_entries(self):
+        # returns all complete entries and the byte length they occupy
+        entries = []
+        valid_length = 0
+        if not self.exists():
+            return entries, valid_length
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_length += len(line)
+        return entries, valid_length
+
+    def read(self):
+        """
+        Outputs:
+            1. video_info_list:		all video info recorded in the log
+            2. last_video_id:		the video id at the tail of the log, which
+                                                 is the resume point, None if log is empty.
+        """
+        entries, _ = self._read_entries()
+        video_info_list = [entry['info'] for entry in entries if entry['info'] is not None]
+        last_video_id = entries[-1]['video_id'] if entries != [] else None
+        return video_info_list, last_video_id
+
+    def read_video_ids(self):
+        # ids of all videos recorded in the log, including the skipped ones
+        entries, _ = self._read_entries()
+        return set(entry['video_id'] for entry in entries)
+
+    def _open(self):
+        if self._f is None:
+            _, valid_length = self._read_entries()
+            self._f = open(self.log_path, 'ab')
+            # cut off a torn line left by an interrupted write
+            self._f.truncate(valid_length)
+        return self._f
+
+    def append(self, video_id, info):
+        f = self._open()
+        line = json.dumps({"video_id": video_id, "info": info}, ensure_ascii=False) + '\n'
+        f.write(line.encode('utf-8'))
+        f.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or \
+            time.time() - self._last_sync_time > self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._f is not None and self._unsynced > 0:
+            os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync_time = time.time()
+
+    def close(self):
+        if self._f is not None:
+            self.sync()
+            self._f.close()
+            self._f = None
+
+    def reset(self):
+        # drop the log of a previous fetch process
+        self.close()
+        if self.exists():
+            os.remove(self.log_path)
+
+    def compact(self, json_path, video_info_list):
+        # save all video info into the final json file, then remove the log
+        self.close()
+        write_json_atomic(json_path, video_info_list)
+        if self.exists():
+            os.remove(self.log_path)
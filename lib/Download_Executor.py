@@ -0,0 +1,149 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Utils import pit_manager
+from Rate_Limiter import host_of
+"""
+A download executor shared by all channels.
+
+Downloading a big backfill is bound by the bandwidth, not by the cpu, thus
+here runs the media downloads of videos on a pool of worker threads, and limits
+how many of them hit the same host at the same time. HOST_CONCURRENCY holds the
+limits per host:
+    1. googlevideo.com:	youtube media, max_concurrent_downloads
+    2. artstation.com:	artstation artworks
+    3. pixiv.net:	pixiv artworks (pixiv is the first one to block parallel requests)
+Hosts not listed are only limited by the number of workers. Artworks are not
+submitted here: the artwork stage of the channel pipeline calls _download_artwork
+directly, and its images are downloaded by Artwork_Engine.py, which takes the
+limits of artstation.com and pixiv.net from HOST_CONCURRENCY.
+
+A download raising an exception is tried again after a backoff, which is
+doubled for every next try, and the exception is raised to the caller when
+all tries are used up.
+
+The progress of all downloads (done, running, queued, failed and the running
+downloads per host) is shown in one status bar shared by all channels.
+
+Usage:
+    executor = download_executor(workers=4)
+    future = executor.submit("googlevideo.com", download_media_func, *args)
+    result = executor.run("googlevideo.com", download_media_func, *args)	# blocks until done
+"""
+
+# max number of downloads at the same time per host
+HOST_CONCURRENCY = {
+    "googlevideo.com": 2,
+    "artstation.com": 2,
+    "pixiv.net": 1,
+}
+
+
+class download_executor:
+    name = "download_executor"
+
+    def __init__(self, workers=4, host_concurrency=None, try_count=3, backoff=5,
+                 show_progress=True, detail_disp=False):
+
+        self.workers = max(1, int(workers))
+        self.host_concurrency = dict(HOST_CONCURRENCY)
+        if host_concurrency is not None:
+            self.host_concurrency.update(host_concurrency)
+        self.try_count = try_count
+        # seconds to wait before the first retry
+        self.backoff = backoff
+        self.show_progress = show_progress
+        self.detail_disp = detail_disp
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="download")
+        self._host_slots = {host: threading.BoundedSemaphore(max(1, n))
+                            for host, n in self.host_concurrency.items()}
+        self._lock = threading.Lock()
+        self.progress = {"done": 0, "running": 0, "queued": 0, "failed": 0, "retried": 0}
+        self._running_per_host = {}
+        self._status_bar = None
+
+    def _update(self, host=None, **changes):
+        with self._lock:
+            for key, n in changes.items():
+                self.progress[key] += n
+            if host is not None and "running" in changes.keys():
+                self._running_per_host[host] = self._running_per_host.get(host, 0) + changes["running"]
+            self._refresh()
+
+    def _refresh(self):
+        # called with self._lock held
+        if not self.show_progress:
+            return
+        hosts = ' '.join(f"{host} {n}/{self.host_concurrency[host]}"
+                         for host, n in self._running_per_host.items() if host in self.host_concurrency)
+        text = (f"downloads: {self.progress['done']} done | {self.progress['running']} running | "
+                f"{self.progress['queued']} queued | {self.progress['failed']} failed | {hosts}")
+        try:
+            if self._status_bar is None:
+                self._status_bar = pit_manager().status_bar(text)
+            else:
+                self._status_bar.update(text)
+        except Exception:
+            # e.g., no terminal to draw on
+            self.show_progress = False
+
+    def _run(self, host, func, args, kwargs):
+        slot = self._host_slots.get(host)
+        try_count = self.try_count
+        wait = self.backoff
+        # queued until it gets a slot of its host for the first time
+        queued = 1
+        while True:
+            if slot is not None:
+                slot.acquire()
+            self._update(host, running=1, queued=-queued)
+            queued = 0
+            try:
+                result = func(*args, **kwargs)
+                break
+            except Exception as e:
+                try_count -= 1
+                if try_count < 0:
+                    self._update(failed=1)
+                    raise
+                print(f"    fail to download from {host}: {e}, wait for {wait} seconds to download again.")
+            finally:
+                self._update(host, running=-1)
+                if slot is not None:
+                    slot.release()
+            self._update(retried=1)
+            time.sleep(wait)
+            wait *= 2
+        self._update(done=1)
+        return result
+
+    def submit(self, host, func, *args, **kwargs):
+        """
+        Input Arguments:
+            1. host:		a host (e.g., "googlevideo.com") or any url of the host
+            2. func:		the download function, called with *args and **kwargs
+        Outputs:
+            a concurrent.futures.Future of the result of func.
+        """
+        host = host_of(host)
+        self._update(queued=1)
+        future = self._executor.submit(self._run, host, func, args, kwargs)
+        # a download cancelled before it starts never leaves the queue by _run
+        future.add_done_callback(lambda future: self._update(queued=-1) if future.cancelled() else None)
+        return future
+
+    def run(self, host, func, *args, **kwargs):
+        # submit and wait for the result, must not be called from a download worker
+        return self.submit(host, func, *args, **kwargs).result()
+
+    def get_progress(self):
+        with self._lock:
+            return dict(self.progress)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._status_bar is not None:
+                self._status_bar.close()
+                self._status_bar = None
@@ -0,0 +1,123 @@
+import os
+import hashlib
+import threading
+import json
+from Checkpoint_Log import write_json_atomic
+"""
+A download manifest per channel, which records every downloaded file.
+
+Deciding whether a video is downloaded by counting the files in its folder
+breaks as soon as a stray file shows up, costs a directory listing per video,
+and matching chapters against the listed files is O(files x chapters). Thus
+here keeps "download_manifest.json" in the channel folder:
+    {
+        "mpXkkqWK7wg": {
+            "done": true,
+            "artifacts": {
+                "media":		{"filename": "Song#mpXkkqWK7wg.mp3", "size": 4711, "sha1": "..."},
+                "thumbnail":		{"filename": "Song#mpXkkqWK7wg.webp", "size": 42, "sha1": "..."},
+                "artwork":		{"filename": null, "size": 0, "sha1": null},
+                "artwork:12345.jpg":	{"filename": "12345.jpg", "size": 420, "sha1": "..."},
+                "chapter:Intro#mpXkkqWK7wg.mp3": {...}
+            }
+        }
+    }
+Filenames are relative to the video folder. The manifest is loaded once per
+channel, thus skip and resume decisions are dict lookups without touching
+the disk, and it is saved atomically every save_every updates and at close.
+"""
+
+
+def file_digest(path, chunk_size=1 << 20):
+    # sha1 of a file, read in chunks
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class download_manifest:
+    name = "download_manifest"
+
+    def __init__(self, manifest_path, save_every=20):
+
+        self.manifest_path = manifest_path
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.videos = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    self.videos = json.load(f)
+            except ValueError:
+                print(f"Error: {manifest_path} is broken, start a new download manifest.")
+
+    def _video(self, video_id):
+        if video_id not in self.videos:
+            self.videos[video_id] = {"done": False, "artifacts": {}}
+        return self.videos[video_id]
+
+    def _updated(self):
+        # called with self._lock held
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save()
+
+    def _save(self):
+        write_json_atomic(self.manifest_path, self.videos)
+        self._unsaved = 0
+
+    def known(self, video_id):
+        with self._lock:
+            return video_id in self.videos
+
+    def is_done(self, video_id):
+        with self._lock:
+            return video_id in self.videos and self.videos[video_id]["done"]
+
+    def has(self, video_id, key):
+        with self._lock:
+            return video_id in self.videos and key in self.videos[video_id]["artifacts"]
+
+    def artifact(self, video_id, key):
+        with self._lock:
+            if video_id not in self.videos:
+                return
+            return self.videos[video_id]["artifacts"].get(key)
+
+    def record(self, video_id, key, path=None):
+        """
+        Input Arguments:
+            1. video_id:	video id
+            2. key:		artifact name, e.g., "media", "thumbnail", "chapter:{title}"
+            3. path:		the downloaded file, its size and sha1 are recorded.
+                                None records an artifact without a file (e.g., no artwork found)
+        """
+        if path is not None:
+            entry = {"filename": os.path.basename(path), "size": os.path.getsize(path), "sha1": file_digest(path)}
+        else:
+            entry = {"filename": None, "size": 0, "sha1": None}
+        with self._lock:
+            self._video(video_id)["artifacts"][key] = entry
+            self._updated()
+
+    def mark_done(self, video_id):
+        with self._lock:
+            self._video(video_id)["done"] = True
+            self._updated()
+
+    def verify(self, video_id, key, saved_path):
+        # check the recorded file against the disk, e.g., before trusting a manifest copied from elsewhere
+        entry = self.artifact(video_id, key)
+        if entry is None:
+            return False
+        if entry["filename"] is None:
+            return True
+        path = os.path.join(saved_path, entry["filename"])
+        return os.path.exists(path) and os.path.getsize(path) == entry["size"] and file_digest(path) == entry["sha1"]
+
+    def save(self):
+        with self._lock:
+            self._save()
@@ -0,0 +1,97 @@
+import queue
+import threading
+"""
+A staged producer/consumer pipeline connected by bounded queues.
+
+The channel scraper runs in stages:
+    listing -> video info fetch -> media download -> artwork download -> chapter split
+The first two stages are generators on the caller's thread, and put every
+video info into the pipeline as soon as it is fetched. The rest of the stages
+run on their own worker threads, thus the first video is downloaded while the
+video info of the rest of the channel is still being fetched, and the total time
+approaches the time of the slowest stage instead of the sum of all stages.
+
+Every queue holds at most queue_size items. A full queue blocks the stage in
+front of it (and finally the video info fetch), so that a slow download does
+not pile up fetched info in memory, or downloaded files waiting to be split
+on disk.
+
+Usage:
+    pipeline = staged_pipeline([("media", download_media, 2),
+                                ("artwork", download_artwork, 1)])
+    for info in video_infos:
+        pipeline.put(info)
+    pipeline.close()
+"""
+
+# passed down the stages after the last item
+_STOP = object()
+
+
+class staged_pipeline:
+    name = "staged_pipeline"
+
+    def __init__(self, stages, queue_size=4, detail_disp=False):
+        """
+        Input Arguments:
+            1. stages:		list of (name, func, workers), func(item) returns the item
+                                passed to the next stage, or None to drop it
+            2. queue_size:	max number of items waiting in front of every stage
+        """
+        self.stages = stages
+        self.detail_disp = detail_disp
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        # workers still running per stage, the last one passes _STOP to the next stage
+        self._alive = [max(1, workers) for _, _, workers in stages]
+        self._lock = threading.Lock()
+        # number of items each stage has finished, and dropped as failed
+        self.counts = {name: 0 for name, _, _ in stages}
+        self.failures = {name: 0 for name, _, _ in stages}
+
+        self._threads = []
+        for idx, (name, _, workers) in enumerate(stages):
+            for _ in range(self._alive[idx]):
+                thread = threading.Thread(target=self._run_stage, args=(idx,), name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run_stage(self, idx):
+        name, func, _ = self.stages[idx]
+        is_last = idx == len(self.stages) - 1
+        while True:
+            item = self.queues[idx].get()
+            if item is _STOP:
+                with self._lock:
+                    self._alive[idx] -= 1
+                    last_worker = self._alive[idx] == 0
+                if last_worker and not is_last:
+                    for _ in range(self._alive[idx + 1]):
+                        self.queues[idx + 1].put(_STOP)
+                return
+            try:
+                result = func(item)
+            except Exception as e:
+                # a failed item is dropped, the rest of the channel goes on
+                print(f"Error: {name} stage failed, {e}, skip to next.")
+                with self._lock:
+                    self.failures[name] += 1
+                continue
+            with self._lock:
+                self.counts[name] += 1
+            if result is not None and not is_last:
+                # blocks while the next stage is busy
+                self.queues[idx + 1].put(result)
+
+    def put(self, item):
+        # blocks while the first stage is busy
+        self.queues[0].put(item)
+
+    def close(self):
+        # wait until every item passed all stages
+        for _ in range(self._alive[0]):
+            self.queues[0].put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        if self.detail_disp:
+            print(f"    pipeline finished: {self.counts}, failed: {self.failures}")
+        return self.counts
@@ -0,0 +1,118 @@
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+"""
+A bounded pool of long-lived webdriver.Firefox sessions.
+
+Starting Firefox costs several seconds, which is usually more than the page
+fetch itself. Thus here keeps a few browser sessions alive and lets workers
+check them out and return them:
+    1. at most max_size drivers exist at the same time, a worker blocks
+       until one of them is returned.
+    2. an idle driver is health checked before it is handed out again,
+       a dead session is quit and replaced by a new one.
+    3. a driver is recycled (quit and replaced) after serving max_pages
+       pages, which keeps the memory of Firefox under control.
+
+Usage:
+    with pool.driver() as driver:
+        driver.get(url)
+        html = driver.page_source
+"""
+
+
+class firefox_driver_pool:
+    name = "firefox_driver_pool"
+
+    def __init__(self, firefox_opts, adblock_add_on_path=None, max_size=1, max_pages=50, detail_disp=False):
+
+        self.opts = firefox_opts
+        self.adblock_add_on_path = adblock_add_on_path
+        self.max_size = max(1, int(max_size))
+        self.max_pages = max(1, int(max_pages))
+        self.detail_disp = detail_disp
+
+        # idle drivers, the most recently returned one is reused first
+        self._idle = queue.LifoQueue()
+        # every checked out or idle driver holds one slot
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        # number of pages served by each driver
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_driver(self):
+        if self.adblock_add_on_path:
+            driver = webdriver.Firefox(self.adblock_add_on_path, firefox_options=self.opts)
+        else:
+            driver = webdriver.Firefox(firefox_options=self.opts)
+        with self._lock:
+            self._pages[driver] = 0
+        if self.detail_disp:
+            print(f"    driver pool: start a new firefox session.")
+        return driver
+
+    def _quit_driver(self, driver):
+        with self._lock:
+            self._pages.pop(driver, None)
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def _healthy(self, driver):
+        # a crashed browser or a lost geckodriver session raises here
+        try:
+            driver.execute_script("return 1")
+            return True
+        except:
+            return False
+
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("driver pool has been closed")
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_driver()
+                if self._healthy(driver):
+                    return driver
+                if self.detail_disp:
+                    print(f"    driver pool: drop an unhealthy firefox session.")
+                self._quit_driver(driver)
+        except:
+            self._slots.release()
+            raise
+
+    def release(self, driver):
+        with self._lock:
+            pages = self._pages.get(driver, 0) + 1
+            self._pages[driver] = pages
+        if self._closed or pages >= self.max_pages:
+            if self.detail_disp and not self._closed:
+                print(f"    driver pool: recycle firefox session after {pages} pages.")
+            self._quit_driver(driver)
+        else:
+            self._idle.put(driver)
+        self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit_driver(driver)
@@ -0,0 +1,89 @@
+import os
+import time
+import random
+import requests
+"""
+Stream a remote file (e.g., an artwork image) to disk.
+
+The response body is written in chunks into "{saved_path}.part", thus the
+memory stays flat for big png/gif artworks, and the bytes are counted by the
+shared bandwidth limiter as they arrive. When the transfer is interrupted,
+the next try asks the server for the rest of the file by an http Range header,
+and appends it to the part file. Once the whole body is received, the part
+file is renamed to saved_path atomically, thus saved_path either doesn't exist
+or contains a complete file, and an existing saved_path means "downloaded".
+
+Transient http errors are retried by the session (see Http_Client.py), a try
+here starts again after the part file, waiting `wait` seconds (doubled for
+every next try, plus a random jitter) before it.
+"""
+
+
+def _expected_size(res, offset):
+    # total size of the file, None if the server doesn't tell
+    content_range = res.headers.get("Content-Range")
+    if content_range is not None and '/' in content_range:
+        total = content_range.split('/')[-1]
+        if total.isdigit():
+            return int(total)
+    content_length = res.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit() and "Content-Encoding" not in res.headers:
+        return offset + int(content_length)
+
+
+def download_to_file(session, url, saved_path, headers=None, rate_limiter=None, bandwidth_limiter=None,
+                     try_count=5, wait=5, timeout=30, chunk_size=64 * 1024):
+    """
+    Input Arguments:
+        1. session:		a requests.Session (or the requests module)
+        2. url:			url of the file
+        3. saved_path:		path of the file to save
+        4. headers:		extra request headers, e.g., referer
+        5. rate_limiter:	a token_bucket_rate_limiter consulted before every try, optional
+        6. bandwidth_limiter:	a bandwidth_limiter which counts every received chunk, optional
+        7. try_count:		number of tries after the first one fails
+        8. wait:		seconds to wait before the first retry, doubled for every next retry
+    Outputs:
+        saved_path if the file is downloaded, None if all tries fail.
+    """
+    part_path = saved_path + '.part'
+    while True:
+        try:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            request_headers = dict(headers or {})
+            if offset > 0:
+                request_headers["Range"] = f"bytes={offset}-"
+            if rate_limiter is not None:
+                rate_limiter.acquire(url)
+            with session.get(url, headers=request_headers, stream=True, timeout=timeout) as res:
+                if rate_limiter is not None and rate_limiter.report(url, res.status_code, res.url):
+                    raise requests.HTTPError(f"blocked by {res.url}")
+                if res.status_code == 416 and offset > 0:
+                    # the part file is already complete, or broken, start again if the size doesn't match
+                    expected = _expected_size(res, 0)
+                    if expected != offset:
+                        os.remove(part_path)
+                        raise requests.HTTPError(f"part file of {url} does not match the remote file")
+                else:
+                    res.raise_for_status()
+                    if offset > 0 and res.status_code != 206:
+                        # the server ignores the Range header and sends the whole file
+                        offset = 0
+                    expected = _expected_size(res, offset)
+                    with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+                        for chunk in res.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            if bandwidth_limiter is not None:
+                                bandwidth_limiter.consume(len(chunk))
+                    received = os.path.getsize(part_path)
+                    if expected is not None and received < expected:
+                        raise IOError(f"incomplete download of {url}: {received}/{expected} bytes")
+            os.replace(part_path, saved_path)
+            return saved_path
+        except Exception as e:
+            try_count -= 1
+            if try_count < 0:
+                print(f"Error: {url} can not be downloaded, {e}")
+                return
+            time.sleep(wait + random.uniform(0, wait / 2))
+            wait *= 2
@@ -0,0 +1,84 @@
+import random
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+"""
+A pooled http client shared by all artwork downloaders.
+
+A requests.Session keeps the connections it opens alive, one pool per host,
+thus repeated fetches from the same host (e.g., all images of an artstation
+project, or every pixiv artwork of a channel) reuse the same TCP/TLS
+connection instead of a new handshake per image. The client is created once
+and shared by all download workers, so pool_size should be at least the
+number of workers.
+
+Transient failures are retried by the connection adapter, before the response
+reaches the caller:
+    1. connection errors, read timeouts
+    2. status 500, 502, 504
+The wait between tries is backoff_factor * 2 ** (try - 1) seconds, plus a
+random jitter of up to `jitter` seconds, so that workers failing at the same
+time don't hit the host again at the same time. A caller which retries by
+itself (e.g., youtube_http_fetcher) turns them off by try_count=0.
+
+Status 429 and 503 are not retried here, they are returned to the caller, whose
+token_bucket_rate_limiter slows the host down before the next try.
+
+Every request gets a default (connect, read) timeout unless the caller gives one.
+
+Notice: requests (urllib3) only speaks HTTP/1.1, HTTP/2 would need another
+        http library (e.g., httpx[http2]) and is not supported here.
+"""
+
+
+class _jittered_retry(Retry):
+    # urllib3 Retry with a random jitter added to the exponential backoff
+
+    def __init__(self, *args, jitter=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+
+    def new(self, **kwargs):
+        # Retry creates a new object for every try, carry the jitter over
+        retry = super().new(**kwargs)
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        return backoff + random.uniform(0, self.jitter)
+
+
+class pooled_http_client(requests.Session):
+    name = "pooled_http_client"
+
+    def __init__(self, pool_size=10, timeout=(10, 30), try_count=3, backoff_factor=1, jitter=1.0, headers=None):
+        """
+        Input Arguments:
+            1. pool_size:	max number of connections kept alive per host
+            2. timeout:		default (connect, read) timeout in seconds
+            3. try_count:	number of retries of a failed request by the adapter
+            4. backoff_factor:	seconds to wait before the second retry, doubled for every next retry
+            5. jitter:		max random seconds added to every wait
+            6. headers:		headers sent with every request
+        """
+        super().__init__()
+        self.timeout = timeout
+        retry = _jittered_retry(total=try_count, connect=try_count, read=try_count,
+                                status_forcelist=[500, 502, 504],
+                                backoff_factor=backoff_factor,
+                                raise_on_status=False,
+                                jitter=jitter)
+        # pool_connections is the number of hosts whose pools are kept
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        if headers is not None:
+            self.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
@@ -0,0 +1,119 @@
+import time
+import requests
+from Http_Client import pooled_http_client
+"""
+A browserless fetcher for youtube webpages.
+
+Everything the scraper extracts from a watch page (videoDetails, chapters,
+dateText and thumbnails) is already embedded in the raw html returned by
+the server, no javascript needs to be executed. Thus here fetches the
+pages over a pooled requests.Session, which reuses keep-alive connections
+instead of starting a browser for every video.
+
+The base_url can point to a local stand-in server which serves recorded
+watch pages, e.g., base_url="http://127.0.0.1:8000" will fetch
+"http://127.0.0.1:8000/watch?v={video_id}&hl=en".
+
+Only transient failures are fetched again, i.e., connection errors,
+timeouts, 429, 5xx and responses the rate limiter regards as blocked.
+Other errors (e.g., 404 for a deleted video) fail at once. These retries
+are the only ones, the connection adapter of the session does not retry.
+"""
+
+
+class youtube_http_fetcher:
+    name = "youtube_http_fetcher"
+
+    # a desktop browser user agent, otherwise youtube serves a page
+    # without the embedded json data.
+    headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        # upload dates are parsed as english text, e.g., "29 Apr 2018"
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, base_url="https://www.youtube.com", pool_size=10, timeout=30, try_count=5,
+                 retry_wait=5, rate_limiter=None, detail_disp=False):
+
+        self.base_url = base_url.rstrip('/')
+        # a token_bucket_rate_limiter consulted before every request, optional
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.try_count = try_count
+        # seconds to wait before fetching a page again
+        self.retry_wait = retry_wait
+        self.detail_disp = detail_disp
+
+        # the retries are done by _request, which consults the rate limiter before every try,
+        # thus the connection adapter does not retry a failed request again.
+        self.session = pooled_http_client(pool_size=pool_size, timeout=timeout, try_count=0,
+                                          headers=self.headers)
+        # skip the cookie consent page served to EU visitors
+        self.session.cookies.set("CONSENT", "YES+cb")
+        self.session.cookies.set("SOCS", "CAI")
+
+    def _request(self, method, path, **kwargs):
+        url = path if path.startswith('http') else self.base_url + path
+        try_count = self.try_count
+        while True:
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+                res = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                blocked = self.rate_limiter is not None and \
+                          self.rate_limiter.report(url, res.status_code, res.url)
+                if res.ok and not blocked:
+                    return res
+                if not blocked and res.status_code != 429 and res.status_code < 500:
+                    # a permanent error (e.g., 404 or 410) is not fetched again
+                    print(f"Error: could not fetch {url} (status: {res.status_code})")
+                    return
+                error = f"status: {res.status_code}"
+
+            # connection errors, 429 and 5xx are transient, fetch again later
+            try_count -= 1
+            if try_count < 0:
+                print(f"Error: could not fetch {url}, {error}")
+                return
+            if self.detail_disp:
+                print(f"    fail to fetch {url}, wait for {self.retry_wait} seconds to fetch again.")
+            time.sleep(self.retry_wait)
+
+    def get_page(self, path, params=None):
+        """
+        Input Arguments:
+            1. path:		path under base_url (e.g., "/watch") or a full url
+            2. params:		query parameters
+        Outputs:
+            the html text, or None if the page can not be fetched.
+        """
+        res = self._request("GET", path, params=params)
+        return res.text if res is not None else None
+
+    def post_json(self, path, payload, params=None):
+        """
+        Input Arguments:
+            1. path:		path under base_url (e.g., "/youtubei/v1/browse") or a full url
+            2. payload:		json body of the request
+            3. params:		query parameters
+        Outputs:
+            the decoded json response, or None if the request fails.
+        """
+        res = self._request("POST", path, params=params, json=payload)
+        if res is None:
+            return
+        try:
+            return res.json()
+        except ValueError:
+            print(f"Error: response of {res.url} is not json.")
+            return
+
+    def get_watch_page(self, video_id):
+        return self.get_page("/watch", params={"v": video_id, "hl": "en"})
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+import youtube_dl
+from youtube_dl.utils import DownloadError
+from youtube_dl.postprocessor.common import PostProcessor
+"""
+In-process youtube video downloads by youtube_dl.
+
+Instead of starting a "youtube-dl" process per video (which pays the python
+interpreter startup and the import of all extractors every time, and never
+raises an error to the caller), here keeps one YoutubeDL instance per thread
+and per option set, and reuses it for every video of that kind.
+
+Every download reports what exactly happened:
+    1. filename:		the final file after post-processing, e.g., the ".mp3"
+                                extracted from a downloaded ".webm"
+    2. thumbnail_filename:	the thumbnail written next to the file, or None
+    3. downloaded_bytes:	bytes received from the server
+    4. speed:			average speed in bytes per second
+Thus callers use the reported filename instead of guessing how youtube_dl
+sanitises the video title.
+
+A failed download raises youtube_dl's DownloadError, which is retried with
+an exponential backoff, and raised again when all tries are used up.
+"""
+
+
+class _final_filename_recorder(PostProcessor):
+    # the last post-processor of the chain, records the path of the final file
+    def __init__(self, downloader, on_finished):
+        PostProcessor.__init__(self, downloader)
+        self.on_finished = on_finished
+
+    def run(self, information):
+        self.on_finished(information.get('filepath'))
+        return [], information
+
+
+class youtube_media_downloader:
+    name = "youtube_media_downloader"
+
+    def __init__(self, rate_limiter=None, bandwidth_limiter=None, try_count=5, backoff=5, detail_disp=False):
+
+        # a token_bucket_rate_limiter consulted before every try, optional
+        self.rate_limiter = rate_limiter
+        # a bandwidth_limiter shared by all downloads, optional
+        self.bandwidth_limiter = bandwidth_limiter
+        self.try_count = try_count
+        # seconds to wait before the first retry, doubled for every next retry
+        self.backoff = backoff
+        self.detail_disp = detail_disp
+
+        # per thread: YoutubeDL instances keyed by options, and the report of the running download
+        self._local = threading.local()
+
+    def _options(self, ext, download_thumbnail, skip_download):
+        opts = {
+            "quiet": not self.detail_disp,
+            "no_warnings": not self.detail_disp,
+            "noprogress": True,
+            "continuedl": True,
+            "writethumbnail": download_thumbnail,
+            "skip_download": skip_download,
+        }
+        if ext == 'mp3':
+            opts["format"] = "bestaudio/best"
+            opts["postprocessors"] = [{"key": "FFmpegExtractAudio", "preferredcodec": ext}]
+        else:
+            # no "format", as the youtube-dl command always did: youtube_dl picks
+            # bestvideo+bestaudio (or best), and merges them into ext
+            opts["merge_output_format"] = ext
+        return opts
+
+    def _ydl(self, ext, download_thumbnail, skip_download):
+        if not hasattr(self._local, "ydls"):
+            self._local.ydls = {}
+        key = (ext, download_thumbnail, skip_download)
+        if key not in self._local.ydls:
+            ydl = youtube_dl.YoutubeDL(self._options(ext, download_thumbnail, skip_download))
+            ydl.add_progress_hook(self._progress_hook)
+            ydl.add_post_processor(_final_filename_recorder(ydl, self._on_finished))
+            self._local.ydls[key] = ydl
+        return self._local.ydls[key]
+
+    def _progress_hook(self, d):
+        report = self._local.report
+        filename = d.get("filename")
+        if d.get("status") == "downloading":
+            downloaded_bytes = d.get("downloaded_bytes") or 0
+            # bytes received since the last call for this file
+            new_bytes = downloaded_bytes - report["_bytes_per_file"].get(filename, 0)
+            report["_bytes_per_file"][filename] = downloaded_bytes
+            if new_bytes > 0:
+                report["downloaded_bytes"] += new_bytes
+                if self.bandwidth_limiter is not None:
+                    # sleeps inside the download loop, thus throttles the transfer itself
+                    self.bandwidth_limiter.consume(new_bytes)
+        elif d.get("status") == "finished":
+            # also reported for a file downloaded before, which adds no bytes
+            report["filename"] = filename
+
+    def _on_finished(self, filepath):
+        if filepath is not None:
+            self._local.report["filename"] = filepath
+
+    def download(self, url, saved_path, ext, download_thumbnail=False, skip_download=False):
+        """
+        Input Arguments:
+            1. url:			youtube video url
+            2. saved_path:		folder to save the files
+            3. ext:			'mp3' extracts the audio, otherwise the video in format ext (e.g., 'mp4')
+            4. download_thumbnail:	write the thumbnail next to the file
+            5. skip_download:		only write the thumbnail
+        Outputs:
+            a dict of filename, thumbnail_filename, downloaded_bytes and speed.
+            Raises DownloadError when all tries fail.
+        """
+        ydl = self._ydl(ext, download_thumbnail, skip_download)
+        ydl.params["outtmpl"] = os.path.join(saved_path.replace('%', '%%'), "%(title)s#%(id)s.%(ext)s")
+
+        try_count = self.try_count
+        wait = self.backoff
+        while True:
+            self._local.report = {"filename": None, "thumbnail_filename": None,
+                                  "downloaded_bytes": 0, "speed": 0, "_bytes_per_file": {}}
+            start_time = time.time()
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+                info = ydl.extract_info(url, download=True)
+                break
+            except DownloadError as e:
+                try_count -= 1
+                if self.rate_limiter is not None and "429" in str(e):
+                    self.rate_limiter.report(url, 429)
+                if try_count < 0:
+                    raise
+                print(f"    fail to download {url}, wait for {wait} seconds to download again.")
+                time.sleep(wait)
+                wait *= 2
+
+        report = self._local.report
+        del report["_bytes_per_file"]
+        if report["filename"] is None and not skip_download:
+            # no post-processor ran, the name of the file youtube_dl would have written
+            report["filename"] = ydl.prepare_filename(info)
+            if ext == 'mp3':
+                report["filename"] = os.path.splitext(report["filename"])[0] + f".{ext}"
+        thumbnails = info.get("thumbnails") or []
+        if download_thumbnail and thumbnails:
+            report["thumbnail_filename"] = thumbnails[-1].get("filename")
+        duration = time.time() - start_time
+        report["speed"] = report["downloaded_bytes"] / duration if duration > 0 else 0
+        if self.detail_disp:
+            print(f"    downloaded: {report['filename']}, {round(report['downloaded_bytes']/1024/1024, 2)} MB "
+                  f"at {round(report['speed']/1024, 2)} KB/s")
+        return report
@@ -0,0 +1,110 @@
+import re
+import json
+"""
+A single-pass parser for the json data embedded in youtube webpages.
+
+A youtube watch (or channel) page embeds two big json objects into its
+html, which contains all the video info that the scraper needs:
+    1. ytInitialPlayerResponse, e.g., videoDetails, thumbnails
+    2. ytInitialData,           e.g., dateText, chapters, continuation tokens
+
+Instead of searching the html and matching brackets once per field, here
+locates both objects once, decodes each of them by json.JSONDecoder.raw_decode,
+and indexes every key lazily (at the first lookup) in the order it appears
+in the page. Thus page.get("dateText") returns the same value as the first
+"dateText": found in the html.
+"""
+
+# e.g., 'var ytInitialData = {', 'window["ytInitialData"] = {', 'ytInitialPlayerResponse = {'
+_ISLAND_PATTERNS = [
+    re.compile(r'(?:var\s+|window\[["\'])?ytInitialPlayerResponse(?:["\']\])?\s*=\s*(?={)'),
+    re.compile(r'(?:var\s+|window\[["\'])?ytInitialData(?:["\']\])?\s*=\s*(?={)'),
+]
+
+_decoder = json.JSONDecoder()
+
+
+def iter_values(node, key):
+    # yield every value of key in a decoded json object, in page order
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node:
+                yield node[key]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+class youtube_page_data:
+    name = "youtube_page_data"
+
+    def __init__(self, html):
+
+        self.html = html if html is not None else ''
+        # decoded json objects (ytInitialPlayerResponse, ytInitialData) sorted by their position in html
+        self.islands = self._decode_islands()
+        self._index = None
+
+    def _decode_islands(self):
+        islands = []
+        for pattern in _ISLAND_PATTERNS:
+            for match in pattern.finditer(self.html):
+                try:
+                    value, _ = _decoder.raw_decode(self.html, match.end())
+                except ValueError:
+                    continue
+                islands.append((match.start(), value))
+                break
+        islands.sort(key=lambda island: island[0])
+        return [value for _, value in islands]
+
+    def _build_index(self):
+        # pre-order walk, so the first value kept for a key is the one that
+        # appears first in the page text.
+        index = {}
+        stack = list(reversed(self.islands))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, tuple):
+                key, value = node
+                if key not in index:
+                    index[key] = value
+                stack.append(value)
+            elif isinstance(node, dict):
+                stack.extend(reversed(list(node.items())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+        return index
+
+    def _find_in_html(self, key):
+        # fallback for pages where the json objects can not be located,
+        # decode the value directly after the first '"key":' in html.
+        str_target = f"\"{key}\":"
+        start_index = self.html.find(str_target)
+        if start_index == -1:
+            return
+        start_index += len(str_target)
+        while start_index < len(self.html) and self.html[start_index].isspace():
+            start_index += 1
+        try:
+            value, _ = _decoder.raw_decode(self.html, start_index)
+        except ValueError:
+            return
+        return value
+
+    def find_all(self, key):
+        # all values of key in the json objects of the page, in page order
+        values = []
+        for island in self.islands:
+            values.extend(iter_values(island, key))
+        return values
+
+    def get(self, key, default=None):
+        if self._index is None:
+            self._index = self._build_index()
+        if key in self._index:
+            return self._index[key]
+        value = self._find_in_html(key)
+        return default if value is None else value
@@ -0,0 +1,150 @@
+import time
+import random
+import threading
+from urllib.parse import urlparse
+"""
+An adaptive token-bucket rate limiter shared by all fetch and download paths.
+
+Every remote host (e.g., youtube.com, artstation.com, pixiv.net) gets its own
+bucket, which refills at requests_per_minute and holds at most burst tokens.
+Each request takes one token, and waits (with a random jitter) when the bucket
+is empty, thus the scraper runs at the configured rate instead of pausing a
+fixed worst-case time after every video.
+
+When a host answers with 429/503, or redirects to a consent or captcha page,
+the rate of its bucket is halved (down to 1/max_slowdown of the configured
+rate), then slowly recovers with every successful request.
+
+Usage:
+    rate_limiter.acquire(url)
+    res = client.get(url)
+    rate_limiter.report(url, res.status_code, res.url)
+"""
+
+# a request redirected to one of these urls is blocked by the remote
+BLOCKED_URL_MARKERS = ["consent.youtube.com", "consent.google.com", "google.com/sorry", "captcha"]
+BLOCKED_STATUS_CODES = [429, 503]
+
+
+def host_of(url):
+    # "www.youtube.com" and "youtube.com" share the same host,
+    # e.g., "https://i.pximg.net/img-original/..." -> "pximg.net"
+    host = urlparse(url).netloc if '://' in url else url
+    host = host.split(':')[0].lower()
+    parts = host.split('.')
+    return '.'.join(parts[-2:]) if len(parts) > 2 else host
+
+
+class token_bucket_rate_limiter:
+    name = "token_bucket_rate_limiter"
+
+    def __init__(self, requests_per_minute=20, burst=1, jitter=0.25, max_slowdown=16,
+                 host_requests_per_minute=None, detail_disp=False, clock=time.monotonic, sleep=time.sleep):
+
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.max_slowdown = max_slowdown
+        # optional rates for certain hosts, e.g., {"pixiv.net": 10}
+        self.host_requests_per_minute = host_requests_per_minute or {}
+        self.detail_disp = detail_disp
+        # time source and wait, replaceable by a fake clock in tests
+        self.clock = clock
+        self.sleep = sleep
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        return host_of(url)
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = {"tokens": float(self.burst), "time": self.clock(), "slowdown": 1.0}
+        return self._buckets[host]
+
+    def _rate(self, host, bucket):
+        # tokens per second of this host
+        requests_per_minute = self.host_requests_per_minute.get(host, self.requests_per_minute)
+        return requests_per_minute / 60 / bucket["slowdown"]
+
+    def acquire(self, url):
+        """
+        Take one token of the host of url, wait until it is available.
+        Returns the waited seconds.
+        """
+        host = self._host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            rate = self._rate(host, bucket)
+            now = self.clock()
+            bucket["tokens"] = min(self.burst, bucket["tokens"] + (now - bucket["time"]) * rate)
+            bucket["time"] = now
+            # reserve the token, so concurrent workers queue up behind each other
+            bucket["tokens"] -= 1
+            wait = -bucket["tokens"] / rate if bucket["tokens"] < 0 else 0
+        if wait > 0:
+            wait *= random.uniform(1, 1 + self.jitter)
+            self.sleep(wait)
+        return wait
+
+    def report(self, url, status_code=None, final_url=None):
+        """
+        Input Arguments:
+            1. url:			the requested url
+            2. status_code:		http status code of the response, if known
+            3. final_url:		url after redirects, e.g., driver.current_url
+        Outputs:
+            True if the remote blocks the request, then the host is slowed down.
+        """
+        blocked = status_code in BLOCKED_STATUS_CODES
+        if final_url is not None:
+            for marker in BLOCKED_URL_MARKERS:
+                if marker in final_url:
+                    blocked = True
+                    break
+
+        host = self._host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            if blocked:
+                bucket["slowdown"] = min(self.max_slowdown, bucket["slowdown"] * 2)
+                # empty the bucket, the next request waits for a full interval
+                bucket["tokens"] = min(bucket["tokens"], 0)
+            else:
+                bucket["slowdown"] = max(1.0, bucket["slowdown"] * 0.95)
+            requests_per_minute = self._rate(host, bucket) * 60
+        if blocked:
+            print(f"    rate limiter: {host} blocks requests (status: {status_code}), "
+                  f"slow down to {round(requests_per_minute, 2)} requests/min.")
+        return blocked
+
+
+# a global token bucket in bytes, shared by all concurrent downloads.
+# max_bytes_per_second <= 0 means unlimited.
+class bandwidth_limiter:
+    name = "bandwidth_limiter"
+
+    def __init__(self, max_bytes_per_second=0, clock=time.monotonic, sleep=time.sleep):
+
+        self.max_bytes_per_second = max_bytes_per_second
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(max_bytes_per_second)
+        self._time = self.clock()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        # take nbytes from the bucket, wait until the transfer fits the limit
+        if self.max_bytes_per_second <= 0:
+            return 0
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.max_bytes_per_second,
+                               self._tokens + (now - self._time) * self.max_bytes_per_second)
+            self._time = now
+            self._tokens -= nbytes
+            wait = -self._tokens / self.max_bytes_per_second if self._tokens < 0 else 0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
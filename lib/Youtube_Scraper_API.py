@@ -3,17 +3,38 @@ import sys
 import time
 import re
 import json
+import threading
+import subprocess
 import requests
 import youtube_dl
+from youtube_dl.utils import sanitize_filename
 import html_to_json
 import pandas as pd
 from tqdm import tqdm
 from selenium import webdriver
 from pydub import AudioSegment
-from requests.adapters import HTTPAdapter
 from selenium.webdriver import FirefoxOptions
 from datetime import datetime, timedelta
+from itertools import dropwhile
+from collections import deque
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from Utils import *
+from Driver_Pool import firefox_driver_pool
+from Http_Fetcher import youtube_http_fetcher
+from Page_Parser import youtube_page_data
+from Checkpoint_Log import video_info_checkpoint_log, write_json_atomic
+from Channel_Lister import youtube_channel_lister
+from Rate_Limiter import token_bucket_rate_limiter, bandwidth_limiter, host_of
+from Media_Downloader import youtube_media_downloader
+from Download_Pipeline import staged_pipeline
+from Download_Executor import download_executor
+from Chapter_Splitter import split_mp3_chapters, split_chapters_by_ffmpeg
+from Download_Manifest import download_manifest
+from File_Downloader import download_to_file
+from Http_Client import pooled_http_client
+from Artwork_Engine import async_artwork_engine
+from Artwork_Cache import artwork_cache
 """
 This script aims to provide functions to download videos from given 
 Youtube channels.
@@ -30,8 +51,9 @@ There are a few core funcions for option:
 3. download artworks
 4. download thumbnails
 5. download videos (or convert it to mp3) by youtube-dl
-6. download video chapters (or convert them into mp3) by youtube-dl and FFMPEG (or AudioSegment) (optional)
-   The process of video splited into chapters will not involve any encoding and decoding process in FFMPEG.
+6. download video chapters (or convert them into mp3) by youtube-dl and FFMPEG (or mp3 frames) (optional)
+   The process of video splited into chapters will not involve any encoding and decoding process in FFMPEG,
+   mp3 files are cut at frame boundaries by Chapter_Splitter.
 
 Notice: no Shorts or Premiered videos will be downloaded by default, 
         and currently only 'mp3' format is supported for audio download.
@@ -52,7 +74,14 @@ Two optional variables that control the fetch process:
 class youtube_music_channel_scraper_api:
     name = "youtube_music_channel_scraper_api"
     
-    threads = 1 #cpu_count() * 3
+    threads = 1 # number of workers to fetch video info, overwritten by args.threads
+    # headers of the json apis of artwork websites, e.g., artstation projects and pixiv ajax
+    json_headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0",
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+    pipeline_queue_size = 4 # max number of videos waiting in front of every download stage
 
  
     def __init__(self, args):
@@ -75,6 +104,9 @@ class youtube_music_channel_scraper_api:
         
         self.update = args.update
         
+        # number of workers that fetch video info in parallel
+        self.threads = max(1, int(args.threads))
+        
         # add adblock plugin into webdriver.Firefox, which disable ads when browsering
         self.adblock_add_on_path = args.adblock_add_on_path 
         
@@ -84,6 +116,71 @@ class youtube_music_channel_scraper_api:
         if args.firefoxOptions == 'headless':
             self.opts.add_argument("--headless") 
         
+        # long-lived firefox sessions shared by video info fetcher and artwork downloaders
+        self.driver_pool = firefox_driver_pool(self.opts, self.adblock_add_on_path,
+                                               max_size=args.driver_pool_size,
+                                               max_pages=args.driver_max_pages,
+                                               detail_disp=self.detail_disp)
+        
+        # per-host rate limiter consulted by every fetch and download path
+        self.rate_limiter = token_bucket_rate_limiter(requests_per_minute=args.requests_per_minute,
+                                                      jitter=args.rate_jitter,
+                                                      detail_disp=self.detail_disp)
+        
+        # engine to load youtube watch pages, choose from ['selenium', 'http']
+        self.fetch_engine = args.fetch_engine
+        self.http_fetcher = youtube_http_fetcher(base_url=args.youtube_base_url,
+                                                 rate_limiter=self.rate_limiter,
+                                                 detail_disp=self.detail_disp) \
+                            if self.fetch_engine == 'http' else None
+        # list channel videos by continuation tokens instead of scrolling a browser
+        self.channel_lister = youtube_channel_lister(self.http_fetcher, self.detail_disp) \
+                              if self.fetch_engine == 'http' else None
+        
+        # global limits shared by all channels processed at the same time
+        self.max_concurrent_downloads = max(1, int(args.max_concurrent_downloads))
+        # videos and artworks are downloaded by download_workers threads, at most
+        # max_concurrent_downloads of them download youtube media at the same time
+        self.download_executor = download_executor(workers=args.download_workers,
+                                                   host_concurrency={"googlevideo.com": self.max_concurrent_downloads},
+                                                   detail_disp=self.detail_disp)
+        self.bandwidth_limiter = bandwidth_limiter(int(args.max_bandwidth) * 1024)
+        # keep-alive connections shared by all artwork downloaders, one pool per host
+        self.http_client = pooled_http_client(pool_size=max(10, self.download_executor.workers))
+        # artwork images are downloaded concurrently within the limits per host, e.g., artstation.com, pixiv.net
+        self.artwork_engine = async_artwork_engine(workers=self.download_executor.workers, detail_disp=self.detail_disp)
+        # hosts whose json apis answered with a challenge page, fetched by firefox from then on
+        self._json_challenged_hosts = set()
+        # artworks downloaded once and linked into every later video with the same artwork url
+        self.artwork_cache = artwork_cache(os.path.join(self.saved_path, ".artwork_cache"),
+                                           max_bytes=int(args.artwork_cache_size) * 1024 * 1024,
+                                           detail_disp=self.detail_disp) \
+                             if int(args.artwork_cache_size) > 0 else None
+        
+        # in-process youtube_dl, reused by every video downloaded on the same thread
+        # a failed download is retried by the download executor, which counts the failures
+        self.media_downloader = youtube_media_downloader(rate_limiter=self.rate_limiter,
+                                                         bandwidth_limiter=self.bandwidth_limiter,
+                                                         try_count=0,
+                                                         detail_disp=self.detail_disp)
+        
+        # chapters of different videos are split in parallel by a process pool, created at the first use
+        self.chapter_workers = os.cpu_count() or 1
+        self._chapter_pool = None
+        self._chapter_pool_lock = threading.Lock()
+        
+        # download manifests of the channels being downloaded, keyed by channel folder
+        self._manifests = {}
+        self._manifests_lock = threading.Lock()
+        
+        # channel pages opened by firefox sessions checked out from the driver pool
+        self._channel_drivers = set()
+        self._channel_drivers_lock = threading.Lock()
+        
+        # counters for the throughput report
+        self.stats = {"video_info": 0, "downloads": 0}
+        self._stats_lock = threading.Lock()
+        
         if self.saved_path:
             if not os.path.exists(self.saved_path):
                 os.makedirs(self.saved_path)
@@ -96,6 +193,29 @@ class youtube_music_channel_scraper_api:
     def add_channel_id(self, channel_id):
         self.channel_ids_set.add(channel_id)    
         
+    def count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+            
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+        
+    def close(self):
+        # quit all firefox sessions kept by the driver pool
+        self.driver_pool.close()
+        self.download_executor.close()
+        self.artwork_engine.close()
+        if self._chapter_pool is not None:
+            self._chapter_pool.shutdown(wait=True)
+        for channel_saved_path in list(self._manifests.keys()):
+            self._close_manifest(channel_saved_path)
+        if self.http_fetcher is not None:
+            self.http_fetcher.close()
+        self.http_client.close()
+        if self.artwork_cache is not None:
+            self.artwork_cache.close()
+        
         
     #################################utils#######################################################################  
     def _scroll2bottom_webpage(self, driver):
@@ -112,6 +232,80 @@ class youtube_music_channel_scraper_api:
             height = driver.execute_script("return document.documentElement.scrollHeight")
             
              
+    def _list_channel_video_ids(self, driver, channel_page, video_ids_saved_path):
+        """
+        Input Arguments:
+            1. driver:				a webdriver object on the channel video page, or None
+            2. channel_page:			youtube_page_data of the channel video page, used when driver is None
+            3. video_ids_saved_path:		the file to save all video ids, None to skip saving
+        Outputs:
+            a generator of video ids, sorted from the nearest upload time to the farest.
+            
+        With a driver, the channel video page is scrolled to the bottom before any
+        video id is yielded. Without a driver, the video grid is paged by continuation
+        tokens, and the video ids are streamed (and saved) as each page arrives.
+        
+        The video ids are written into "{video_ids_saved_path}.tmp", which replaces
+        video_ids_saved_path only after the last page is listed. Thus a listing which
+        is interrupted, not iterated to the end, or stopped by a page that can not be
+        fetched, never leaves a partial list that a later run would take as the whole
+        channel.
+        """
+        if driver is not None:
+            pages = [self._scroll_video_ids(driver)]
+            # all video ids are listed, the browser is not needed anymore
+            self._quit_driver(driver)
+        else:
+            pages = self.channel_lister.iter_video_id_pages(channel_page)
+        
+        if video_ids_saved_path is None:
+            # e.g., update mode, the listed ids are merged into the saved ids later
+            for video_ids in pages:
+                for video_id in video_ids:
+                    yield video_id
+            return
+            
+        tmp_path = video_ids_saved_path + '.tmp'
+        pages = iter(pages)
+        with open(tmp_path, 'w') as f:
+            while True:
+                try:
+                    video_ids = next(pages)
+                except StopIteration as stop:
+                    # iter_video_id_pages returns False when a page can not be fetched
+                    complete = stop.value is not False
+                    break
+                for video_id in video_ids:
+                    f.write(video_id + '\n')
+                f.flush()
+                for video_id in video_ids:
+                    yield video_id
+        if complete:
+            os.replace(tmp_path, video_ids_saved_path)
+                    
+    def _scroll_video_ids(self, driver):
+        self._scroll2bottom_webpage(driver)
+        
+        video_data = driver.find_elements_by_xpath('//*[@id="video-title-link"]')
+        video_ids_list = []
+        for v_data in video_data:       
+            video_link = v_data.get_attribute('href')
+            if video_link is not None:
+                video_id = video_link.split('watch?v=')[-1]
+                video_ids_list.append(video_id)
+        return video_ids_list
+        
+    def _quit_driver(self, driver):
+        # return the channel driver to the driver pool, it can be called several times.
+        # the channel page is not opened by a browser when fetch_engine is http
+        if driver is None:
+            return
+        with self._channel_drivers_lock:
+            if driver not in self._channel_drivers:
+                return
+            self._channel_drivers.remove(driver)
+        self.driver_pool.release(driver)
+             
     def _extract_channel_id(self, driver):
         print(f"    extract channel id ...")
        
@@ -124,11 +318,41 @@ class youtube_music_channel_scraper_api:
 
         return channel_id
         
+    def _fetch_json_by_http(self, url):
+        # decode a json api over plain http, returns None if the host answers
+        # with a challenge (e.g., a cloudflare "Just a moment" page) instead of json
+        host = host_of(url)
+        if host in self._json_challenged_hosts:
+            return
+        headers = dict(self.json_headers)
+        headers["Referer"] = f"https://www.{host}/"
+        try:
+            self.rate_limiter.acquire(url)
+            res = self.http_client.get(url, headers=headers)
+            blocked = self.rate_limiter.report(url, res.status_code, res.url)
+        except requests.RequestException as e:
+            print(f"Error: could not fetch {url}, {e}")
+            return
+        is_json = "json" in res.headers.get("Content-Type", "")
+        if blocked or res.status_code == 403 or (res.ok and not is_json):
+            print(f"    {host} answers {url} with a challenge (status: {res.status_code}), fetch it by firefox.")
+            self._json_challenged_hosts.add(host)
+            return
+        try:
+            # e.g., pixiv answers a deleted artwork by 404 with {"error": true, "body": []}
+            return res.json()
+        except ValueError:
+            print(f"Error: could not fetch {url} (status: {res.status_code})")
+            return
+            
     def _fetch_webpage_in_json_format(self, url):
         
         """
         Aims to fetch the useful json value from webpage
         for artwork download, e.g., artstation and pixiv.
+        
+        The json api is fetched over plain http first, and by firefox only
+        when the host challenges the request.
     
         Notice:
             There is a weird thing that the info that web driver gets from
@@ -136,63 +360,106 @@ class youtube_music_channel_scraper_api:
             to filter out useless web scrape results.
         """
 
+        json_value = self._fetch_json_by_http(url)
+        if json_value is not None or host_of(url) not in self._json_challenged_hosts:
+            return json_value
+        
         #opts = FirefoxOptions()
         #opts.add_argument("--headless")
-        driver = webdriver.Firefox(firefox_options=self.opts)
         count = 50
-        while True:
-            try:
-                driver.get(url)
-                html = driver.page_source
-                json_text = html_to_json.convert(html)  
-            
-                txt = json_text['html'][0]['body'][0]['div'][0]['div'][0]#['_value']#['div'][0]
+        with self.driver_pool.driver() as driver:
+            while True:
+                try:
+                    self.rate_limiter.acquire(url)
+                    driver.get(url)
+                    self.rate_limiter.report(url, final_url=driver.current_url)
+                    html = driver.page_source
+                    json_text = html_to_json.convert(html)  
+                
+                    txt = json_text['html'][0]['body'][0]['div'][0]['div'][0]#['_value']#['div'][0]
 
-                if '_value' in txt.keys():
-                    json_value = json.loads(txt['_value'])
-                    break
-            except:
-                count -= 1
-                time.sleep(5)
-                if count < 0:
-                    json_value = None
-                    break
-                continue
+                    if '_value' in txt.keys():
+                        json_value = json.loads(txt['_value'])
+                        break
+                except:
+                    count -= 1
+                    time.sleep(5)
+                    if count < 0:
+                        json_value = None
+                        break
+                    continue
            
-        driver.close()    
         return json_value
         
         
         
-    def _get_img_content_from_url(self, url, client, website='pixiv'):
-        # website could be "artstation", "pixiv", 
-        #                  "pexels", 'unsplash', 'deviant', 'flickr'
-        try_count = 50
-        while True:
-            try:
-                if website == 'artstation':
-                    res = requests.get(url).content
-                if website == 'pixiv':
-                    res = client.get(url, stream=True)
-                else:
-                    res = client.get(url)
-                break
-            except:
-                try_count -= 1
-                if try_count < 0:
-                    print(f"Error: image can not be downloaded from {url}, fail to download artwork.")
-                    res = None
-                    break
-                time.sleep(5)         
-        return res
+    def _save_img_from_url(self, url, saved_path, headers=None):
+        # stream the image into saved_path over the shared http client,
+        # returns saved_path, or None if it can not be downloaded
+        saved_path = download_to_file(self.http_client, url, saved_path,
+                                      headers=headers,
+                                      rate_limiter=self.rate_limiter,
+                                      bandwidth_limiter=self.bandwidth_limiter,
+                                      try_count=5)
+        if saved_path is None:
+            print(f"Error: image can not be downloaded from {url}, fail to download artwork.")
+        return saved_path
+        
+    def _read_video_ids(self, video_ids_saved_path):
+        with open(video_ids_saved_path, 'r') as f:
+            video_ids_list = []
+            lines = f.readlines()
+            for line in lines:
+                video_ids_list.append(line.replace('\n', ''))
+        return video_ids_list
+        
+    def _fetch_watch_page_html(self, video_id):
+        # load the raw html of a youtube watch page by the selected engine
+        if self.fetch_engine == 'http':
+            return self.http_fetcher.get_watch_page(video_id)
+        
+        video_url = "https://www.youtube.com/watch?v=" + video_id
+        with self.driver_pool.driver() as driver:
+            self._get_content_from_url(driver, video_url)
+            html = driver.page_source
+        return html
         
     def _get_content_from_url(self, driver, url):
+        blocked_count = 3
         while True:
             try:
+                self.rate_limiter.acquire(url)
                 driver.get(url)
+                # a consent or captcha page, retry (slower) a few times
+                if self.rate_limiter.report(url, final_url=driver.current_url) and blocked_count > 0:
+                    blocked_count -= 1
+                    continue
                 break
             except:
                 time.sleep(5)
+                
+    def _download_by_youtube_dl(self, url, ext, saved_path, target_path=None, download_thumbnail=False, skip_download=False):
+        """
+        Input Arguments:
+            1. url:			youtube video url
+            2. ext:			file format, 'mp3' or video format
+            3. saved_path:		folder to save the files
+            4. target_path:		move the downloaded file to this path (e.g., renamed title), optional
+            5. download_thumbnail:	write the thumbnail as well
+            6. skip_download:		only write the thumbnail
+        Outputs:
+            the report of youtube_media_downloader, whose filename is the final path of the file.
+            Raises DownloadError if the download fails, which is retried by the download executor.
+        """
+        report = self.media_downloader.download(url, saved_path, ext,
+                                                download_thumbnail=download_thumbnail,
+                                                skip_download=skip_download)
+        
+        if target_path is not None and report["filename"] is not None \
+           and os.path.exists(report["filename"]) and report["filename"] != target_path:
+            os.replace(report["filename"], target_path)
+            report["filename"] = target_path
+        return report
             
     def _convert_time2millionseconds(self, t):
         hours = t.split(':')[0]
@@ -203,6 +470,36 @@ class youtube_music_channel_scraper_api:
                    int(secs) * 1000
         return millsecs  
         
+    def _get_chapter_pool(self):
+        with self._chapter_pool_lock:
+            if self._chapter_pool is None:
+                # spawn, as the pool is started while other threads are running
+                self._chapter_pool = ProcessPoolExecutor(max_workers=self.chapter_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+            return self._chapter_pool
+        
+    def _split_mp3_chapters(self, audio_path, chapter_times):
+        # cut all chapters from one scan of the mp3 frames, without decoding
+        try:
+            print(f"    split mp3 file into {len(chapter_times)} chapters by frames")
+            self._get_chapter_pool().submit(split_mp3_chapters, audio_path, chapter_times).result()
+        except ValueError as e:
+            # not a plain mp3 stream, decode it instead
+            print(f"    {e}, split mp3 file by decoding.")
+            for idx, (start_time, end_time, export_path) in enumerate(chapter_times):
+                print(f"    split mp3 file into {idx}th/{len(chapter_times)} chapter: {export_path}")
+                self.split_audio_file(audio_path, start_time, end_time, export_path)
+                
+    def _split_video_chapters(self, video_path, chapter_times):
+        # export all chapters by one ffmpeg process with stream copy
+        print(f"    split video file into {len(chapter_times)} chapters by ffmpeg")
+        try:
+            self._get_chapter_pool().submit(split_chapters_by_ffmpeg, video_path, chapter_times).result()
+        except subprocess.CalledProcessError as e:
+            print(f"Error: ffmpeg fails to split {video_path}, {e.stderr.decode(errors='ignore').strip()}")
+        except OSError as e:
+            print(f"Error: could not run ffmpeg, {e}")
+        
     def split_audio_file(self, audio_path, start_time, end_time, saved_path):
         # start_time and end_time in millionseconds
         #print('split audio file...')
@@ -215,62 +512,68 @@ class youtube_music_channel_scraper_api:
     ############################################################################################################################## 
             
     def _download_artstation_artwork(self, hash_id, img_save_folder):
+        # returns the paths of the saved images, in the order of the assets,
+        # None if the project has no image
     
         #print(f"hash_id: {hash_id}")
+        project_id = hash_id if isinstance(hash_id, str) else hash_id[0]
+        img_json_url = f"https://www.artstation.com/projects/{project_id}.json"
+        json_data = self.artwork_engine.run(img_json_url, self._fetch_webpage_in_json_format, img_json_url,
+                                            site="artstation.com")
+        if json_data is None:
+            print(f"    cound not open {img_json_url}, stop download artwork.")
+            return []
+        if not json_data.get('assets'):
+            print(f"    {img_json_url} has no image, skip artwork.")
+            return
+        df = pd.DataFrame(json_data['assets'])
         if isinstance(hash_id, str):
-            img_json_url = f"https://www.artstation.com/projects/{hash_id}.json" 
-            json_data = self._fetch_webpage_in_json_format(img_json_url)
-            if json_data is None:
-                print(f"    cound not open {img_json_url}, stop download artwork.")
-                return 
-            df = pd.DataFrame(json_data['assets'])
-            media_urls= []
-            media_urls.append(df['image_url'][0])
-
+            # all image assets of the project, e.g., not the embedded videos,
+            # a missing image url is NaN in the dataframe
+            has_image = df['has_image'] if 'has_image' in df else [True] * len(df)
+            asset_indices = [idx for idx in range(len(df))
+                             if has_image[idx] and isinstance(df['image_url'][idx], str) and df['image_url'][idx]]
         elif isinstance(hash_id, list):         
-            img_json_url = f"https://www.artstation.com/projects/{hash_id[0]}.json"
-            json_data = self._fetch_webpage_in_json_format(img_json_url)
-            if json_data is None:
-                print(f"    cound not open {img_json_url}, stop download artwork.")
-                return 
-            df = pd.DataFrame(json_data['assets'])
-            media_urls= []
-            for asset_idx in hash_id[1:]:
-                media_urls.append(df['image_url'][asset_idx])
+            asset_indices = hash_id[1:]
+        if asset_indices == []:
+            print(f"    {img_json_url} has no image, skip artwork.")
+            return
+        media_urls = [df['image_url'][asset_idx] for asset_idx in asset_indices]
 
     
-                
+        saved_paths = []
+        downloads = []
         for idx in range(len(media_urls)):
             media_url = media_urls[idx]
+            if not isinstance(media_url, str) or media_url == '':
+                print(f"    asset {asset_indices[idx]} of {project_id} has no image url, skip to next.")
+                continue
             # it is able to download jpg, png and gif file.
-            media_type = media_url.split('?')[-2][-4:]
-            if isinstance(hash_id, str):
-                file_name = hash_id
-            elif isinstance(hash_id, list):
-                if idx == 0:
-                    file_name = f"{hash_id[0]}"
-                else:
-                    file_name = f"{hash_id[0]}_{hash_id[1:][idx]}"
-
-            if media_type == '.jpg' :               
-                media_save_filename = os.path.join(img_save_folder, file_name+".jpg").replace('\r','')
-            elif media_type=='.png':
-                media_save_filename = os.path.join(img_save_folder, f"{file_name}.png")
-            elif media_type == '.gif':
-                media_save_filename = os.path.join(img_save_folder, f"{file_name}.gif")
-                
+            media_type = os.path.splitext(media_url.split('?')[0])[1].lower()
+            if media_type not in ['.jpg', '.png', '.gif']:
+                print(f"    {media_url} is not a jpg, png or gif image, skip to next.")
+                continue
+            if idx == 0:
+                file_name = f"{project_id}"
+            else:
+                file_name = f"{project_id}_{asset_indices[idx]}"
+            media_save_filename = os.path.join(img_save_folder, file_name + media_type).replace('\r','')
             
+            saved_paths.append(media_save_filename)
             if os.path.exists(media_save_filename):
                 if self.detail_disp:
                     print(f"    image: {media_save_filename} exist, skip to next")
-                return
+                continue
+            downloads.append((media_url, self._save_img_from_url, (media_url, media_save_filename)))
                      
-            with open(media_save_filename,'wb') as f:   
-                img_content = self._get_img_content_from_url(media_url ,None, 'artstation')        
-                if img_content is not None:
-                    f.write(img_content)
-                if self.detail_disp:
-                    print(f"    download: {media_save_filename}")
+        # all missing images of the project are downloaded at the same time,
+        # a file only appears once the image is completely downloaded
+        for (_, _, (_, media_save_filename)), result in zip(downloads, self.artwork_engine.run_batch(downloads, site="artstation.com")):
+            if result is None:
+                saved_paths.remove(media_save_filename)
+            elif self.detail_disp:
+                print(f"    download: {media_save_filename}")
+        return saved_paths
                 
                        
     def _download_pixiv_artwork(self, artwork_id, user_artworks_saved_path):
@@ -278,12 +581,14 @@ class youtube_music_channel_scraper_api:
         def _get_download_url(artwork_id):
             url = f"https://www.pixiv.net/ajax/illust/{artwork_id}"
 
-            json_value = self._fetch_webpage_in_json_format(url) 
+            # within the limit of pixiv.net, as the image download below
+            json_value = self.artwork_engine.run(url, self._fetch_webpage_in_json_format, url, site="pixiv.net")
             if json_value is None:
                 return   
-            json = json_value["body"]
-            if not isinstance(json, dict):
-                return 
+            json = json_value.get("body")
+            if not isinstance(json, dict) or not json.get("urls", {}).get("original"):
+                # e.g., a deleted artwork
+                return ''
             img_url = json["urls"]["original"]
 
             return img_url
@@ -291,28 +596,27 @@ class youtube_music_channel_scraper_api:
         
         url = _get_download_url(artwork_id)
         if url is None:
-            print(f"    cound not open {url}, stop download artwork.")
-            return  
+            print(f"    cound not open pixiv artwork {artwork_id}, stop download artwork.")
+            return []
+        if url == '':
+            print(f"    pixiv artwork {artwork_id} has no image, skip artwork.")
+            return
         headers = {"referer": f"https://www.pixiv.net/member_illust.php?mode=medium&illust_id={artwork_id}"}
-        client = requests.Session()
-        client.headers.update(headers)
  
-        res = self._get_img_content_from_url( url, client)
-        #res = client.get(url, stream=True)
-        #res = self.client.get(url)
-        if res is None:
-            return 
         file_name = re.search(r"\d+_(p|ugoira).*?\..*", url)[0]
 
         artwork_saved_path = os.path.join(user_artworks_saved_path, file_name)
         if os.path.exists(artwork_saved_path):
             if self.detail_disp:
                 print(f"    {artwork_saved_path} exists, skip to next.")
-            return
-        with open(artwork_saved_path, 'wb') as f:
-            f.write(res.content)
-            if self.detail_disp:
-                print(f"    downloaded in user_artworks_saved_path: {file_name}")
+            return [artwork_saved_path]
+        # the image is served by i.pximg.net, but counted to the limit of pixiv.net
+        if self.artwork_engine.run(url, self._save_img_from_url, url, artwork_saved_path, headers,
+                                   site="pixiv.net") is None:
+            return []
+        if self.detail_disp:
+            print(f"    downloaded in user_artworks_saved_path: {file_name}")
+        return [artwork_saved_path]
 
     
                 
@@ -322,11 +626,11 @@ class youtube_music_channel_scraper_api:
         image_saved_path = os.path.join(saved_path, image_name)
         if os.path.exists(image_saved_path):
             print(f"    unsplash image has been downloaded, skip to next...")
-            return
+            return [image_saved_path]
         
-        driver = webdriver.Firefox(firefox_options=self.opts) 
-        self._get_content_from_url(driver, url)
-        html = driver.page_source
+        with self.driver_pool.driver() as driver:
+            self._get_content_from_url(driver, url)
+            html = driver.page_source
         
         # find the image url
         target_str = "srcSet=\""
@@ -335,20 +639,16 @@ class youtube_music_channel_scraper_api:
         img_urls = html[start_idx:end_idx].split(', ')
         assert isinstance(img_urls, list)
         print(f"img_urls[-1]: {img_urls[-1]}")
+        # e.g., "https://images.unsplash.com/photo-xxx?w=2400 2400w", the largest image comes last
+        img_url = img_urls[-1].split(' ')[0].replace('&amp;', '&')
         
         
-        client = requests.Session()
-        #client.headers.update(headers)
    
-        res = self._get_img_content_from_url(url, client, 'unsplash')
-        
-        if res is None:
-            return
-        
-        with open(image_saved_path, 'wb') as f:
-            f.write(res.content)
-            if self.detail_disp:
-                print(f"    downloaded unsplash image at: {image_saved_path}")
+        if self.artwork_engine.run(img_url, self._save_img_from_url, img_url, image_saved_path) is None:
+            return []
+        if self.detail_disp:
+            print(f"    downloaded unsplash image at: {image_saved_path}")
+        return [image_saved_path]
                 
     
     
@@ -357,11 +657,11 @@ class youtube_music_channel_scraper_api:
         image_saved_path = os.path.join(saved_path, image_name)
         if os.path.exists(image_saved_path):
             print(f"    pexels image has been downloaded, skip to next...")
-            return
+            return [image_saved_path]
         
-        driver = webdriver.Firefox(firefox_options=self.opts) 
-        self._get_content_from_url(driver, url)
-        html = driver.page_source
+        with self.driver_pool.driver() as driver:
+            self._get_content_from_url(driver, url)
+            html = driver.page_source
         
         # find the image url
         target_str = "property=\"og:image\" content=\""
@@ -375,204 +675,243 @@ class youtube_music_channel_scraper_api:
         #print(f"img_urls[-1]: {img_urls[-1]}")
         
         
-        client = requests.Session()
-        #client.headers.update(headers)   
-        res = self._get_img_content_from_url( url, client, 'pexels')
-        
-        if res is None:
-            return
-        
-        with open(image_saved_path, 'wb') as f:
-            
-            f.write(res.content)
-            if self.detail_disp:
-                print(f"    downloaded image at: {image_saved_path}")    
+        img_url = img_url.replace('&amp;', '&')
+        if self.artwork_engine.run(img_url, self._save_img_from_url, img_url, image_saved_path) is None:
+            return []
+        if self.detail_disp:
+            print(f"    downloaded image at: {image_saved_path}")    
+        return [image_saved_path]
                 
     ##############################################################################################################################            
     #######################################################################end of image downloader################################            
     ############################################################################################################################## 
     
     
-    def _download_artwork_image(self, video_info):
+    def _download_artwork_image(self, video_info, saved_path):
+            # returns the paths of the saved images, empty if the download fails, None if there is
+            # no image to download, i.e., the artwork website is not supported or the artwork has no image
+            if self.artwork_cache is not None:
+                saved_paths = self.artwork_cache.fetch(video_info["artwork_url"], saved_path)
+                if saved_paths is not None:
+                    return saved_paths
             print(f"    download artwork ...")
+            saved_paths = None
             if 'artstation.com/' in video_info["artwork_url"]:
                 hash_id = video_info["artwork_url"].split('/')[-1]
-                self._download_artstation_artwork(hash_id, saved_path)
+                saved_paths = self._download_artstation_artwork(hash_id, saved_path)
             elif "pixiv.net/" in video_info["artwork_url"]:
                 artwork_id = video_info["artwork_url"].split('/')[-1]
-                self._download_pixiv_artwork(artwork_id, saved_path)
+                saved_paths = self._download_pixiv_artwork(artwork_id, saved_path)
             elif "unsplash.com/photos/" in video_info["artwork_url"]:
-                self._download_unsplash_image(video_info["artwork_url"], saved_path)
+                saved_paths = self._download_unsplash_image(video_info["artwork_url"], saved_path)
             elif "pexels.com/photo/" in video_info["artwork_url"]:
-                self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
+                saved_paths = self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
             elif "fav.me/" in video_info["artwork_url"]:
-                self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
+                saved_paths = self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
             elif "flickr.com/photos/" in video_info["artwork_url"] or 'flic.kr/p' in video_info["artwork_url"]:
-                self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
+                saved_paths = self._download_pexels_or_deviant_or_flickr_image(video_info["artwork_url"], saved_path)
+            else:
+                print(f"    artwork website of {video_info['artwork_url']} is not supported, skip artwork.")
             print(f"    finish artwork downloading.")  
+            if self.artwork_cache is not None and saved_paths:
+                self.artwork_cache.store(video_info["artwork_url"], saved_paths)
+            return saved_paths
 
     
-    def download_youtube_video_as_mp3_chapters(self, ext, video_info, channel_saved_path, download_thumbnail=False):
+    ############################################################################################################################## 
+    ##################################################video downloader############################################################
+    ############################################################################################################################## 
+    # A video is downloaded in three steps, which run as separate stages of the
+    # channel pipeline (see download_youtube_channel):
+    #     1. _download_media:		download the video (or its audio) by youtube_dl
+    #     2. _download_artwork:	download the artwork image found in the video description
+    #     3. _split_chapters:		split the downloaded file into chapters
+    # The steps pass a download job to each other:
+    #     {"video_info":		video info,
+    #      "ext":			file format,
+    #      "saved_path":		folder of the video, named by video id
+    #      "media_path":		path of the downloaded video (or audio) file
+    #      "chapters":		chapters which are not split yet, each contains title, start_time, end_time
+    #      "manifest":		download manifest of the channel
+    #      "download_thumbnail":	download the thumbnail as well}
+    # Every downloaded file is recorded into the download manifest of the channel, which
+    # decides what is left to download for a video without listing its folder.
+    
+    def _get_manifest(self, channel_saved_path):
+        # the download manifest of a channel, loaded once and shared by all steps
+        with self._manifests_lock:
+            if channel_saved_path not in self._manifests:
+                manifest_path = os.path.join(channel_saved_path, 'download_manifest.json')
+                self._manifests[channel_saved_path] = download_manifest(manifest_path)
+            return self._manifests[channel_saved_path]
+            
+    def _close_manifest(self, channel_saved_path):
+        with self._manifests_lock:
+            manifest = self._manifests.pop(channel_saved_path, None)
+        if manifest is not None:
+            manifest.save()
+            
+    def _adopt_downloaded_video(self, manifest, video_info, saved_path, download_thumbnail):
         """
-        Here is a trick for downloading youtube video with chapters
-        There is a drawback that the download command usually add extra 
-        seconds into chapters[1:], sometimes the extra seconds are added
-        to the beginning of music, while sometimes are added to the end.
-        There is no obvious way to deal with such problem, thus, here 
-        only download the first chapter and discord the rest.
+        A video folder downloaded before the download manifest existed. It is counted
+        as done when it contains as many files as expected, which is the rule used
+        before the manifest, and its files are recorded into the manifest.
+        Outputs:
+            True if all files of the video have been downloaded.
         """
-        print(f"    start downloading video ({ext}) with chapters and artwork for video title: {video_info['video_title']}...")
+        filenames = os.listdir(saved_path)
+        target_file_counts = 1 # this count adds downloaded video
+        target_file_counts += 1 if video_info.get('artwork_url') is not None else 0
+        target_file_counts += 1 if download_thumbnail else 0
+        target_file_counts += len(video_info["chapters"]) if video_info.get("chapters") else 0
+        if len(filenames) < target_file_counts:
+            return False
+        vid = video_info["video_id"]
+        for filename in filenames:
+            manifest.record(vid, f"file:{filename}", os.path.join(saved_path, filename))
+        manifest.mark_done(vid)
+        return True
+    
+    def _download_media(self, ext, video_info, channel_saved_path, download_thumbnail=False):
+        """
+        Input Arguments:
+            1. ext:			file format, 'mp3' or video format
+            2. video_info:		video info
+            3. channel_saved_path:	folder of the channel
+            4. download_thumbnail:	download the thumbnail as well
+        Outputs:
+            a download job for the next steps, None if there is nothing left to do for this video.
+        """
+        if "chapters" not in video_info.keys():
+            job = self._new_download_job(ext, video_info, channel_saved_path, download_thumbnail)
+            return self._download_video_media(job) if job is not None else None
+        elif video_info["chapters"] is not None:
+            job = self._new_download_job(ext, video_info, channel_saved_path, download_thumbnail)
+            return self._download_chapters_media(job) if job is not None else None
+        
         
+    def _new_download_job(self, ext, video_info, channel_saved_path, download_thumbnail):
         # sometimes the video info only contain video upload time 
         # when the video is "Premiered", thus this kind of video
         # will be skipped for downloading
         if "video_id" not in video_info.keys():
             print(f"Error: video_info: {video_info} is not a proper info, skip to next")
             return 
-            
-        url = "https://www.youtube.com/watch?v=" + video_info["video_id"]
-        saved_path = os.path.join(channel_saved_path, video_info["video_id"])
+        
+        vid = video_info["video_id"]
+        manifest = self._get_manifest(channel_saved_path)
+        saved_path = os.path.join(channel_saved_path, vid)
+        if manifest.is_done(vid):
+            print(f"    all files of {vid} have been downloaded, skip to next")
+            return
+        if not manifest.known(vid) and os.path.exists(saved_path):
+            if self._adopt_downloaded_video(manifest, video_info, saved_path, download_thumbnail):
+                print(f"    all files of {vid} have been downloaded, skip to next")
+                return
         if not os.path.exists(saved_path):
             os.makedirs(saved_path)
+        return {"video_info": video_info, "ext": ext, "saved_path": saved_path, "media_path": None,
+                "chapters": [], "manifest": manifest, "download_thumbnail": download_thumbnail}
+        
+        
+    def _download_media_file(self, job, url):
+        # download the media (and the thumbnail) of a job into job["media_path"], and record them.
+        # raises DownloadError if the download fails.
+        ext = job["ext"]
+        vid = job["video_info"]["video_id"]
+        manifest = job["manifest"]
+        download_thumbnail = job["download_thumbnail"] and not manifest.has(vid, "thumbnail")
+        if manifest.has(vid, "media"):
+            if not download_thumbnail:
+                print(f"    file: {os.path.basename(job['media_path'])} exists, skip to artwork")
+                return
+            print(f"    download thumbnail only...")
+            report = self._download_by_youtube_dl(url, ext, job["saved_path"], download_thumbnail=True, skip_download=True)
+        else:
+            if ext == 'mp3':
+                print(f"    download {ext}{' and thumbnail' if download_thumbnail else ''}...")
+            else:
+                print(f"    download video in format: {ext}...")
+            report = self._download_by_youtube_dl(url, ext, job["saved_path"], target_path=job["media_path"],
+                                                  download_thumbnail=download_thumbnail)
+            manifest.record(vid, "media", report["filename"])
         
+        if download_thumbnail:
+            thumbnail_filename = report["thumbnail_filename"]
+            if thumbnail_filename is not None and not os.path.exists(thumbnail_filename):
+                thumbnail_filename = None
+            # a video without thumbnail is recorded as well, so it is not asked again
+            manifest.record(vid, "thumbnail", thumbnail_filename)
+        
+        
+    def _media_filename(self, title, vid, ext):
+        # file name of a saved (renamed) title, sanitised the way youtube_dl names its own files,
+        # e.g., "AC/DC: Live?" -> "AC_DC - Live", thus a title never fails or escapes saved_path.
+        return sanitize_filename(f"{title}#{vid}.{ext}")
+        
+    def _download_chapters_media(self, job):
+        """
+        Here is a trick for downloading youtube video with chapters
+        There is a drawback that the download command usually add extra 
+        seconds into chapters[1:], sometimes the extra seconds are added
+        to the beginning of music, while sometimes are added to the end.
+        There is no obvious way to deal with such problem, thus, here 
+        only download the first chapter and discord the rest.
+        """
+        ext = job["ext"]
+        video_info = job["video_info"]
+        print(f"    start downloading video ({ext}) with chapters and artwork for video title: {video_info['video_title']}...")
+            
+        url = "https://www.youtube.com/watch?v=" + video_info["video_id"]
+        saved_path = job["saved_path"]
+        manifest = job["manifest"]
                 
         title = video_info['video_title']
         vid = video_info["video_id"]
         
         
         
-        chapter_need2save_list = []        
-        for idx, chapter in enumerate(video_info["chapters"]):  
+        chapter_need2save_list = []
+        # repeated chapter titles are renamed once
+        renamed_titles = rename_many([chapter["title"] for chapter in video_info["chapters"]]) \
+                         if self.rename_title else []
+        for idx, chapter in enumerate(video_info["chapters"]):
             chapter_need2save = {}
             audio_filename = chapter["title"]
             if self.rename_title:
-                try:      
-                    renamed_title = rename(audio_filename)
-                except:
+                renamed_title, error = renamed_titles[idx]
+                if error is not None:
                     print(f"chapter title: {audio_filename}")
-                    print(f"Error: title: {title}, contains unrecognised patterns in rename function.")
+                    print(f"Error: title: {title}, contains unrecognised patterns in rename function, {error}.")
                     print("original chapter title will be used.")
-                    #print(f"Skip to next.")
-                    #break
-                chapter_need2save['title'] = renamed_title + f"#{vid}" + f".{ext}"
-            else:
-                chapter_need2save['title'] = audio_filename + f"#{vid}" + f".{ext}"
+                    renamed_title = audio_filename
+                audio_filename = renamed_title
+            chapter_need2save['title'] = self._media_filename(audio_filename, vid, ext)
                 
             chapter_need2save["start_time"] = chapter["start_time"]
             chapter_need2save["end_time"] = chapter["end_time"]
            
-            chapter_need2save_list.append(chapter_need2save)
+            # this aims to find out which chapter needs to be split
+            if not manifest.has(vid, "chapter:" + chapter_need2save['title']):
+                chapter_need2save_list.append(chapter_need2save)
                
             
         
-        # check if all files are downloaded, if not
-        # check which file is not downloaded.       
-        filenames = os.listdir(saved_path)
-        target_file_counts = len(video_info["chapters"])
-        target_file_counts += 1 # this count adds downloaded video
-        target_file_counts += 1 if video_info['artwork_url'] is not None else 0
-        target_file_counts += 1 if download_thumbnail else 0 
-        target_file_counts += 1 if os.path.exists(title+f"#{vid}.{ext}") else 0
-        if len(filenames) == target_file_counts:   
-            print(f"all files have been downloaded, skip to next")
-            return 
-        else:
-            # this aims to find out which chapter needs to be downloaded  
-            for filename in filenames:
-                for chapter_need2save in chapter_need2save_list:
-                    if filename in chapter_need2save["title"]:
-                        chapter_need2save_list.remove(chapter_need2save)  
-            skip_video_download = False
-            if os.path.exists(title+f"#{vid}.{ext}"):
-                    skip_video_download = True 
-        
-        while True:  
-            try:      
-                if ext == 'mp3':
-                    if not skip_video_download and not download_thumbnail:
-                        print(f"    download {ext} only...")
-                        command = f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' -x --audio-format {ext} {url}"
-                        os.system(command)
-                        time.sleep(5)    
-                                  
-                    elif not skip_video_download and download_thumbnail:
-                        print(f"    download {ext} and thumbnail...")
-                        command = f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' -x --audio-format {ext} {url} --write-thumbnail"    
-                        os.system(command)
-                        time.sleep(5)  
-                    
-                    elif skip_video_download and download_thumbnail:
-                        print(f"    download thumbnail only...")
-                        command = f"youtube-dl -q --write-thumbnail --skip-download {url}"    
-                        os.system(command)
-                        time.sleep(5)  
-                        
-                    for idx, chapter in enumerate(chapter_need2save_list):
-                        print(f"    split mp3 file into {idx}th/{len(chapter_need2save_list)} chapter: {chapter}")
-                        audio_path = os.path.join(saved_path, title+'#'+vid+f'.{ext}')
-                        export_path = os.path.join(saved_path, chapter['title'])
-                        start_time = self._convert_time2millionseconds(chapter['start_time'])
-                        end_time = self._convert_time2millionseconds(chapter['end_time'])
-                        self.split_audio_file(audio_path, start_time, end_time, export_path)
-                else:
-                
-                    if not skip_video_download and not download_thumbnail:
-                        command = f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' {ext} {url}"
-                        os.system(command)
-                        time.sleep(5)    
-                                  
-                    elif not skip_video_download and download_thumbnail:
-                        print(f"    download thumbnail...")
-                        command = f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' {ext} {url} --write-thumbnail"    
-                        os.system(command)
-                        time.sleep(5)
-                        
-                    elif skip_video_download and download_thumbnail:
-                        print(f"    download thumbnail only...")
-                        command = f"youtube-dl -q --write-thumbnail --skip-download {url}"    
-                        os.system(command)
-                        time.sleep(5) 
-                        
-                    for idx, chapter in enumerate(chapter_need2save_list):
-                        print(f"    split video file into {idx}th chapter: {chapter}")
-                        input_path = os.path.join(saved_path, title+'#'+vid+'.'+ext)
-                        output_path = os.path.join(saved_path, chapter['title'])
-                        start_time = self._convert_time2millionseconds(chapter['start_time']) // 1000
-                        end_time = self._convert_time2millionseconds(chapter['end_time']) // 1000
-                        duration = end_time - start_time
-                        command = f"ffmpeg -ss {start_time} -t {duration} -i {input_path} {output_path}"
-                        os.system(command)
-                        time.sleep(5)
-                          
-                break
-            except: 
-                print("something wrong with the downloading, wait for 5 seconds to download again.")
-                time.sleep(5)
-                continue
-                
-        if video_info["artwork_url"] is not None:
-            self._download_artwork_image(video_info)  
-            
-
-        print(f"    finish youtube {ext} and artwork downloading.")
+        # the whole video is kept next to its chapters, named by the original title
+        job["media_path"] = os.path.join(saved_path, self._media_filename(title, vid, ext))
+        job["chapters"] = chapter_need2save_list
+        
+        self._download_media_file(job, url)
+        return job
                 
         
-    def download_youtube_video(self, ext, video_info, channel_saved_path, download_thumbnail=False):
+    def _download_video_media(self, job):
+        ext = job["ext"]
+        video_info = job["video_info"]
         print(f"    start downloading {ext} and artwork for video title: {video_info['video_title']}...")
-        
-        # sometimes the video info only contain video upload time 
-        # when the video is "Premiered", thus this kind of video
-        # will be skipped for downloading
-        if "video_id" not in video_info.keys():
-            print(f"Error: video_info: {video_info} is not a proper info, skip to next")
-            return 
             
         url = "https://www.youtube.com/watch?v=" + video_info["video_id"]
-        
-        saved_path = os.path.join(channel_saved_path, video_info["video_id"])
-        if not os.path.exists(saved_path):
-            os.makedirs(saved_path)
-
+        saved_path = job["saved_path"]
                 
         title = video_info['video_title']
         vid = video_info["video_id"]
@@ -581,133 +920,102 @@ class youtube_music_channel_scraper_api:
                   
         
         if self.rename_title:
-            try:
-                renamed_title = rename(audio_filename)
-            except:
-                print(f"Error: title: {title}, contains unrecognised patterns in rename function.")
+            renamed_title, error = rename_many([audio_filename])[0]
+            if error is not None:
+                print(f"Error: title: {title}, contains unrecognised patterns in rename function, {error}.")
                 print("original title will be used.")
                 
                 renamed_title = audio_filename
-            final_saved_title = renamed_title + f"#{vid}" + f".{ext}"
-        else:
-            final_saved_title = title + f"#{vid}" + f".{ext}"
+            audio_filename = renamed_title
  
-        saved_filename = os.path.join(saved_path, final_saved_title)
-        print(f"    saved_filename: {saved_filename}")
+        job["media_path"] = os.path.join(saved_path, self._media_filename(audio_filename, vid, ext))
+        print(f"    saved_filename: {job['media_path']}")
         
-        # check if all files downloaded
-        filenames = os.listdir(saved_path)
-        if download_thumbnail:
-            if "artwork_url" in video_info.keys() and video_info['artwork_url'] is not None:
-                if len(filenames) == 3:
-                    print(f"    all files downloaded, skip to next")
-                    return
+        self._download_media_file(job, url)
+        return job
+        
+        
+    def _download_artwork(self, job):
+        video_info = job["video_info"]
+        vid = video_info["video_id"]
+        manifest = job["manifest"]
+        if video_info.get("artwork_url") is not None and not manifest.has(vid, "artwork"):
+            saved_paths = self._download_artwork_image(video_info, job["saved_path"])
+            if saved_paths is None:
+                # no artwork to download, recorded as {"filename": null}, so it is not asked again
+                manifest.record(vid, "artwork")
             else:
-                if len(filenames) == 2:
-                    print(f"    all files downloaded, skip to next")
-                    return
-        else:
-            if "artwork_url" in video_info.keys() and video_info['artwork_url'] is not None:
-                if len(filenames) == 2:
-                    print(f"    all files downloaded, skip to next")
-                    return
+                for path in saved_paths:
+                    manifest.record(vid, "artwork:" + os.path.basename(path), path)
+                # a failed download is not recorded, and tried again by the next run
+                if saved_paths:
+                    manifest.record(vid, "artwork")
+        return job
+        
+        
+    def _split_chapters(self, job):
+        ext = job["ext"]
+        saved_path = job["saved_path"]
+        media_path = job["media_path"]
+        manifest = job["manifest"]
+        vid = job["video_info"]["video_id"]
+        chapter_times = []
+        for chapter in job["chapters"]:
+            start_time = self._convert_time2millionseconds(chapter['start_time'])
+            end_time = self._convert_time2millionseconds(chapter['end_time'])
+            chapter_times.append((start_time, end_time, os.path.join(saved_path, chapter['title'])))
+        if chapter_times:
+            if ext == 'mp3':
+                self._split_mp3_chapters(media_path, chapter_times)
             else:
-                if len(filenames) == 1:
-                    print(f"    all files downloaded, skip to next")
-                    return
+                self._split_video_chapters(media_path, chapter_times)
+            for chapter, (_, _, export_path) in zip(job["chapters"], chapter_times):
+                if os.path.exists(export_path):
+                    manifest.record(vid, "chapter:" + chapter['title'], export_path)
         
+        self._finish_download_job(job)
+        print(f"    finish youtube {ext} and artwork downloading.")
         
-        if os.path.exists(saved_filename):
-            #filenames = os.listdir(saved_path)
-            # this aims to download artwork image when
-            # video is downloaded but artwork image is not.
-            # if not return here then the video and thumbnail (if True) will normally be downloaded.
-            if "artwork_url" in video_info.keys() and video_info['artwork_url'] is not None:
-                if download_thumbnail:
-                    if len(filenames) < 3:
-                        self._download_artwork_image(video_info)
-                        print(f"    file: {final_saved_title} exists, skip to next")
-                        return 
-                else:
-                    if len(filenames) < 2:
-                        self._download_artwork_image(video_info)  
-                        print(f"    file: {final_saved_title} exists, skip to next")
-                        return 
-                
-            
-        old_title = title+f"#{vid}.{ext}"
-        old_title = old_title.replace('|', '_')
-        old_title = old_title.replace('/', '_').replace("?", '')
-        old_saved_filename = os.path.join(saved_path, old_title)
-      
         
-        while True:
-            try:
-                if ext == 'mp3' and not download_thumbnail:
-                    print(f"    download {ext} only...")
-                    os.system(f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' -x --audio-format {ext} {url}")       
-                elif ext == 'mp3' and download_thumbnail:
-                    print(f"    download {ext} and thumbnail...")
-                    os.system(f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' -x --audio-format {ext} {url} --write-thumbnail") 
-                else:
-                    print(f"    download video in format: {ext}...")
-                    os.system(f"youtube-dl -q -o '{saved_path}/%(title)s#%(id)s.%(ext)s' {url}")  
-                break
-            except: 
-                print("something wrong with the downloading, wait for 5 seconds to download again.")
-                time.sleep(5)
-                continue
-                
-        if "artwork_url" in video_info.keys() and video_info["artwork_url"] is not None:
-            self._download_artwork_image(video_info)  
-            
-        if old_saved_filename != saved_filename:
-            try:
-                os.rename(old_saved_filename, saved_filename)
-            except:
-                pass
+    def _finish_download_job(self, job):
+        # mark the video as done when every expected file is recorded
+        video_info = job["video_info"]
+        vid = video_info["video_id"]
+        manifest = job["manifest"]
+        expected = ["media"]
+        if job["download_thumbnail"]:
+            expected.append("thumbnail")
+        if video_info.get("artwork_url") is not None:
+            expected.append("artwork")
+        for chapter in job["chapters"]:
+            expected.append("chapter:" + chapter['title'])
+        if all(manifest.has(vid, key) for key in expected):
+            manifest.mark_done(vid)
         
-        print(f"    finish youtube {ext} and artwork downloading.")
+        
+    def download_youtube_video_as_mp3_chapters(self, ext, video_info, channel_saved_path, download_thumbnail=False):
+        # download a video with chapters, then its artwork, then split it into chapters
+        job = self._new_download_job(ext, video_info, channel_saved_path, download_thumbnail)
+        if job is not None:
+            job = self._download_chapters_media(job)
+        if job is not None:
+            self._split_chapters(self._download_artwork(job))
+        
+        
+    def download_youtube_video(self, ext, video_info, channel_saved_path, download_thumbnail=False):
+        # download a video (or its audio), then its artwork
+        job = self._new_download_job(ext, video_info, channel_saved_path, download_thumbnail)
+        if job is not None:
+            job = self._download_video_media(job)
+        if job is not None:
+            self._split_chapters(self._download_artwork(job))
         
         
     #####################################fetcher from youtube webpage######################################################################
         
-    def _fetch_info_from_html(self, html, str_target):
-
-        start_index = html.find(str_target)
-        end_index = start_index + len(str_target)
-
-        pair_symbols = []
-        while True :
-            if html[end_index] in ['{', '[']:
-                pair_symbols.append(html[end_index])
-            elif html[end_index] in ['}',']']:
-                if html[end_index] == '}':
-                    if pair_symbols[-1] == '{':
-                        pair_symbols.pop()
-                    else:
-                        print(f"Error, {html[end_index]} and {pair_symbols[-1]} are not matched!")
-                        return
-                elif html[end_index] == ']':
-                    if pair_symbols[-1] == '[':
-                        pair_symbols.pop()
-                    else:
-                        print(f"Error, {html[end_index]} and {pair_symbols[-1]} are not matched!")
-                        return
-            if pair_symbols == []:
-                break
-            else:
-                end_index += 1
-        end_index += 1
-        if self.detail_disp:
-            print(f"    found content: {html[start_index + len(str_target):end_index]}")
-
-        return start_index + len(str_target), end_index
-    
-    def _fetch_video_details(self, html):
-             
-        start_index, end_index = self._fetch_info_from_html(html, "\"videoDetails\":")
-        video_details_json = json.loads(html[start_index:end_index])
+    def _fetch_video_details(self, page):
+        # page is a youtube_page_data object of the watch page
+        video_details_json = page.get("videoDetails")
 
         return video_details_json
     
@@ -744,19 +1052,15 @@ class youtube_music_channel_scraper_api:
                 return link
         return
         
-    def _fetch_video_chapters(self, html, lengthSeconds):
+    def _fetch_video_chapters(self, page, lengthSeconds):
         
-        start_index, end_index = self._fetch_info_from_html(html, "\"chapters\":")     
-        #print(f"start_index: {start_index}, end_index: {end_index}")
-        #print(f"html[start_index:end_index]: {html[start_index:end_index]}")
-        data_json = json.loads(html[start_index:end_index])
+        data_json = page.get("chapters")
         #print(data_json)
-        #sys.exit("Error message")
-        assert isinstance(data_json, list)
         
-        if len(data_json) == 0:
+        if data_json is None or len(data_json) == 0:
             print(f"    couldn't find chapters")
             return
+        assert isinstance(data_json, list)
         print(f"    fetch video chapters...")
         chapters = []
         for idx, data in enumerate(data_json):
@@ -777,22 +1081,14 @@ class youtube_music_channel_scraper_api:
         return chapters
             
     
-    def _fetch_video_upload_date(self, html):      
-        str_target = "\"dateText\":"
-        start_index, end_index = self._fetch_info_from_html(html, str_target)
-        #start_idx = html.find("\"dateText\":") + 27# {"simpleText":"29 Apr 2018"}
-        #end_idx = start_idx + 
-        #print(f"    start_index: {start_index}, end_index: {end_index}")
-        #print(f"    html: {html[start_index:end_index]}")
-        data_json = json.loads(html[start_index:end_index])
+    def _fetch_video_upload_date(self, page):      
+        data_json = page.get("dateText")
         dateText = data_json["simpleText"]
         #datetime = parse(dateText)
         return dateText
      
-    def _fetch_thumbnail_url(self, html):
-        str_target = "\"thumbnails\":"
-        start_index, end_index = self._fetch_info_from_html(html, str_target)   
-        data_json = json.loads(html[start_index:end_index])
+    def _fetch_thumbnail_url(self, page):
+        data_json = page.get("thumbnails")
         #print(f"data_json: {data_json}")
         assert isinstance(data_json, list)
         
@@ -818,14 +1114,15 @@ class youtube_music_channel_scraper_api:
         
     ###################################################################################################################################     
     
-    def _fetch_video_info(self, video_id, firefox_opts):
+    def _fetch_video_info(self, video_id):
     
         """
         Input Arguments:
         1. video_id: 		youtube video id
-        3. firefox_opts:	options for firefox browser, normally headless
         
-        This will extract video info into a list.
+        This will extract video info into a list. The watch page is loaded by
+        self.fetch_engine, either a firefox session checked out from self.driver_pool
+        or a plain http request.
         The video info includes: 
             1. video_title:               str
             2. video_id:                  str
@@ -842,33 +1139,24 @@ class youtube_music_channel_scraper_api:
         """
         info = {} # all video info will be stored in this variable
         
-        
-        video_url = "https://www.youtube.com/watch?v=" + video_id
-            
-        
-        if self.adblock_add_on_path:
-            driver2 = webdriver.Firefox(self.adblock_add_on_path, firefox_options=firefox_opts)
-        else:
-            driver2 = webdriver.Firefox(firefox_options=firefox_opts)
-        
-        
-        
-        self._get_content_from_url(driver2, video_url)
-        html = driver2.page_source
+        html = self._fetch_watch_page_html(video_id)
+        if html is None:
+            return info
+        # json data of the watch page, parsed once and shared by all _fetch_* helpers
+        page = youtube_page_data(html)
         try:    
             # fetch video upload date################################
-            info['video_upload_date'] = self._fetch_video_upload_date(html)
+            info['video_upload_date'] = self._fetch_video_upload_date(page)
             assert isinstance(info['video_upload_date'], str)
             if self.stop_upload_date is not None:
                 after_stop_upload_time = self._fetch_video_by_upload_date(info['video_upload_date'])
                 if not after_stop_upload_time:
-                    driver2.quit()
                     info['stop_scrape'] = True
                     print("    stop_scrape.")
                     #assert 1 == 0
                     return info
                 
-            video_details_json = self._fetch_video_details(html)
+            video_details_json = self._fetch_video_details(page)
         
             # fetch video title######################################
             video_title = video_details_json['title']
@@ -887,11 +1175,10 @@ class youtube_music_channel_scraper_api:
             duration_seconds = video_details_json['lengthSeconds']
             
             # fetch video chapters####################################
-            info['chapters'] = self._fetch_video_chapters(html, duration_seconds)
+            info['chapters'] = self._fetch_video_chapters(page, duration_seconds)
             
             # usually, video length is less than 6 mins unless it contains chapters.
             if int(duration_seconds) > 10 * 60 and info['chapters'] is None:
-                driver2.quit()
                 return
             #fetch video duration in seconds###########################    
             info['video_duration'] = duration_seconds
@@ -899,25 +1186,198 @@ class youtube_music_channel_scraper_api:
             
 
             # fetch video thumbnail url ###############################   
-            info['thumbnail_url'] = self._fetch_thumbnail_url(html)
+            info['thumbnail_url'] = self._fetch_thumbnail_url(page)
             # fetch video artwork url    
         
             artwork_link = self._fetch_artwork_link(video_details_json)
             info['artwork_url'] = artwork_link
         
-        
-            driver2.quit()
         except:
-            driver2.quit()
+            pass
         return info
         
         
         
-    def _fetch_video_info_batch(self, driver, saved_path):
+    def _fetch_video_info_in_order(self, video_ids):
+        """
+        Input Arguments:
+            1. video_ids:			video ids (a list or a generator) sorted from the newest upload time to the oldest
+        Outputs:
+            a generator of (video_id, info), in the same order as video_ids.
+            
+        Idea:
+            The video info is fetched by self.threads workers, at most 2 * self.threads
+            videos are in flight at the same time. The results are yielded strictly in
+            the order of video_ids, thus the output (and the saved json file) stays the
+            same no matter how many workers are used.
+            Once a worker finds a video uploaded before self.stop_upload_date (the info
+            contains "stop_scrape"), all videos after it are older as well, so that
+            outstanding work after this video is cancelled, and the generator stops
+            after yielding this info.
+        """
+        # the smallest index of a video that is not after the stop upload date
+        stop_idx = [float("inf")]
+        lock = threading.Lock()
+        
+        def _worker(idx, video_id):
+            if idx > stop_idx[0]:
+                return
+            info = self._fetch_video_info(video_id)
+            self.count("video_info")
+            if info is not None and "stop_scrape" in info.keys():
+                with lock:
+                    stop_idx[0] = min(stop_idx[0], idx)
+            return info
+        
+        pending = deque()
+        video_ids_iter = iter(enumerate(video_ids))
+        executor = ThreadPoolExecutor(max_workers=self.threads)
+        
+        def _submit_next():
+            for idx, video_id in video_ids_iter:
+                pending.append((video_id, executor.submit(_worker, idx, video_id)))
+                return True
+            return False
+            
+        try:
+            for _ in range(2 * self.threads):
+                if not _submit_next():
+                    break
+            while pending:
+                video_id, future = pending.popleft()
+                info = future.result()
+                yield video_id, info
+                if info is not None and "stop_scrape" in info.keys():
+                    return
+                _submit_next()
+        finally:
+            # cancel outstanding work when stopped early or interrupted
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        
+        
+    def _update_video_info_batch(self, driver, channel_page, video_ids_saved_path, total_info_saved_path, on_video_info=None):
+        """
+        Input Arguments:
+            1. driver:				a webdriver object on the channel video page, or None
+            2. channel_page:			youtube_page_data of the channel video page, used when driver is None
+            3. video_ids_saved_path:		channel_videos_id_list.txt saved by a previous fetch process
+            4. total_info_saved_path:		channel_videos_info_list.json saved by a previous fetch process
+            5. on_video_info:			called with every video info of the merged list, new videos first
+        Outputs:
+            the merged video info list, new videos first.
+            
+        Idea:
+            The channel video list is sorted from the nearest upload time to the farest, thus
+            the listing stops at the first video id that is already saved, and only the video
+            info of new videos is fetched. The new video ids and info are merged at the head of
+            the saved files. With continuation tokens, this usually costs one or two page loads
+            per channel instead of listing and fetching the whole channel again.
+        """
+        stored_video_ids = self._read_video_ids(video_ids_saved_path)
+        if os.path.exists(total_info_saved_path):
+            with open(total_info_saved_path, 'r') as f:
+                stored_video_info_list = json.load(f)
+        else:
+            stored_video_info_list = []
+        known_video_ids = set(stored_video_ids)
+        
+        new_video_ids = []
+        listed_video_ids = self._list_channel_video_ids(driver, channel_page, None)
+        for video_id in listed_video_ids:
+            if video_id in known_video_ids:
+                break
+            new_video_ids.append(video_id)
+        listed_video_ids.close()
+        print(f"    update channel: found {len(new_video_ids)} new videos.")
+        
+        new_video_info_list = []
+        for data, info in pit(self._fetch_video_info_in_order(new_video_ids), text="fetch new video info", color="yellow"):
+            if info is not None and info != {}:
+                if "stop_scrape" in info.keys():
+                    print("****Find the first video not after stop upload time, stop the scraping process.******")
+                    break
+                new_video_info_list.append(info)
+                if on_video_info is not None:
+                    on_video_info(info)
+        
+        if on_video_info is not None:
+            for info in stored_video_info_list:
+                on_video_info(info)
+        
+        video_ids_list = new_video_ids + stored_video_ids
+        video_info_list = new_video_info_list + stored_video_info_list
+        tmp_path = video_ids_saved_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(video_ids_list))
+        os.replace(tmp_path, video_ids_saved_path)
+        write_json_atomic(total_info_saved_path, video_info_list)
+        
+        return video_info_list
+        
+        
+    def _fetch_into_checkpoint_log(self, video_ids_source, video_info_list, checkpoint_log, on_video_info=None):
+        """
+        Input Arguments:
+            1. video_ids_source:		video ids to fetch, in channel order
+            2. video_info_list:		fetched video info is appended into this list
+            3. checkpoint_log:			a video_info_checkpoint_log, every fetched video id is appended into it
+            4. on_video_info:			called with every fetched video info, optional.
+        """
+        video_infos = self._fetch_video_info_in_order(video_ids_source)
+        for data, info in pit(video_infos, text="fetch video info", color="yellow"):
+            
+            print(f"    resume video_id: {data}")
+            
+            if info is not None and info != {}:         
+                if "stop_scrape" in info.keys():
+                    # the video_ids are sorted from nearest upload time to farest upload time
+                    # thus, the fisrt False of after upload time will stop the scrape process. 
+                    print("****Find the first video not after stop upload time, stop the scraping process.******")
+                    video_infos.close()
+                    break
+                video_info_list.append(info)
+                # append to the checkpoint log once a new video info is fetched
+                checkpoint_log.append(data, info)
+                if on_video_info is not None:
+                    on_video_info(info)
+            else:
+                # record skipped videos as well, so the resume point is exact
+                checkpoint_log.append(data, None)
+    
+    def _resume_index(self, video_ids_list, last_video_id):
+        """
+        Returns the index in video_ids_list to resume an interrupted fetch process from,
+        last_video_id is the video id at the tail of the checkpoint log.
+        """
+        start_idx = video_ids_list.index(self.stop_video_id) if self.stop_video_id else 0
+        if last_video_id in video_ids_list:
+            return max(start_idx, video_ids_list.index(last_video_id) + 1)
+        return start_idx
+    
+    def _resume_interrupted_fetch(self, video_ids_saved_path, total_info_saved_path, checkpoint_log):
+        """
+        Finish a fetch video info process which was interrupted after the video ids were saved,
+        and compact its checkpoint log into total_info_saved_path.
+        The video ids listed in video_ids_saved_path are taken as fetched by the update process,
+        so the rest of them have to be fetched before the update, or they are never fetched.
+        """
+        print(f"    resume video info fetch process from {checkpoint_log.log_path} before update.")
+        video_ids_list = self._read_video_ids(video_ids_saved_path)
+        video_info_list, last_video_id = checkpoint_log.read()
+        resume_idx = self._resume_index(video_ids_list, last_video_id)
+        self._fetch_into_checkpoint_log(video_ids_list[resume_idx:], video_info_list, checkpoint_log)
+        checkpoint_log.compact(total_info_saved_path, video_info_list)
+        
+    def _fetch_video_info_batch(self, driver, saved_path, channel_page=None, on_video_info=None):
         """
         Input Arguments:
-            1. driver:				a webdriver object
+            1. driver:				a webdriver object, None when fetch_engine is http
             2. saved_path:			a directory to contain all videos and channel info files
+            3. channel_page:			youtube_page_data of the channel video page, used when driver is None
+            4. on_video_info:			called with every video info of the channel in order, as soon as 
+                                                 it is read from the saved files or fetched, optional.
         Outputs:
             1. channel_videos_id_list.txt	a file contains all video ids, this file exists
                                                  for resuming video info fetch process, which usually takes
@@ -939,6 +1399,11 @@ class youtube_music_channel_scraper_api:
             	2. file 2 not exists but file 1 exists, then resume the fetch process.
             	
             	3. both files are not created, then start the fetch process straightforward.
+            	   If the checkpoint log exists, the listing of the previous process was interrupted,
+            	   (file 1 is only saved when the channel is fully listed), then list the channel
+            	   again and only fetch the videos which are not in the log.
+            In update mode, an interrupted fetch process (file 1 and the checkpoint log exist) is
+            finished before the new videos are fetched.
         """
         
         #print(f"    fetch video info...")
@@ -951,109 +1416,126 @@ class youtube_music_channel_scraper_api:
         ##################################################################################################################
         ##################### here are some methods to deal with resume process for video info download###################
         
-        
-        if os.path.exists(total_info_saved_path) and not self.update:
+        # every fetched video info is appended into this log, which is compacted
+        # into total_info_saved_path when the fetch process is finished.
+        checkpoint_log = video_info_checkpoint_log(os.path.join(saved_path, 'channel_videos_info_list.jsonl'))
+        
+        if self.update and os.path.exists(video_ids_saved_path):
+            if checkpoint_log.exists():
+                # the previous fetch process was interrupted, finish it first, the update
+                # takes all saved video ids as fetched and only merges the json file.
+                self._resume_interrupted_fetch(video_ids_saved_path, total_info_saved_path, checkpoint_log)
+            # this channel has been fetched before, only fetch the new videos
+            video_info_list = self._update_video_info_batch(driver, channel_page, 
+                                                            video_ids_saved_path, total_info_saved_path,
+                                                            on_video_info)
+            self._quit_driver(driver)
+            return video_info_list
+        
+        elif checkpoint_log.exists() and os.path.exists(video_ids_saved_path) and not self.update:
+            # this case means a fetch video info process was interrupted,
+            # resume it from the video id at the tail of the checkpoint log
+            print(f"    resume video info fetch process from {checkpoint_log.log_path}.")
+            video_ids_list = self._read_video_ids(video_ids_saved_path)
+            video_info_list, last_video_id = checkpoint_log.read()
+            resume_idx = self._resume_index(video_ids_list, last_video_id)
+        
+        elif os.path.exists(total_info_saved_path) and not self.update:
             print(f"    channel video info has been saved, read video info from {total_info_saved_path}.")
             with open(total_info_saved_path , 'r') as f:
                 video_info_list = json.load(f) 
                 
             if os.path.exists(video_ids_saved_path):  
-                with open(video_ids_saved_path, 'r') as f:
-                    video_ids_list = []
-                    lines = f.readlines()
-                    for line in lines:
-                        video_ids_list.append(line.replace('\n', ''))
-                    #video_ids_list.reverse()
+                video_ids_list = self._read_video_ids(video_ids_saved_path)
                 # this case means a fetch video info process needs to be resumed  
                 start_idx = video_ids_list.index(self.stop_video_id) if self.stop_video_id else 0
                 if len(video_info_list) < len(video_ids_list)-start_idx:
                     resume_video_id = video_info_list[-1]['video_id']
                     resume_idx = video_ids_list.index(resume_video_id) + 1
+                    # json file saved by an older version, move its video info into the log
+                    checkpoint_log.reset()
+                    for info in video_info_list:
+                        checkpoint_log.append(info['video_id'], info)
                 # this case means all video info has been fetched, just return
                 elif  len(video_info_list) == len(video_ids_list) :  
-                    driver.quit()
+                    self._quit_driver(driver)
+                    if on_video_info is not None:
+                        for info in video_info_list:
+                            on_video_info(info)
                     return video_info_list
             else:
-                driver.quit()
+                self._quit_driver(driver)
                 raise ValueError("please fetch video ids for this channel")
                 return
           
-        if os.path.exists(video_ids_saved_path) and not self.update:
-            if not os.path.exists(total_info_saved_path):
-                print(f"    channel video ids have been saved, but no video info json file")
-                print(f"    skip channel scroll...")
-                video_info_list = []
-                with open(video_ids_saved_path, 'r') as f:
-                    video_ids_list = []
-                    lines = f.readlines()
-                    for line in lines:
-                        video_ids_list.append(line.replace('\n', ''))
-                    # this aims: to append the newest video ids into end of the file
-                    #            the scrapered video ids will be reversed in the file.
-                    #video_ids_list.reverse()
-                    resume_idx = video_ids_list.index(self.stop_video_id) if self.stop_video_id else 0
+        elif os.path.exists(video_ids_saved_path) and not self.update:
+            print(f"    channel video ids have been saved, but no video info json file")
+            print(f"    skip channel scroll...")
+            video_info_list = []
+            video_ids_list = self._read_video_ids(video_ids_saved_path)
+            # this aims: to append the newest video ids into end of the file
+            #            the scrapered video ids will be reversed in the file.
+            #video_ids_list.reverse()
+            resume_idx = video_ids_list.index(self.stop_video_id) if self.stop_video_id else 0
                  
+        elif checkpoint_log.exists():
+            # this case means the channel listing was interrupted before all video ids were saved,
+            # list the channel again, and only fetch the videos which are not in the checkpoint log.
+            # in update mode as well, there are no saved video ids to update from.
+            print(f"    channel video ids were not fully listed, list them again and resume from {checkpoint_log.log_path}.")
+            video_info_list, _ = checkpoint_log.read()
+            logged_video_ids = checkpoint_log.read_video_ids()
+            video_ids_list = None
+            video_ids_listing = self._list_channel_video_ids(driver, channel_page, video_ids_saved_path)
+            if driver is not None:
+                # a browser scrolls the whole channel at once, list it now, so that the channel driver
+                # is returned to the pool before the logged video info is replayed into on_video_info,
+                # whose stages may wait for a driver of the same pool (e.g., driver_pool_size 1).
+                video_ids_listing = iter(list(video_ids_listing))
+            video_ids_source = video_ids_listing
+            if self.stop_video_id:
+                video_ids_source = dropwhile(lambda video_id: video_id != self.stop_video_id, video_ids_source)
+            video_ids_source = (video_id for video_id in video_ids_source if video_id not in logged_video_ids)
+            
         else:
             ####this channel has not been fetched before, start to fetch video info process#########################
-            self._scroll2bottom_webpage(driver)
-            
+            checkpoint_log.reset()
             video_info_list = []
-            
-            video_data = driver.find_elements_by_xpath('//*[@id="video-title-link"]')
-  
-            video_ids_list = []
-            
-            for v_data in video_data:       
-                video_link = v_data.get_attribute('href')
-                if video_link is not None:
-                    video_id = video_link.split('watch?v=')[-1]
-                    video_ids_list.append(video_id)
-              
-                             
-            with open(video_ids_saved_path, 'w') as f:
-                f.write('\n'.join(video_ids_list))
-            #video_ids_list.reverse()
-            resume_idx = video_ids_list.index(self.stop_video_id) if self.stop_video_id else 0
-        driver.quit()
+            video_ids_list = None
+            video_ids_listing = self._list_channel_video_ids(driver, channel_page, video_ids_saved_path)
+            video_ids_source = video_ids_listing
+            if self.stop_video_id:
+                video_ids_source = dropwhile(lambda video_id: video_id != self.stop_video_id, video_ids_source)
         
-        print(f"    len(video_ids_list): {len(video_ids_list)}")
+        if video_ids_list is not None:
+            self._quit_driver(driver)
+            print(f"    len(video_ids_list): {len(video_ids_list)}")
+            video_ids_source = video_ids_list[resume_idx:]
+            video_ids_listing = None
         
         
         
         ############start the fetch process###########################################################################
-        start_time = time.time()
-        for idx in pit(range(resume_idx, len(video_ids_list)), text="fetch video info", color="yellow"):
-            
-            
-            data = video_ids_list[idx].replace('\n','')
-            print(f"    resume video_id: {data}")
-              
-            info = self._fetch_video_info(data, self.opts)
-            
-            if info is not None and info != {}:         
-                if "stop_scrape" in info.keys():
-                    # the video_ids are sorted from nearest upload time to farest upload time
-                    # thus, the fisrt False of after upload time will stop the scrape process. 
-                    print("****Find the first video not after stop upload time, stop the scraping process.******")
-                    return video_info_list               
-                video_info_list.append(info)
-                # write to json file once a new video info is fetched
-                with open(total_info_saved_path, 'w', encoding='utf-8') as f:
-                    json.dump(video_info_list, f, ensure_ascii=False, indent=4)  
+        if on_video_info is not None:
+            # video info fetched before the process was interrupted
+            for info in video_info_list:
+                on_video_info(info)
+        self._fetch_into_checkpoint_log(video_ids_source, video_info_list, checkpoint_log, on_video_info)
                        
-                    
-        
-            execution_time = time.time() - start_time
-            
-            # long pause when scraper works over 30 mins
-            # otherwise, short pause
-            if execution_time / 60 > 30:
-                pause_report(length=100, file_count=None,disp=False)
-                start_time = time.time()
-            else:
-                pause_report(length=10,file_count=None,disp=False)
+        if video_ids_listing is not None:
+            # stopped at stop_upload_date before the channel was fully listed, list the rest
+            # of the channel, so that the complete video id list is saved for resume and update
+            for _ in video_ids_listing:
+                pass
             
-        
+        self._quit_driver(driver)
+        if video_ids_listing is not None and not os.path.exists(video_ids_saved_path):
+            # the channel listing stopped at a page that could not be fetched, keep the
+            # checkpoint log, so that the next run lists the channel again (scenario 3)
+            print(f"    channel video ids were not fully listed, keep {checkpoint_log.log_path} to resume later.")
+            checkpoint_log.close()
+        else:
+            checkpoint_log.compact(total_info_saved_path, video_info_list)
         
         return video_info_list    
         
@@ -1062,6 +1544,12 @@ class youtube_music_channel_scraper_api:
         """
         Input Argument:
             channel_url:			youtube channel url
+        Returns:
+            a summary of the channel, None if the channel can not be opened:
+                {"video_count":	number of videos in channel video info,
+                 "failed":		number of videos dropped by a failed pipeline stage,
+                 "incomplete":	number of videos whose files are not all recorded in the download manifest}
+            The channel is completely downloaded only when both "failed" and "incomplete" are 0.
         Outputs:
             1. channel_videos_id_list.txt	a file contains all video ids
             2. channel_videos_info_list.json	a file contains all video info
@@ -1073,12 +1561,24 @@ class youtube_music_channel_scraper_api:
         channel_videos_url = channel_url+'/videos'
        
         
-        driver = webdriver.Firefox()
-        self._get_content_from_url(driver, channel_videos_url)
+        if self.fetch_engine == 'http':
+            driver = None
+            channel_page = self.channel_lister.open_channel(channel_videos_url)
+            if channel_page is None:
+                print(f"Error: could not open {channel_videos_url}, skip to next channel.")
+                return
+            channel_id = self.channel_lister.extract_channel_id(channel_page)
+            print(f"    channel_id: {channel_id}")
+        else:
+            driver = self.driver_pool.acquire()
+            with self._channel_drivers_lock:
+                self._channel_drivers.add(driver)
+            self._get_content_from_url(driver, channel_videos_url)
+            channel_page = None
+            channel_id = self._extract_channel_id(driver)
         
         # create channel folder#########################################################
         channel_name = channel_url.split('/')[-1]
-        channel_id = self._extract_channel_id(driver)
         folder_name = channel_name + '+' + channel_id
         channel_saved_path = os.path.join(self.saved_path, folder_name)
         if not os.path.exists(channel_saved_path):
@@ -1098,45 +1598,48 @@ class youtube_music_channel_scraper_api:
         
         #driver.implicitly_wait(5)
         #time.sleep(5)
-        # fetch video info ###############################################################
-        video_info_list = self._fetch_video_info_batch(driver, channel_saved_path)
-        driver.quit()
-        
-        
-        
-        
-        # set resume idx by counting the number of folders under channel directory########
-        folder_names_list = os.listdir(channel_saved_path)
-        if 'channel_videos_id_list.txt' in folder_names_list:
-            folder_names_list.remove('channel_videos_id_list.txt')
-        if 'channel_videos_info_list.json' in folder_names_list:
-            folder_names_list.remove('channel_videos_info_list.json')
-        resume_idx = 0
-        
-        
-        print(f"    resume_idx: {resume_idx}")
-        
-        # start to download videos####################################################################
-        start_time = time.time()
-        for idx in pit(range(resume_idx,len(video_info_list)), text="download video", color="green"):
-            # download video with chapters
-            
-            if "chapters" not in video_info_list[idx].keys():
-                self.download_youtube_video(self.download_file_format, video_info_list[idx], \
-                                                channel_saved_path, download_thumbnail=True)
-            elif video_info_list[idx]["chapters"] is not None:
-                self.download_youtube_video_as_mp3_chapters(self.download_file_format, video_info_list[idx], \
-                                                          channel_saved_path, download_thumbnail=True)
-            
-            execution_time = time.time() - start_time
-            
-            
-            
-            # long pause when scraper works over 50 mins
-            # otherwise, short pause
-            if execution_time / 60 > 50:
-                pause_report(length=100, file_count=None,disp=False)
-                start_time = time.time()
-            else:
-                pause_report(length=1,file_count=None,disp=False)
-            
+        # fetch video info and download videos in a pipeline###############################
+        # media download, artwork download and chapter split run on their own threads, and
+        # start as soon as the first video info is fetched. The downloads are handed over to
+        # the download executor, which limits the concurrent downloads per host over all channels.
+        pipeline = staged_pipeline([("media", self._download_media_stage(channel_saved_path), self.max_concurrent_downloads),
+                                    ("artwork", self._download_artwork_stage, self.download_executor.workers),
+                                    ("chapter split", self._split_chapters, self.chapter_workers)],
+                                   queue_size=self.pipeline_queue_size,
+                                   detail_disp=self.detail_disp)
+        try:
+            video_info_list = self._fetch_video_info_batch(driver, channel_saved_path, channel_page,
+                                                           on_video_info=pipeline.put)
+        finally:
+            self._quit_driver(driver)
+            # wait for the videos in the pipeline
+            pipeline.close()
+            manifest = self._get_manifest(channel_saved_path)
+            self._close_manifest(channel_saved_path)
+        
+        # videos which are skipped by _download_media are not expected in the manifest
+        incomplete_video_ids = [info["video_id"] for info in video_info_list
+                                if "video_id" in info.keys() and info.get("chapters", []) is not None
+                                and not manifest.is_done(info["video_id"])]
+        if incomplete_video_ids:
+            print(f"    {len(incomplete_video_ids)} videos are not completely downloaded, e.g., {incomplete_video_ids[:5]}")
+        return {"video_count": len(video_info_list),
+                "failed": sum(pipeline.failures.values()),
+                "incomplete": len(incomplete_video_ids)}
+        
+        
+    def _download_media_stage(self, channel_saved_path):
+        def _download(video_info):
+            job = self.download_executor.run("googlevideo.com", self._download_media, self.download_file_format,
+                                             video_info, channel_saved_path, download_thumbnail=True)
+            self.count("downloads")
+            return job
+        return _download
+        
+    def _download_artwork_stage(self, job):
+        artwork_url = job["video_info"].get("artwork_url")
+        if artwork_url is None:
+            return job
+        # artworks of several videos are resolved at the same time, their images
+        # are downloaded by the artwork engine within the limits per host
+        return self._download_artwork(job)
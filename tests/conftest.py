@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import types
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
+"""
+A local stand-in for youtube, which serves the recorded pages in tests/fixtures:
+    1. GET  /watch?v={video_id}		fixtures/watch_{video_id}.html
+    2. GET  /@{name}/videos			fixtures/channel_{name}.html
+    3. POST /youtubei/v1/browse		fixtures/browse_{continuation token}.json
+Any other request is answered by 404. server.statuses maps a path to a list of
+status codes returned (in order) before the recorded page, e.g., {"/watch": [503]}.
+"""
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class _fixture_handler(BaseHTTPRequestHandler):
+
+    def _fixture_filename(self, url, body=None):
+        if url.path == "/watch":
+            return f"watch_{parse_qs(url.query).get('v', [''])[0]}.html"
+        if url.path.startswith("/@") and url.path.endswith("/videos"):
+            return f"channel_{url.path[2:-len('/videos')]}.html"
+        if url.path == "/youtubei/v1/browse" and body:
+            return f"browse_{json.loads(body).get('continuation')}.json"
+
+    def _reply(self, url, body=None):
+        self.server.requests.append((self.command, self.path))
+        statuses = self.server.statuses.get(url.path)
+        if statuses:
+            self._send(statuses.pop(0), b'')
+            return
+        filename = self._fixture_filename(url, body)
+        filepath = os.path.join(FIXTURES_PATH, filename) if filename else None
+        if filepath is None or not os.path.exists(filepath):
+            self._send(404, b'')
+            return
+        with open(filepath, 'rb') as f:
+            content_type = "application/json" if filename.endswith('.json') else "text/html; charset=utf-8"
+            self._send(200, f.read(), content_type)
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(urlparse(self.path))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.bodies.append(json.loads(body) if body else None)
+        self._reply(urlparse(self.path), body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def youtube_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _fixture_handler)
+    server.requests = []
+    # decoded json bodies of POST requests
+    server.bodies = []
+    server.statuses = {}
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_args(**kwargs):
+    # the defaults of youtube_scraper.py, fetching pages by the http engine
+    args = types.SimpleNamespace(music_channel_list_filepath=None, saved_path=None,
+                                 download_file_format='mp3', update=False, adblock_add_on_path=None,
+                                 stop_upload_date=None, stop_video_id=None, rename_title=True,
+                                 detail_disp=False, firefoxOptions='headless', driver_pool_size=1,
+                                 driver_max_pages=50, fetch_engine='http',
+                                 youtube_base_url="https://www.youtube.com", threads=1,
+                                 requests_per_minute=6000, rate_jitter=0, channel_workers=1,
+                                 max_concurrent_downloads=2, download_workers=4, max_bandwidth=0,
+                                 artwork_cache_size=1024)
+    for key, value in kwargs.items():
+        setattr(args, key, value)
+    return args
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+from Artwork_Cache import artwork_cache, normalize_url
+
+URL = "https://www.artstation.com/artwork/abc"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = artwork_cache(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+def _images(folder, images):
+    # write {filename: content} into folder, and return the paths
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for filename, content in images.items():
+        path = folder / filename
+        path.write_bytes(content)
+        paths.append(str(path))
+    return paths
+
+
+def _objects(cache):
+    return sorted(os.path.basename(path) for _, _, files in os.walk(cache.objects_dir) for path in files)
+
+
+def test_normalize_url():
+    assert normalize_url("https://www.ArtStation.com/artwork/abc/?x=1#top") == "artstation.com/artwork/abc"
+    assert normalize_url(" http://artstation.com/artwork/abc ") == "artstation.com/artwork/abc"
+
+
+def test_stored_artwork_is_linked_into_another_folder(cache, tmp_path):
+    cache.store(URL, _images(tmp_path / "video1", {"abc.jpg": b"a" * 100, "abc_2.jpg": b"b" * 50}))
+    video2 = tmp_path / "video2"
+    video2.mkdir()
+    saved_paths = cache.fetch("http://artstation.com/artwork/abc/", str(video2))
+    assert saved_paths == [str(video2 / "abc.jpg"), str(video2 / "abc_2.jpg")]
+    assert (video2 / "abc.jpg").read_bytes() == b"a" * 100
+    assert (video2 / "abc_2.jpg").read_bytes() == b"b" * 50
+    assert cache.fetch("https://www.artstation.com/artwork/other", str(video2)) is None
+    assert cache.get_stats() == {"hits": 1, "misses": 1, "evictions": 0, "urls": 1, "bytes": 150}
+
+
+def test_same_image_behind_different_urls_is_stored_once(cache, tmp_path):
+    cache.store(URL, _images(tmp_path / "video1", {"abc.jpg": b"a" * 100}))
+    cache.store("https://www.pixiv.net/en/artworks/1", _images(tmp_path / "video2", {"1.jpg": b"a" * 100}))
+    assert len(_objects(cache)) == 1
+    assert cache.get_stats()["bytes"] == 100
+
+
+def test_least_recently_used_urls_are_evicted(tmp_path):
+    cache = artwork_cache(str(tmp_path / "cache"), max_bytes=250)
+    for idx in range(2):
+        cache.store(f"{URL}{idx}", _images(tmp_path / f"video{idx}", {f"{idx}.jpg": bytes([idx]) * 100}))
+    # the first url is used again, thus the second one is the least recently used
+    assert cache.fetch(f"{URL}0", str(tmp_path / "video0")) is not None
+    cache.store(f"{URL}2", _images(tmp_path / "video2", {"2.jpg": b"\x02" * 100}))
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 200
+    assert cache.fetch(f"{URL}1", str(tmp_path / "video1")) is None
+    assert cache.fetch(f"{URL}0", str(tmp_path / "video0")) is not None
+    assert cache.fetch(f"{URL}2", str(tmp_path / "video2")) is not None
+    assert len(_objects(cache)) == 2
+    # files linked into the video folders are never removed
+    assert (tmp_path / "video1" / "1.jpg").exists()
+    cache.close()
+
+
+def test_image_shared_by_an_evicted_url_is_kept(tmp_path):
+    cache = artwork_cache(str(tmp_path / "cache"), max_bytes=250)
+    for idx, content in enumerate([b"a", b"b", b"a", b"c"]):
+        cache.store(f"{URL}{idx}", _images(tmp_path / f"video{idx}", {f"{idx}.jpg": content * 100}))
+    # the first two urls are evicted, the image of the first one is still referred by the third one
+    assert cache.get_stats()["evictions"] == 2
+    video4 = tmp_path / "video4"
+    video4.mkdir()
+    assert cache.fetch(f"{URL}0", str(video4)) is None
+    assert cache.fetch(f"{URL}2", str(video4)) == [str(video4 / "2.jpg")]
+    assert (video4 / "2.jpg").read_bytes() == b"a" * 100
+    assert len(_objects(cache)) == 2
+    cache.close()
+
+
+def test_image_removed_from_the_disk_is_a_miss(cache, tmp_path):
+    cache.store(URL, _images(tmp_path / "video1", {"abc.jpg": b"a" * 100}))
+    for dirpath, _, files in os.walk(cache.objects_dir):
+        for filename in files:
+            os.remove(os.path.join(dirpath, filename))
+    assert cache.fetch(URL, str(tmp_path / "video1")) is None
+    assert cache.get_stats()["urls"] == 0
+
+
+def test_index_is_loaded_by_the_next_run(tmp_path):
+    cache = artwork_cache(str(tmp_path / "cache"))
+    cache.store(URL, _images(tmp_path / "video1", {"abc.jpg": b"a" * 100}))
+    cache.close()
+    cache = artwork_cache(str(tmp_path / "cache"))
+    video2 = tmp_path / "video2"
+    video2.mkdir()
+    assert cache.fetch(URL, str(video2)) == [str(video2 / "abc.jpg")]
+    assert cache.get_stats()["bytes"] == 100
+    cache.close()
+
+
+def test_broken_index_starts_a_new_cache(tmp_path, capsys):
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "artwork_cache.json").write_text('{"artstation.com/artwork/abc": {"fi')
+    cache = artwork_cache(str(tmp_path / "cache"))
+    assert "is broken" in capsys.readouterr().out
+    assert cache.get_stats()["urls"] == 0
+    cache.close()
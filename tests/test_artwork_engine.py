@@ -0,0 +1,88 @@
+import time
+import threading
+
+import pytest
+
+from Artwork_Engine import async_artwork_engine
+
+
+class _concurrency_meter:
+    # a download function which records how many calls run at the same time
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return value
+
+
+@pytest.fixture
+def engine():
+    engine = async_artwork_engine(workers=4, host_concurrency={"artstation.com": 2, "pixiv.net": 1})
+    yield engine
+    engine.close()
+
+
+def test_results_are_in_the_order_of_the_calls(engine):
+    def download(idx):
+        # later calls finish first
+        time.sleep(0.01 * (5 - idx))
+        return idx
+    calls = [(f"https://cdn{idx}.example.com/{idx}.jpg", download, (idx,)) for idx in range(5)]
+    assert engine.run_batch(calls) == [0, 1, 2, 3, 4]
+    assert engine.run_batch([]) == []
+
+
+def test_failed_call_returns_none(engine, capsys):
+    def download(idx):
+        if idx == 1:
+            raise IOError("connection reset")
+        return idx
+    calls = [(f"https://example.com/{idx}.jpg", download, (idx,)) for idx in range(3)]
+    assert engine.run_batch(calls) == [0, None, 2]
+    assert "fail to download https://example.com/1.jpg" in capsys.readouterr().out
+
+
+def test_site_slot_limits_the_images_of_other_hosts(engine):
+    meter = _concurrency_meter()
+    calls = [(f"https://i.pximg.net/img-original/{idx}.jpg", meter, (idx,)) for idx in range(4)]
+    assert engine.run_batch(calls, site="pixiv.net") == [0, 1, 2, 3]
+    assert meter.max_running == 1
+
+
+def test_host_slots_of_the_urls_are_taken_without_site(engine):
+    meter = _concurrency_meter()
+    calls = [(f"https://www.artstation.com/artwork/{idx}.jpg", meter, (idx,)) for idx in range(6)]
+    engine.run_batch(calls)
+    assert meter.max_running == 2
+
+    # hosts not listed are only limited by the number of workers
+    meter = _concurrency_meter()
+    calls = [(f"https://cdn.example.com/{idx}.jpg", meter, (idx,)) for idx in range(8)]
+    engine.run_batch(calls)
+    assert meter.max_running == 4
+
+
+def test_batches_from_several_threads_share_the_slots(engine):
+    meter = _concurrency_meter()
+    results = {}
+
+    def run(thread_idx):
+        results[thread_idx] = engine.run(f"https://www.pixiv.net/ajax/illust/{thread_idx}", meter, thread_idx,
+                                         site="pixiv.net")
+    threads = [threading.Thread(target=run, args=(idx,)) for idx in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert results == {0: 0, 1: 1, 2: 2}
+    assert meter.max_running == 1
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import threading
+
+import pytest
+
+from conftest import make_args
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from youtube_scraper import scraper_by_given_artist_channels
+
+CHANNEL_URLS = [f"https://www.youtube.com/@channel{idx}/videos" for idx in range(6)]
+
+
+def _summary(failed=0, incomplete=0):
+    return {"video_count": 3, "failed": failed, "incomplete": incomplete}
+
+
+class _fake_channels:
+    # stands for download_youtube_channel, records how many channels run at the same time
+
+    def __init__(self, summaries=None, delay=0.05):
+        self.summaries = summaries or {}
+        self.delay = delay
+        self.processed = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, channel_url):
+        with self._lock:
+            self.processed.append(channel_url)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        summary = self.summaries.get(channel_url, _summary())
+        if isinstance(summary, Exception):
+            raise summary
+        return summary
+
+
+@pytest.fixture
+def list_filepath(tmp_path):
+    path = tmp_path / "channels.txt"
+    path.write_text("".join(f"channel{idx}: {url}\n" for idx, url in enumerate(CHANNEL_URLS)))
+    return str(path)
+
+
+def _run(tmp_path, list_filepath, fake, **kwargs):
+    scraper = scraper_by_given_artist_channels(make_args(saved_path=str(tmp_path), music_channel_list_filepath=list_filepath,
+                                                         **kwargs))
+    scraper.youtube_scraper_api.download_youtube_channel = fake
+    scraper.start()
+    with open(os.path.join(str(tmp_path), "channel_progress.json"), 'r') as f:
+        return json.load(f)
+
+
+def test_channels_are_processed_in_parallel(tmp_path, list_filepath):
+    fake = _fake_channels()
+    progress = _run(tmp_path, list_filepath, fake, channel_workers=3)
+    assert sorted(fake.processed) == sorted(CHANNEL_URLS)
+    assert fake.max_running == 3
+    assert {url: progress[url]["status"] for url in CHANNEL_URLS} == {url: "done" for url in CHANNEL_URLS}
+
+
+def test_rerun_resumes_the_unfinished_channels(tmp_path, list_filepath):
+    fake = _fake_channels({CHANNEL_URLS[1]: _summary(failed=1), CHANNEL_URLS[2]: _summary(incomplete=2),
+                           CHANNEL_URLS[4]: RuntimeError("browser crashed")})
+    progress = _run(tmp_path, list_filepath, fake, channel_workers=2)
+    assert [progress[url]["status"] for url in CHANNEL_URLS] == ["done", "partial", "partial", "done", "failed", "done"]
+
+    fake = _fake_channels()
+    progress = _run(tmp_path, list_filepath, fake, channel_workers=2)
+    assert sorted(fake.processed) == [CHANNEL_URLS[1], CHANNEL_URLS[2], CHANNEL_URLS[4]]
+    assert all(progress[url]["status"] == "done" for url in CHANNEL_URLS)
+
+
+def test_update_processes_every_channel_again(tmp_path, list_filepath):
+    _run(tmp_path, list_filepath, _fake_channels())
+    fake = _fake_channels(delay=0)
+    _run(tmp_path, list_filepath, fake, update=True)
+    assert sorted(fake.processed) == sorted(CHANNEL_URLS)
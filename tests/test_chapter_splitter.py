@@ -0,0 +1,129 @@
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from Chapter_Splitter import ffmpeg_chapter_command, split_chapters_by_ffmpeg, mp3_chapter_splitter, split_mp3_chapters
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+
+def test_every_chapter_is_seeked_before_its_input():
+    command = ffmpeg_chapter_command("in.mp4", [(0, 3000, "a.mp4"), (3000, 7500, "b.mp4"), (7500, None, "c.mp4")])
+    inputs = [idx for idx, arg in enumerate(command) if arg == "-i"]
+    assert len(inputs) == 3
+    assert command[inputs[0] - 4:inputs[0]] == ["-ss", "0.000", "-t", "3.000"]
+    assert command[inputs[1] - 4:inputs[1]] == ["-ss", "3.000", "-t", "4.500"]
+    assert command[inputs[2] - 2:inputs[2]] == ["-ss", "7.500"]
+    # no output side seeking, every output copies its own input
+    assert command.count("-ss") == 3 and "-to" not in command
+    assert command[inputs[2] + 2:] == ["-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero", "a.part.mp4",
+                                       "-map", "1", "-c", "copy", "-avoid_negative_ts", "make_zero", "b.part.mp4",
+                                       "-map", "2", "-c", "copy", "-avoid_negative_ts", "make_zero", "c.part.mp4"]
+
+
+def _duration(path):
+    # duration in seconds reported by ffmpeg
+    res = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], stderr=subprocess.PIPE, text=True)
+    hours, mins, secs = re.search(r"Duration: (\d+):(\d+):([\d.]+)", res.stderr).groups()
+    return int(hours) * 3600 + int(mins) * 60 + float(secs)
+
+
+@needs_ffmpeg
+def test_chapters_start_at_key_frames(tmp_path):
+    # 10 seconds, a key frame every 2 seconds
+    video_path = tmp_path / "video.mp4"
+    subprocess.run(["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=duration=10:size=160x120:rate=25",
+                    "-c:v", "mpeg4", "-g", "50", str(video_path)], check=True)
+    chapters = [(0, 3000, str(tmp_path / "a.mp4")), (3000, 7000, str(tmp_path / "b.mp4")),
+                (7000, None, str(tmp_path / "c.mp4"))]
+    assert split_chapters_by_ffmpeg(str(video_path), chapters) == [path for _, _, path in chapters]
+    # a chapter starts at the key frame before its start time, 2 and 6 seconds
+    assert _duration(tmp_path / "b.mp4") == pytest.approx(5.0, abs=0.2)
+    assert _duration(tmp_path / "c.mp4") == pytest.approx(4.0, abs=0.2)
+    assert not list(tmp_path.glob("*.part.*"))
+
+
+# MPEG1 layer III, 128 kbps, 44100 Hz, stereo: 417 bytes and 1152 samples per frame
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+FRAME_MS = 1152 * 1000 / 44100
+
+
+def _frame(idx):
+    # the body tells the frame index, and never contains a sync byte
+    return FRAME_HEADER + bytes([idx % 250]) * (FRAME_LENGTH - 4)
+
+
+def _xing_frame():
+    # the side info of a stereo MPEG1 frame is 32 bytes, then the Xing header
+    body = b"\x00" * 32 + b"Xing" + b"\x00\x00\x00\x0f"
+    return FRAME_HEADER + body + b"\x00" * (FRAME_LENGTH - 4 - len(body))
+
+
+def _id3v2_tag(payload):
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x03\x00\x00" + syncsafe + payload
+
+
+# garbage between frames 9 and 10, with a false frame header in it
+JUNK = b"xx" + FRAME_HEADER + b"\x01" * 20 + b"\xff\x00junk"
+
+
+@pytest.fixture
+def mp3_path(tmp_path):
+    # a frame header inside the tag must not be taken as audio
+    data = _id3v2_tag(b"TIT2" + FRAME_HEADER + b"\x00" * 40) + _xing_frame()
+    for idx in range(40):
+        if idx == 10:
+            data += JUNK
+        data += _frame(idx)
+    data += b"TAG" + b"\x00" * 125
+    path = tmp_path / "video.mp3"
+    path.write_bytes(data)
+    return path
+
+
+def _frames(path):
+    # indices of the frames in a chapter, which is nothing but whole frames
+    data = path.read_bytes()
+    assert len(data) % FRAME_LENGTH == 0
+    frames = [data[pos:pos + FRAME_LENGTH] for pos in range(0, len(data), FRAME_LENGTH)]
+    for frame in frames:
+        assert frame[:4] == FRAME_HEADER
+    return [frame[4] for frame in frames]
+
+
+def test_frames_are_indexed_without_tags_xing_and_junk(mp3_path):
+    with mp3_chapter_splitter(str(mp3_path)) as splitter:
+        assert len(splitter.frame_offsets) == 40 + 1
+        assert splitter.duration() == pytest.approx(40 * FRAME_MS)
+        assert splitter._gaps == [10]
+
+
+def test_chapters_are_cut_at_nearest_frames(mp3_path, tmp_path):
+    chapters = [(0, 10 * FRAME_MS + 3, str(tmp_path / "a.mp3")),
+                # the junk between frames 9 and 10 is not copied
+                (5 * FRAME_MS - 3, 20 * FRAME_MS, str(tmp_path / "b.mp3")),
+                (30 * FRAME_MS + 20, None, str(tmp_path / "c.mp3"))]
+    assert split_mp3_chapters(str(mp3_path), chapters) == [path for _, _, path in chapters]
+    assert _frames(tmp_path / "a.mp3") == list(range(0, 10))
+    assert _frames(tmp_path / "b.mp3") == list(range(5, 20))
+    # the ID3v1 tag at the end is not copied
+    assert _frames(tmp_path / "c.mp3") == list(range(31, 40))
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_chapter_shorter_than_a_frame_is_skipped(mp3_path, tmp_path):
+    chapters = [(1000, 1001, str(tmp_path / "a.mp3"))]
+    assert split_mp3_chapters(str(mp3_path), chapters) == []
+    assert not (tmp_path / "a.mp3").exists()
+
+
+def test_file_without_frames_is_not_split(tmp_path):
+    path = tmp_path / "video.mp3"
+    path.write_bytes(_id3v2_tag(b"\x00" * 20) + b"not an mp3 \xff\x00 at all" * 10)
+    with pytest.raises(ValueError):
+        split_mp3_chapters(str(path), [(0, 1000, str(tmp_path / "a.mp3"))])
@@ -0,0 +1,80 @@
+import json
+
+from Checkpoint_Log import video_info_checkpoint_log, write_json_atomic
+
+
+def _log(tmp_path):
+    return video_info_checkpoint_log(str(tmp_path / "channel_videos_info_list.jsonl"))
+
+
+def test_entries_are_read_back_in_order(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    checkpoint_log.append("Vb7Yq2kLm0A", {"video_id": "Vb7Yq2kLm0A"})
+    checkpoint_log.append("Hs0rT5pQa9Z", None)
+    checkpoint_log.append("Qm3Tz8HcW1s", {"video_id": "Qm3Tz8HcW1s"})
+    checkpoint_log.close()
+
+    # skipped videos are not video info, but the resume point
+    assert _log(tmp_path).read() == ([{"video_id": "Vb7Yq2kLm0A"}, {"video_id": "Qm3Tz8HcW1s"}], "Qm3Tz8HcW1s")
+    assert _log(tmp_path).read_video_ids() == {"Vb7Yq2kLm0A", "Hs0rT5pQa9Z", "Qm3Tz8HcW1s"}
+
+
+def test_missing_log_is_empty(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    assert not checkpoint_log.exists()
+    assert checkpoint_log.read() == ([], None)
+
+
+def test_torn_last_line_is_ignored_and_cut_off(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    checkpoint_log.append("Vb7Yq2kLm0A", {"video_id": "Vb7Yq2kLm0A"})
+    checkpoint_log.close()
+    # a write interrupted by a power failure
+    with open(checkpoint_log.log_path, 'ab') as f:
+        f.write(b'{"video_id": "Qm3Tz8HcW1s", "info": {"video_')
+
+    checkpoint_log = _log(tmp_path)
+    assert checkpoint_log.read() == ([{"video_id": "Vb7Yq2kLm0A"}], "Vb7Yq2kLm0A")
+    # the resumed process appends after the last complete line
+    checkpoint_log.append("Qm3Tz8HcW1s", {"video_id": "Qm3Tz8HcW1s"})
+    checkpoint_log.close()
+    with open(checkpoint_log.log_path, 'rb') as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)["video_id"] for line in lines] == ["Vb7Yq2kLm0A", "Qm3Tz8HcW1s"]
+
+
+def test_broken_line_stops_the_replay(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    with open(checkpoint_log.log_path, 'w') as f:
+        f.write('{"video_id": "Vb7Yq2kLm0A", "info": null}\n')
+        f.write('not json\n')
+        f.write('{"video_id": "Qm3Tz8HcW1s", "info": null}\n')
+    assert checkpoint_log.read() == ([], "Vb7Yq2kLm0A")
+
+
+def test_compact_writes_json_and_removes_log(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    checkpoint_log.append("Vb7Yq2kLm0A", {"video_id": "Vb7Yq2kLm0A"})
+    json_path = str(tmp_path / "channel_videos_info_list.json")
+    checkpoint_log.compact(json_path, [{"video_id": "Vb7Yq2kLm0A"}])
+
+    assert not checkpoint_log.exists()
+    with open(json_path, 'r') as f:
+        assert json.load(f) == [{"video_id": "Vb7Yq2kLm0A"}]
+    assert not (tmp_path / "channel_videos_info_list.json.tmp").exists()
+
+
+def test_reset_removes_log(tmp_path):
+    checkpoint_log = _log(tmp_path)
+    checkpoint_log.append("Vb7Yq2kLm0A", None)
+    checkpoint_log.reset()
+    assert not checkpoint_log.exists()
+    assert checkpoint_log.read() == ([], None)
+
+
+def test_write_json_atomic_replaces_file(tmp_path):
+    json_path = str(tmp_path / "info.json")
+    write_json_atomic(json_path, ["old"])
+    write_json_atomic(json_path, ["new"])
+    with open(json_path, 'r') as f:
+        assert json.load(f) == ["new"]
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from Download_Executor import download_executor
+
+
+@pytest.fixture
+def executor():
+    executor = download_executor(workers=4, try_count=2, backoff=0, show_progress=False)
+    yield executor
+    executor.close()
+
+
+def test_result_of_download(executor):
+    assert executor.run("https://rr1.googlevideo.com/videoplayback", lambda a, b=0: a + b, 1, b=2) == 3
+    assert executor.get_progress() == {"done": 1, "running": 0, "queued": 0, "failed": 0, "retried": 0}
+
+
+def test_failed_download_is_tried_again(executor):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise IOError("connection reset")
+        return "done"
+    assert executor.run("googlevideo.com", flaky) == "done"
+    assert len(calls) == 3
+    assert executor.get_progress()["retried"] == 2
+
+
+def test_error_is_raised_when_tries_are_used_up(executor):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise IOError("HTTP Error 403")
+    with pytest.raises(IOError):
+        executor.run("googlevideo.com", broken)
+    # the first try and try_count retries
+    assert len(calls) == 3
+    assert executor.get_progress()["failed"] == 1
+
+
+@pytest.mark.parametrize("host, limit", [("pixiv.net", 1), ("googlevideo.com", 2), ("example.com", 4)])
+def test_downloads_per_host_are_capped(executor, host, limit):
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+    # every download waits until `limit` of them run at the same time, or a short timeout
+    barrier = threading.Barrier(limit, timeout=0.2)
+
+    def download():
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        with lock:
+            running[0] -= 1
+    futures = [executor.submit(f"https://www.{host}/file", download) for _ in range(8)]
+    for future in futures:
+        future.result()
+    assert max_running[0] == limit
+
+
+def test_single_worker_runs_in_submit_order():
+    executor = download_executor(workers=1, show_progress=False)
+    order = []
+    futures = [executor.submit("googlevideo.com", order.append, idx) for idx in range(10)]
+    for future in futures:
+        future.result()
+    executor.close()
+    assert order == list(range(10))
+
+
+def test_queued_download_can_be_cancelled():
+    executor = download_executor(workers=1, show_progress=False)
+    release = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    def blocking():
+        started.set()
+        release.wait()
+    running = executor.submit("googlevideo.com", blocking)
+    try:
+        started.wait()
+        queued = [executor.submit("googlevideo.com", ran.append, idx) for idx in range(3)]
+        assert executor.get_progress()["queued"] == 3
+
+        assert all(future.cancel() for future in queued)
+        assert executor.get_progress()["queued"] == 0
+        # a running download is not cancelled
+        assert not running.cancel()
+    finally:
+        release.set()
+        running.result()
+        executor.close()
+    assert ran == []
+    assert executor.get_progress() == {"done": 1, "running": 0, "queued": 0, "failed": 0, "retried": 0}
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from conftest import make_args
+from Download_Manifest import download_manifest
+from Youtube_Scraper_API import youtube_music_channel_scraper_api
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path), rename_title=False))
+    # the media file is not downloaded, only the file names of the job are checked
+    monkeypatch.setattr(api, "_download_media_file", lambda job, url: None)
+    yield api
+    api.close()
+
+
+def _job(tmp_path, video_info):
+    return {"ext": "mp3", "video_info": video_info, "saved_path": str(tmp_path),
+            "manifest": download_manifest(str(tmp_path / "download_manifest.json")),
+            "download_thumbnail": False}
+
+
+def test_video_title_is_sanitised(api, tmp_path):
+    job = api._download_video_media(_job(tmp_path, {"video_id": "Vb7Yq2kLm0A",
+                                                     "video_title": "AC/DC: Live at ../Home?"}))
+    assert os.path.dirname(job["media_path"]) == str(tmp_path)
+    assert os.path.basename(job["media_path"]) == "AC_DC - Live at .._Home#Vb7Yq2kLm0A.mp3"
+
+
+def test_chapter_titles_are_sanitised(api, tmp_path):
+    video_info = {"video_id": "Qm3Tz8HcW1s", "video_title": "Winter Mix: 1/2",
+                  "chapters": [{"title": "Intro?", "start_time": "0:00:00", "end_time": "0:03:25"},
+                               {"title": "../Snow/fall", "start_time": "0:03:25", "end_time": "0:08:02"}]}
+    job = api._download_chapters_media(_job(tmp_path, video_info))
+    assert os.path.basename(job["media_path"]) == "Winter Mix - 1_2#Qm3Tz8HcW1s.mp3"
+    assert [chapter["title"] for chapter in job["chapters"]] == ["Intro#Qm3Tz8HcW1s.mp3",
+                                                                 "_Snow_fall#Qm3Tz8HcW1s.mp3"]
+    for chapter in job["chapters"]:
+        assert os.path.dirname(os.path.join(str(tmp_path), chapter["title"])) == str(tmp_path)
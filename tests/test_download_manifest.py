@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from conftest import make_args
+from Download_Manifest import download_manifest
+from Youtube_Scraper_API import youtube_music_channel_scraper_api
+
+VIDEO_INFO = {"video_id": "Vb7Yq2kLm0A", "video_title": "Aurora Lane - Northern Lights",
+              "artwork_url": None}
+
+
+def _manifest(tmp_path):
+    return download_manifest(str(tmp_path / "download_manifest.json"))
+
+
+def test_records_are_saved_and_loaded(tmp_path):
+    media_path = tmp_path / "song.mp3"
+    media_path.write_bytes(b"ID3 not really an mp3")
+    manifest = _manifest(tmp_path)
+    manifest.record("Vb7Yq2kLm0A", "media", str(media_path))
+    manifest.record("Vb7Yq2kLm0A", "artwork")
+    manifest.mark_done("Vb7Yq2kLm0A")
+    manifest.save()
+
+    manifest = _manifest(tmp_path)
+    assert manifest.is_done("Vb7Yq2kLm0A")
+    assert manifest.has("Vb7Yq2kLm0A", "artwork") and not manifest.has("Vb7Yq2kLm0A", "thumbnail")
+    assert manifest.artifact("Vb7Yq2kLm0A", "media")["filename"] == "song.mp3"
+    assert manifest.verify("Vb7Yq2kLm0A", "media", str(tmp_path))
+    # a file without a download (e.g., no artwork found) is verified as well
+    assert manifest.verify("Vb7Yq2kLm0A", "artwork", str(tmp_path))
+    assert not manifest.known("Qm3Tz8HcW1s")
+
+
+def test_changed_file_fails_verify(tmp_path):
+    media_path = tmp_path / "song.mp3"
+    media_path.write_bytes(b"first download")
+    manifest = _manifest(tmp_path)
+    manifest.record("Vb7Yq2kLm0A", "media", str(media_path))
+    media_path.write_bytes(b"something else")
+    assert not manifest.verify("Vb7Yq2kLm0A", "media", str(tmp_path))
+    os.remove(media_path)
+    assert not manifest.verify("Vb7Yq2kLm0A", "media", str(tmp_path))
+
+
+def test_manifest_is_saved_every_save_every_updates(tmp_path):
+    manifest = download_manifest(str(tmp_path / "download_manifest.json"), save_every=2)
+    manifest.record("Vb7Yq2kLm0A", "artwork")
+    assert not os.path.exists(manifest.manifest_path)
+    manifest.mark_done("Vb7Yq2kLm0A")
+    assert _manifest(tmp_path).is_done("Vb7Yq2kLm0A")
+
+
+def test_broken_manifest_starts_again(tmp_path):
+    (tmp_path / "download_manifest.json").write_text('{"Vb7Yq2kLm0A": {"done": tr')
+    assert _manifest(tmp_path).videos == {}
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    # urls passed to youtube_dl, which writes a fake media file
+    urls = []
+
+    def fake_download(self, url, ext, saved_path, target_path=None, download_thumbnail=False, skip_download=False):
+        urls.append(url)
+        with open(target_path, 'wb') as f:
+            f.write(b"fake media")
+        return {"filename": target_path, "thumbnail_filename": None}
+    monkeypatch.setattr(youtube_music_channel_scraper_api, "_download_by_youtube_dl", fake_download)
+    return urls
+
+
+def _run(tmp_path, video_info):
+    # the steps of the channel pipeline for one video, by a new process
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path), rename_title=False))
+    try:
+        job = api._download_media("mp3", video_info, str(tmp_path))
+        if job is not None:
+            api._split_chapters(api._download_artwork(job))
+        return job
+    finally:
+        api.close()
+
+
+def test_downloaded_video_is_skipped_on_rerun(tmp_path, downloads):
+    job = _run(tmp_path, VIDEO_INFO)
+    assert os.path.exists(job["media_path"])
+    assert len(downloads) == 1
+    assert _manifest(tmp_path).is_done("Vb7Yq2kLm0A")
+
+    # the video folder is not listed again, the manifest says it is done
+    assert _run(tmp_path, VIDEO_INFO) is None
+    assert len(downloads) == 1
+
+
+def test_recorded_media_is_not_downloaded_again(tmp_path, downloads, monkeypatch):
+    # the artwork failed in the first run, only the media is recorded
+    monkeypatch.setattr(youtube_music_channel_scraper_api, "_download_artwork_image",
+                        lambda self, video_info, saved_path: [])
+    video_info = dict(VIDEO_INFO, artwork_url="https://www.artstation.com/artwork/lVn2Ex")
+    _run(tmp_path, video_info)
+    manifest = _manifest(tmp_path)
+    assert manifest.has("Vb7Yq2kLm0A", "media") and not manifest.is_done("Vb7Yq2kLm0A")
+
+    job = _run(tmp_path, video_info)
+    assert job is not None
+    assert len(downloads) == 1
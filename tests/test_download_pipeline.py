@@ -0,0 +1,78 @@
+import time
+import random
+import threading
+
+from Download_Pipeline import staged_pipeline
+
+
+def test_items_pass_all_stages_in_order():
+    done = []
+    pipeline = staged_pipeline([("media", lambda item: item + ["media"], 1),
+                                ("artwork", lambda item: item + ["artwork"], 1),
+                                ("chapters", done.append, 1)], queue_size=2)
+    for idx in range(20):
+        pipeline.put([idx])
+    counts = pipeline.close()
+    assert done == [[idx, "media", "artwork"] for idx in range(20)]
+    assert counts == {"media": 20, "artwork": 20, "chapters": 20}
+
+
+def test_parallel_workers_finish_every_item():
+    done = []
+    lock = threading.Lock()
+
+    def slow(item):
+        time.sleep(random.uniform(0, 0.005))
+        return item
+
+    def finish(item):
+        with lock:
+            done.append(item)
+    pipeline = staged_pipeline([("media", slow, 4), ("artwork", slow, 3), ("chapters", finish, 2)])
+    for idx in range(50):
+        pipeline.put(idx)
+    pipeline.close()
+    # the order is not kept by parallel workers, but no item is lost or repeated
+    assert sorted(done) == list(range(50))
+
+
+def test_failed_or_dropped_item_does_not_stop_the_rest():
+    done = []
+
+    def media(item):
+        if item == 3:
+            raise ValueError("download failed")
+        # nothing left to do for this video
+        return None if item == 5 else item
+    pipeline = staged_pipeline([("media", media, 1), ("artwork", done.append, 1)])
+    for idx in range(8):
+        pipeline.put(idx)
+    counts = pipeline.close()
+    assert done == [0, 1, 2, 4, 6, 7]
+    assert counts == {"media": 7, "artwork": 6}
+    assert pipeline.failures == {"media": 1, "artwork": 0}
+
+
+def test_full_queue_blocks_the_producer():
+    release = threading.Event()
+    started = threading.Event()
+
+    def media(item):
+        started.set()
+        release.wait()
+        return item
+    pipeline = staged_pipeline([("media", media, 1)], queue_size=2)
+    pipeline.put(0)
+    started.wait()
+    # one item in the stage, two waiting in front of it
+    pipeline.put(1)
+    pipeline.put(2)
+    producer = threading.Thread(target=pipeline.put, args=(3,), daemon=True)
+    producer.start()
+    producer.join(timeout=0.2)
+    assert producer.is_alive()
+
+    release.set()
+    producer.join(timeout=5)
+    assert not producer.is_alive()
+    assert pipeline.close() == {"media": 4}
@@ -0,0 +1,55 @@
+import time
+import random
+import threading
+
+import pytest
+
+from conftest import make_args
+from Youtube_Scraper_API import youtube_music_channel_scraper_api
+
+VIDEO_IDS = [f"video{idx:06d}" for idx in range(40)]
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path), threads=4))
+    fetched = []
+    lock = threading.Lock()
+
+    def fake_fetch(video_id):
+        # later videos often finish first
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            fetched.append(video_id)
+        if video_id == "video000012":
+            return {"video_upload_date": "3 Mar 2023", "stop_scrape": True}
+        return {"video_id": video_id}
+    monkeypatch.setattr(api, "_fetch_video_info", fake_fetch)
+    api.fetched = fetched
+    yield api
+    api.close()
+
+
+def test_video_info_is_yielded_in_order(api):
+    video_infos = list(api._fetch_video_info_in_order(iter(VIDEO_IDS[:12])))
+    assert [video_id for video_id, _ in video_infos] == VIDEO_IDS[:12]
+    assert [info["video_id"] for _, info in video_infos] == VIDEO_IDS[:12]
+
+
+def test_videos_after_stop_upload_date_are_cancelled(api):
+    video_infos = list(api._fetch_video_info_in_order(iter(VIDEO_IDS)))
+    assert [video_id for video_id, _ in video_infos] == VIDEO_IDS[:13]
+    assert "stop_scrape" in video_infos[-1][1]
+    # at most 2 * threads videos are in flight when the stop is found
+    assert len(api.fetched) <= 13 + 2 * api.threads
+    assert set(api.fetched) <= set(VIDEO_IDS[:13 + 2 * api.threads])
+
+
+def test_closed_generator_cancels_outstanding_work(api):
+    video_infos = api._fetch_video_info_in_order(iter(VIDEO_IDS))
+    assert next(video_infos)[0] == VIDEO_IDS[0]
+    video_infos.close()
+    fetched = len(api.fetched)
+    assert fetched <= 1 + 2 * api.threads
+    time.sleep(0.05)
+    assert len(api.fetched) == fetched
@@ -0,0 +1,136 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from File_Downloader import download_to_file
+
+CONTENT = bytes(range(256)) * 400
+
+
+class _file_handler(BaseHTTPRequestHandler):
+    # serves CONTENT at any path, honours "Range: bytes={offset}-" unless server.ignore_range
+
+    def do_GET(self):
+        server = self.server
+        server.ranges.append(self.headers.get("Range"))
+        if server.statuses:
+            self.send_response(server.statuses.pop(0))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        offset = 0
+        if self.headers.get("Range") and not server.ignore_range:
+            offset = int(self.headers["Range"].split('=')[1].rstrip('-'))
+            if offset >= len(CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(CONTENT)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {offset}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        else:
+            self.send_response(200)
+        body = CONTENT[offset:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if server.cut_after:
+            # the connection breaks in the middle of the body
+            self.wfile.write(body[:server.cut_after.pop(0)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def file_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _file_handler)
+    server.ranges = []
+    server.statuses = []
+    server.cut_after = []
+    server.ignore_range = False
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/artwork/image.png"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    yield session
+    session.close()
+
+
+def _download(session, url, saved_path, **kwargs):
+    kwargs.setdefault("wait", 0)
+    return download_to_file(session, url, str(saved_path), **kwargs)
+
+
+def test_file_is_downloaded(file_server, session, tmp_path):
+    saved_path = tmp_path / "image.png"
+    assert _download(session, file_server.url, saved_path) == str(saved_path)
+    assert saved_path.read_bytes() == CONTENT
+    assert not os.path.exists(str(saved_path) + '.part')
+    assert file_server.ranges == [None]
+
+
+def test_interrupted_download_is_resumed_by_range(file_server, session, tmp_path):
+    # cut at chunk boundaries, a chunk cut in the middle is not written
+    file_server.cut_after = [7 * 4096, 4 * 4096]
+    saved_path = tmp_path / "image.png"
+    assert _download(session, file_server.url, saved_path, chunk_size=4096) == str(saved_path)
+    assert saved_path.read_bytes() == CONTENT
+    assert file_server.ranges == [None, f"bytes={7 * 4096}-", f"bytes={11 * 4096}-"]
+
+
+def test_part_file_of_previous_run_is_resumed(file_server, session, tmp_path):
+    saved_path = tmp_path / "image.png"
+    (tmp_path / "image.png.part").write_bytes(CONTENT[:1000])
+    assert _download(session, file_server.url, saved_path) == str(saved_path)
+    assert saved_path.read_bytes() == CONTENT
+    assert file_server.ranges == ["bytes=1000-"]
+
+
+def test_whole_file_is_written_again_when_range_is_ignored(file_server, session, tmp_path):
+    file_server.ignore_range = True
+    saved_path = tmp_path / "image.png"
+    (tmp_path / "image.png.part").write_bytes(CONTENT[:1000])
+    assert _download(session, file_server.url, saved_path) == str(saved_path)
+    assert saved_path.read_bytes() == CONTENT
+
+
+def test_complete_part_file_is_renamed(file_server, session, tmp_path):
+    saved_path = tmp_path / "image.png"
+    (tmp_path / "image.png.part").write_bytes(CONTENT)
+    assert _download(session, file_server.url, saved_path) == str(saved_path)
+    assert saved_path.read_bytes() == CONTENT
+
+
+def test_failed_download_leaves_no_file(file_server, session, tmp_path):
+    file_server.statuses = [404, 404]
+    saved_path = tmp_path / "image.png"
+    assert _download(session, file_server.url, saved_path, try_count=1) is None
+    assert not saved_path.exists()
+    assert len(file_server.ranges) == 2
+
+
+def test_received_bytes_are_counted(file_server, session, tmp_path):
+    consumed = []
+
+    class _counting_limiter:
+        def consume(self, nbytes):
+            consumed.append(nbytes)
+    _download(session, file_server.url, tmp_path / "image.png", bandwidth_limiter=_counting_limiter(),
+              chunk_size=4096)
+    assert sum(consumed) == len(CONTENT)
+    assert max(consumed) <= 4096
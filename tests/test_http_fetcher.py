@@ -0,0 +1,111 @@
+import pytest
+
+from conftest import make_args
+from Http_Fetcher import youtube_http_fetcher
+from Page_Parser import youtube_page_data
+from Youtube_Scraper_API import youtube_music_channel_scraper_api
+
+
+def _make_fetcher(base_url):
+    return youtube_http_fetcher(base_url=base_url, try_count=2, retry_wait=0)
+
+
+@pytest.fixture
+def fetcher(youtube_server):
+    fetcher = _make_fetcher(youtube_server.base_url)
+    yield fetcher
+    fetcher.close()
+
+
+@pytest.fixture
+def api(youtube_server, tmp_path):
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path),
+                                                      youtube_base_url=youtube_server.base_url))
+    api.http_fetcher.retry_wait = 0
+    yield api
+    api.close()
+
+
+def test_watch_page_is_fetched_from_base_url(youtube_server, fetcher):
+    html = fetcher.get_watch_page("Vb7Yq2kLm0A")
+    assert html is not None
+    assert youtube_page_data(html).get("videoDetails")["videoId"] == "Vb7Yq2kLm0A"
+    assert youtube_server.requests == [("GET", "/watch?v=Vb7Yq2kLm0A&hl=en")]
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_permanent_error_is_not_fetched_again(youtube_server, fetcher, status):
+    youtube_server.statuses["/watch"] = [status]
+    assert fetcher.get_watch_page("Vb7Yq2kLm0A") is None
+    assert len(youtube_server.requests) == 1
+
+
+def test_missing_page_is_not_fetched_again(youtube_server, fetcher):
+    assert fetcher.get_watch_page("deletedVid0") is None
+    assert len(youtube_server.requests) == 1
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_transient_error_is_fetched_again(youtube_server, fetcher, status):
+    youtube_server.statuses["/watch"] = [status, status]
+    assert fetcher.get_watch_page("Vb7Yq2kLm0A") is not None
+    assert len(youtube_server.requests) == 3
+
+
+@pytest.mark.parametrize("status", [500, 503])
+def test_transient_error_gives_up_after_try_count(youtube_server, fetcher, status):
+    # every try of the fetcher is one request, the connection adapter does not retry
+    youtube_server.statuses["/watch"] = [status] * 10
+    assert fetcher.get_watch_page("Vb7Yq2kLm0A") is None
+    assert len(youtube_server.requests) == 3
+
+
+def test_connection_error_gives_up_after_try_count():
+    # nothing listens on port 9 (discard) of the loopback interface
+    fetcher = _make_fetcher("http://127.0.0.1:9")
+    assert fetcher.get_watch_page("Vb7Yq2kLm0A") is None
+    fetcher.close()
+
+
+def test_video_info_of_recorded_watch_page(api):
+    info = api._fetch_video_info("Vb7Yq2kLm0A")
+    assert info == {
+        "video_upload_date": "29 Apr 2018",
+        "video_title": "Aurora Lane - Northern Lights (feat. Mira) [NCS Release]",
+        "video_id": "Vb7Yq2kLm0A",
+        "chapters": None,
+        "video_duration": "214",
+        "thumbnail_url": "https://i.ytimg.com/vi/Vb7Yq2kLm0A/maxresdefault.jpg",
+        "artwork_url": "https://www.artstation.com/artwork/lVn2Ex",
+    }
+
+
+def test_video_info_with_chapters(api):
+    info = api._fetch_video_info("Qm3Tz8HcW1s")
+    assert info["video_duration"] == "1510"
+    assert info["artwork_url"] == "https://www.pixiv.net/en/artworks/107655320"
+    assert info["chapters"] == [
+        {"title": "Intro", "start_time": "0:00:00", "end_time": "0:03:25"},
+        {"title": "Snowfall", "start_time": "0:03:25", "end_time": "0:08:02"},
+        {"title": "Frozen Lake", "start_time": "0:08:02", "end_time": "0:15:40"},
+        {"title": "Outro", "start_time": "0:15:40", "end_time": "0:25:10"},
+    ]
+
+
+def test_shorts_video_is_skipped(api):
+    assert api._fetch_video_info("Hs0rT5pQa9Z") is None
+
+
+def test_long_video_without_chapters_is_skipped(api):
+    assert api._fetch_video_info("Lx4Nn6bVe2R") is None
+
+
+def test_video_before_stop_upload_date_stops_scraping(api):
+    api.stop_upload_date = "11 Apr 2023"
+    info = api._fetch_video_info("Qm3Tz8HcW1s")
+    assert info == {"video_upload_date": "3 Mar 2023", "stop_scrape": True}
+
+
+def test_missing_watch_page_gives_empty_info(youtube_server, api):
+    assert api._fetch_video_info("deletedVid0") == {}
+    assert len(youtube_server.requests) == 1
@@ -0,0 +1,113 @@
+import pytest
+
+from Rate_Limiter import token_bucket_rate_limiter, bandwidth_limiter, host_of
+
+URL = "https://www.youtube.com/watch?v=Vb7Yq2kLm0A"
+
+
+class _fake_clock:
+    # a clock which only moves when the limiter sleeps (or the test advances it)
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock, **kwargs):
+    kwargs.setdefault("jitter", 0)
+    return token_bucket_rate_limiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_requests_are_spaced_by_the_rate():
+    clock = _fake_clock()
+    limiter = _limiter(clock, requests_per_minute=60)
+    assert [limiter.acquire(URL) for _ in range(4)] == [0, 1.0, 1.0, 1.0]
+    assert clock.now == 1003.0
+
+
+def test_idle_time_refills_up_to_burst():
+    clock = _fake_clock()
+    limiter = _limiter(clock, requests_per_minute=60, burst=3)
+    assert [limiter.acquire(URL) for _ in range(4)] == [0, 0, 0, 1.0]
+    clock.now += 60
+    # only burst tokens are kept, however long the host was idle
+    assert [limiter.acquire(URL) for _ in range(4)] == [0, 0, 0, 1.0]
+
+
+def test_concurrent_requests_queue_up():
+    # the token is reserved before the wait, the second worker waits behind the first
+    clock = _fake_clock()
+    limiter = token_bucket_rate_limiter(requests_per_minute=60, jitter=0, clock=clock, sleep=clock.sleeps.append)
+    assert [limiter.acquire(URL) for _ in range(3)] == [0, 1.0, 2.0]
+
+
+def test_jitter_only_lengthens_the_wait():
+    clock = _fake_clock()
+    limiter = token_bucket_rate_limiter(requests_per_minute=60, jitter=0.25, clock=clock, sleep=clock.sleeps.append)
+    limiter.acquire(URL)
+    for n in range(1, 20):
+        assert n <= limiter.acquire(URL) <= n * 1.25
+
+
+def test_hosts_have_their_own_buckets():
+    clock = _fake_clock()
+    limiter = _limiter(clock, requests_per_minute=60, host_requests_per_minute={"pixiv.net": 30})
+    assert limiter.acquire(URL) == 0
+    assert limiter.acquire("https://youtube.com/watch?v=Qm3Tz8HcW1s") == 1.0
+    assert limiter.acquire("https://i.pximg.net/img-original/1.jpg") == 0
+    assert limiter.acquire("https://www.pixiv.net/en/artworks/107655320") == 0
+    assert limiter.acquire("https://www.pixiv.net/en/artworks/107655321") == 2.0
+
+
+@pytest.mark.parametrize("status_code, final_url", [(429, None), (503, None),
+                                                    (200, "https://consent.youtube.com/m?continue=x")])
+def test_blocked_host_is_slowed_down(status_code, final_url):
+    clock = _fake_clock()
+    limiter = _limiter(clock, requests_per_minute=60)
+    limiter.acquire(URL)
+    assert limiter.report(URL, status_code, final_url) is True
+    # half of the rate, and the bucket is emptied
+    assert limiter.acquire(URL) == 2.0
+
+
+def test_slowdown_is_capped_and_recovers():
+    clock = _fake_clock()
+    limiter = _limiter(clock, requests_per_minute=60, max_slowdown=4)
+    for _ in range(5):
+        limiter.report(URL, 429)
+    limiter.acquire(URL)
+    assert limiter.acquire(URL) == 4.0
+    for _ in range(100):
+        assert limiter.report(URL, 200, URL) is False
+    limiter.acquire(URL)
+    assert limiter.acquire(URL) == 1.0
+
+
+def test_host_of():
+    assert host_of("https://www.youtube.com/watch?v=x") == "youtube.com"
+    assert host_of("https://i.pximg.net/img-original/1.jpg") == "pximg.net"
+    assert host_of("localhost:8000") == "localhost"
+
+
+def test_bandwidth_limiter_waits_for_the_bytes():
+    clock = _fake_clock()
+    limiter = bandwidth_limiter(1000, clock=clock, sleep=clock.sleep)
+    assert limiter.consume(1000) == 0
+    assert limiter.consume(500) == 0.5
+    clock.now += 10
+    assert limiter.consume(1000) == 0
+    assert limiter.consume(250) == 0.25
+
+
+def test_unlimited_bandwidth_never_waits():
+    clock = _fake_clock()
+    limiter = bandwidth_limiter(0, clock=clock, sleep=clock.sleep)
+    assert limiter.consume(10 ** 9) == 0
+    assert clock.sleeps == []
@@ -0,0 +1,52 @@
+import pytest
+
+import Utils
+from Utils import rename, rename_many
+
+TITLES = ["Aurora Lane - Northern Lights (feat. Mira) [NCS Release]",
+          "Mira - Intro", "Song (feat. X", "Mira - Intro", "Mira - Snowfall"]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    Utils._rename_cache.clear()
+    yield
+    Utils._rename_cache.clear()
+
+
+def _no_pool(*args, **kwargs):
+    raise AssertionError("the titles are cached, no process pool is needed")
+
+
+def test_titles_are_renamed_in_order():
+    results = rename_many(TITLES)
+    assert [renamed for renamed, error in results] == \
+           [rename(TITLES[0]), rename("Mira - Intro"), None, rename("Mira - Intro"), rename("Mira - Snowfall")]
+    assert results[2][1].startswith("IndexError")
+
+
+def test_pool_results_are_cached(monkeypatch):
+    serial_results = rename_many(TITLES)
+    Utils._rename_cache.clear()
+
+    assert rename_many(TITLES, workers=2, pool_threshold=2) == serial_results
+    assert set(Utils._rename_cache) == set(TITLES)
+
+    # the next batch is answered by the cache of this process
+    monkeypatch.setattr(Utils, "ProcessPoolExecutor", _no_pool)
+    assert rename_many(TITLES, workers=2, pool_threshold=2) == serial_results
+
+
+def test_only_missed_titles_go_to_pool(monkeypatch):
+    rename_many(TITLES[:3])
+    monkeypatch.setattr(Utils, "ProcessPoolExecutor", _no_pool)
+    # one title is not cached, which is below the pool threshold
+    assert rename_many(TITLES, workers=2, pool_threshold=2)[4] == (rename("Mira - Snowfall"), None)
+
+
+def test_least_recently_used_title_is_dropped(monkeypatch):
+    monkeypatch.setattr(Utils, "RENAME_CACHE_SIZE", 2)
+    rename_many(["Mira - Intro", "Mira - Outro"])
+    rename_many(["Mira - Intro"])
+    rename_many(["Mira - Snowfall"])
+    assert list(Utils._rename_cache) == ["Mira - Intro", "Mira - Snowfall"]
@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+
+import pytest
+
+from conftest import make_args, FIXTURES_PATH
+from Checkpoint_Log import video_info_checkpoint_log
+from Driver_Pool import firefox_driver_pool
+from Youtube_Scraper_API import youtube_music_channel_scraper_api
+
+AURORA_LANE_VIDEO_IDS = ["Pt6wK1sDf3E", "Vb7Yq2kLm0A", "Qm3Tz8HcW1s",
+                         "Lx4Nn6bVe2R", "Ck2Uv9wRt7Y",
+                         "Jd8Ee0oGh5U", "Ry1Ii4mNb8O"]
+
+
+@pytest.fixture
+def api(youtube_server, tmp_path):
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path),
+                                                      youtube_base_url=youtube_server.base_url))
+    api.http_fetcher.retry_wait = 0
+    yield api
+    api.close()
+
+
+class _fake_driver:
+    # a browser session that loads the watch pages in tests/fixtures
+
+    def __init__(self):
+        self.current_url = None
+        self.page_source = ""
+
+    def get(self, url):
+        self.current_url = url
+        filepath = os.path.join(FIXTURES_PATH, f"watch_{url.split('watch?v=')[-1]}.html")
+        self.page_source = ""
+        if os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                self.page_source = f.read()
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        pass
+
+
+class _fake_driver_pool(firefox_driver_pool):
+
+    def _new_driver(self):
+        driver = _fake_driver()
+        with self._lock:
+            self._pages[driver] = 0
+        return driver
+
+
+def _interrupt_after(api, monkeypatch, count):
+    # the fetch process is interrupted after count videos are fetched
+    fetch_in_order = api._fetch_video_info_in_order
+
+    def interrupted(video_ids):
+        video_infos = fetch_in_order(video_ids)
+        try:
+            for n, item in enumerate(video_infos):
+                if n == count:
+                    raise KeyboardInterrupt
+                yield item
+        finally:
+            video_infos.close()
+    monkeypatch.setattr(api, "_fetch_video_info_in_order", interrupted)
+
+
+def _watched(youtube_server):
+    return [path for method, path in youtube_server.requests if path.startswith("/watch")]
+
+
+def test_update_finishes_interrupted_fetch_first(youtube_server, api, tmp_path, monkeypatch):
+    # the channel was listed before its two newest videos were uploaded
+    with open(tmp_path / "channel_videos_id_list.txt", 'w') as f:
+        f.write('\n'.join(AURORA_LANE_VIDEO_IDS[2:]) + '\n')
+    _interrupt_after(api, monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        api._fetch_video_info_batch(None, str(tmp_path))
+    assert os.path.exists(tmp_path / "channel_videos_info_list.jsonl")
+    assert not os.path.exists(tmp_path / "channel_videos_info_list.json")
+    monkeypatch.undo()
+
+    youtube_server.requests.clear()
+    api.update = True
+    channel_page = api.channel_lister.open_channel("https://www.youtube.com/@AuroraLane/videos")
+    video_info_list = api._fetch_video_info_batch(None, str(tmp_path), channel_page)
+
+    # the logged video info is kept, the rest of the saved video ids are fetched, then the new videos
+    assert [info["video_id"] for info in video_info_list] == ["Vb7Yq2kLm0A", "Qm3Tz8HcW1s"]
+    assert _watched(youtube_server) == [f"/watch?v={video_id}&hl=en"
+                                        for video_id in AURORA_LANE_VIDEO_IDS[3:] + AURORA_LANE_VIDEO_IDS[:2]]
+    with open(tmp_path / "channel_videos_info_list.json", 'r') as f:
+        assert json.load(f) == video_info_list
+    assert api._read_video_ids(str(tmp_path / "channel_videos_id_list.txt")) == AURORA_LANE_VIDEO_IDS
+    assert not os.path.exists(tmp_path / "channel_videos_info_list.jsonl")
+
+
+def test_interrupted_fetch_is_resumed_from_log(youtube_server, api, tmp_path, monkeypatch):
+    with open(tmp_path / "channel_videos_id_list.txt", 'w') as f:
+        f.write('\n'.join(AURORA_LANE_VIDEO_IDS) + '\n')
+    _interrupt_after(api, monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        api._fetch_video_info_batch(None, str(tmp_path))
+    monkeypatch.undo()
+
+    youtube_server.requests.clear()
+    video_info_list = api._fetch_video_info_batch(None, str(tmp_path))
+    assert [info["video_id"] for info in video_info_list] == ["Vb7Yq2kLm0A", "Qm3Tz8HcW1s"]
+    assert _watched(youtube_server) == [f"/watch?v={video_id}&hl=en" for video_id in AURORA_LANE_VIDEO_IDS[3:]]
+    assert not os.path.exists(tmp_path / "channel_videos_info_list.jsonl")
+
+
+def test_listing_releases_channel_driver_before_replay(tmp_path, monkeypatch):
+    # selenium engine with a single driver, which is shared by the channel page and the pipeline stages
+    api = youtube_music_channel_scraper_api(make_args(saved_path=str(tmp_path), fetch_engine='selenium',
+                                                      driver_pool_size=1))
+    api.driver_pool = _fake_driver_pool(api.opts, max_size=1)
+    monkeypatch.setattr(api, "_scroll_video_ids", lambda driver: list(AURORA_LANE_VIDEO_IDS))
+    # the previous run was interrupted while the channel was listed
+    checkpoint_log = video_info_checkpoint_log(str(tmp_path / "channel_videos_info_list.jsonl"))
+    checkpoint_log.append("Pt6wK1sDf3E", None)
+    checkpoint_log.append("Vb7Yq2kLm0A", {"video_id": "Vb7Yq2kLm0A", "artwork_url": None})
+    checkpoint_log.close()
+
+    received = []
+
+    def on_video_info(info):
+        # like the artwork stage, every video info needs a driver of the pool
+        with api.driver_pool.driver():
+            received.append(info["video_id"])
+
+    driver = api.driver_pool.acquire()
+    with api._channel_drivers_lock:
+        api._channel_drivers.add(driver)
+    result = []
+    fetch = threading.Thread(target=lambda: result.append(
+                             api._fetch_video_info_batch(driver, str(tmp_path), on_video_info=on_video_info)),
+                             daemon=True)
+    fetch.start()
+    fetch.join(timeout=30)
+    assert not fetch.is_alive(), "the replay waits for the channel driver"
+    assert received == ["Vb7Yq2kLm0A", "Qm3Tz8HcW1s"]
+    assert [info["video_id"] for info in result[0]] == received
+    assert api._read_video_ids(str(tmp_path / "channel_videos_id_list.txt")) == AURORA_LANE_VIDEO_IDS
+    api.close()
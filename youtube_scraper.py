@@ -1,11 +1,14 @@
 import os
 import sys
 import time
+import json
 import argparse
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from lib.Utils import *
 from lib.Youtube_Scraper_API import youtube_music_channel_scraper_api
+from lib.Checkpoint_Log import write_json_atomic
 
 """
 Scrape all video information and download all the videos of given Youtube channels.
@@ -16,9 +19,34 @@ class scraper_by_given_artist_channels:
 
     def __init__(self, args, ):
         self.youtube_scraper_api = youtube_music_channel_scraper_api(args)
+        # number of channels processed at the same time
+        self.channel_workers = max(1, int(args.channel_workers))
+        # progress of every channel, which aims to resume the scraper at the channel level
+        self.progress_filepath = os.path.join(args.saved_path, 'channel_progress.json')
 
     def _process(self, channel_url):
-        self.youtube_scraper_api.download_youtube_channel(channel_url)
+        return self.youtube_scraper_api.download_youtube_channel(channel_url)
+
+    def close(self):
+        self.youtube_scraper_api.close()
+
+    def _load_progress(self):
+        if not os.path.exists(self.progress_filepath):
+            return {}
+        with open(self.progress_filepath, 'r') as f:
+            return json.load(f)
+
+    def _report_throughput(self, start_time, channel_done_count, channel_total_count):
+        minutes = max((time.time() - start_time) / 60, 1e-6)
+        stats = self.youtube_scraper_api.get_stats()
+        print(f"  throughput: {channel_done_count}/{channel_total_count} channels, "
+              f"{round(stats['video_info'] / minutes, 2)} video info/min, "
+              f"{round(stats['downloads'] / minutes, 2)} downloads/min, "
+              f"{self.youtube_scraper_api.download_executor.get_progress()['failed']} failed downloads")
+        if self.youtube_scraper_api.artwork_cache is not None:
+            cache_stats = self.youtube_scraper_api.artwork_cache.get_stats()
+            print(f"  artwork cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                  f"{cache_stats['urls']} artworks, {round(cache_stats['bytes'] / 1024 / 1024, 2)} MB")
 
 
     def start(self):
@@ -37,36 +65,53 @@ class scraper_by_given_artist_channels:
                 channel_urls.append(channel_url)
 
 
-
-        resume_idx = 0
-        if resume_idx > 0:
-            print(f"  resume processing {resume_idx}/{len(channel_urls)}th given channel: {channel_urls[resume_idx]}")
-
-        start_time = time.time()
-        for idx in pit(range(resume_idx,len(channel_urls)), text="Given music channels", color="blue"):
-
-            channel_url = channel_urls[idx]
-            self._process(channel_url)
-            
-            
-            execution_time = time.time() - start_time
-            
-            """
-            Processing the scraper program over 50 mins could provoke the 
-            triger that Youtube detect and recognise the scraper then ban
-            the program, thus the following code is a trick for long running 
-            which pauses the scraper for 100 seconds when total running time 
-            is over 50 mins.
-            Mostly time it should be working.
-            """
-            # long pause when scraper works over 50 mins
-            # otherwise, short pause
-            if execution_time / 60 > 50:
-                pause_report(length=100, file_count=None,disp=False)
-                start_time = time.time()
-            else:
-                pause_report(length=10,file_count=None,disp=False)
-
+        # skip the channels finished by previous runs, unless channels are updated,
+        # a 'partial' or 'failed' channel is processed again
+        progress = self._load_progress()
+        if self.youtube_scraper_api.update:
+            pending_channel_urls = channel_urls
+        else:
+            pending_channel_urls = [channel_url for channel_url in channel_urls 
+                                    if progress.get(channel_url, {}).get('status') != 'done']
+        if len(pending_channel_urls) < len(channel_urls):
+            print(f"  resume processing: {len(channel_urls) - len(pending_channel_urls)}/{len(channel_urls)} given channels are done.")
+
+        """
+        Channels are processed by channel_workers threads, which share the same
+        youtube_scraper_api, thus the browsers (driver_pool_size), concurrent 
+        downloads (download_workers, max_concurrent_downloads), bandwidth (max_bandwidth) and 
+        request rates (requests_per_minute) are global limits over all channels.
+        """
+        channel_done_count = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.channel_workers) as executor:
+                futures = {}
+                for channel_url in pending_channel_urls:
+                    futures[executor.submit(self._process, channel_url)] = channel_url
+                
+                for future in pit(as_completed(futures), text="Given music channels", color="blue", total=len(futures)):
+                    channel_url = futures[future]
+                    try:
+                        summary = future.result()
+                    except Exception as e:
+                        print(f"Error: fail to process channel {channel_url}, {e}")
+                        summary = None
+                    if summary is None:
+                        status = 'failed'
+                        summary = {'video_count': None}
+                    elif summary['failed'] == 0 and summary['incomplete'] == 0:
+                        status = 'done'
+                    else:
+                        # some downloads failed, they are tried again by the next run
+                        status = 'partial'
+                    progress[channel_url] = {'status': status, **summary,
+                                             'finished_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+                    write_json_atomic(self.progress_filepath, progress)
+                    channel_done_count += 1
+                    self._report_throughput(start_time_total, channel_done_count, len(pending_channel_urls))
+        finally:
+            # quit the firefox sessions and the pools, even if the scraper is interrupted
+            self.close()
         execution_time = (time.time() - start_time_total)/60
         
         print(f"The youtube scraper by given artists executes : {round(execution_time,2)} min")
@@ -91,6 +136,31 @@ def main():
     parser.add_argument("--detail_disp",  default=False)
     parser.add_argument("--firefoxOptions",  default=None,
                         help="choose from [None, headless]")
+    parser.add_argument("--driver_pool_size",  default=1, type=int,
+                        help="max number of firefox sessions kept alive")
+    parser.add_argument("--driver_max_pages",  default=50, type=int,
+                        help="recycle a firefox session after it loads this many pages")
+    parser.add_argument("--fetch_engine",  default="selenium",
+                        choices=["selenium", "http"],
+                        help="load youtube pages by firefox or by plain http requests")
+    parser.add_argument("--youtube_base_url",  default="https://www.youtube.com",
+                        help="base url of youtube pages fetched by the http engine")
+    parser.add_argument("--threads",  default=1, type=int,
+                        help="number of workers to fetch video info in parallel")
+    parser.add_argument("--requests_per_minute",  default=20, type=float,
+                        help="max requests per minute to each host, slowed down automatically when blocked")
+    parser.add_argument("--rate_jitter",  default=0.25, type=float,
+                        help="random jitter added to the waiting time between requests")
+    parser.add_argument("--channel_workers",  default=1, type=int,
+                        help="number of channels processed at the same time")
+    parser.add_argument("--max_concurrent_downloads",  default=2, type=int,
+                        help="max number of videos downloaded at the same time over all channels")
+    parser.add_argument("--download_workers",  default=4, type=int,
+                        help="number of threads downloading videos and artworks over all channels")
+    parser.add_argument("--max_bandwidth",  default=0, type=int,
+                        help="max download bandwidth over all downloads in KB/s, 0 means unlimited")
+    parser.add_argument("--artwork_cache_size",  default=1024, type=int,
+                        help="max size of the artwork cache shared by all channels in MB, 0 disables the cache")
     
     
     args = parser.parse_args()